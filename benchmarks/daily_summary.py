@@ -0,0 +1,86 @@
+"""Time the daily summary report over the daily_sales_summary rollup against re-aggregating
+bills with GROUP BY DATE(bill_date), on a synthetic database.
+
+Usage: python benchmarks/daily_summary.py [--bills 500000] [--days 1095] [--runs 5]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from pages.reports import DAILY_SUMMARY_QUERY
+
+BILLS_QUERY = """
+    SELECT DATE(bill_date) as date,
+           SUM(CASE WHEN bill_type = 'Sales' AND status != 'Cancelled' THEN total_amount ELSE 0 END) as sales,
+           SUM(CASE WHEN bill_type = 'Purchase' AND status != 'Cancelled' THEN total_amount ELSE 0 END) as purchases,
+           SUM(CASE WHEN status != 'Cancelled' THEN
+               CASE bill_type WHEN 'Sales' THEN total_amount WHEN 'Purchase' THEN -total_amount ELSE 0 END
+           ELSE 0 END) as net,
+           COUNT(CASE WHEN bill_type = 'Sales' THEN 1 END) as sales_count,
+           COUNT(CASE WHEN bill_type = 'Purchase' THEN 1 END) as purchase_count
+    FROM bills
+    WHERE DATE(bill_date) BETWEEN ? AND ?
+    GROUP BY DATE(bill_date)
+    ORDER BY date DESC
+"""
+
+
+def timed(query, params, runs):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = db.fetch_query(query, params)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return rows, best
+
+
+def rounded(rows):
+    return [tuple(round(value, 2) if isinstance(value, float) else value for value in row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bills', type=int, default=500000)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    rng = random.Random(11)
+    first = date.today() - timedelta(days=args.days - 1)
+    
+    started = time.perf_counter()
+    conn = db.get_connection()
+    conn.executemany("""
+        INSERT INTO bills (bill_number, bill_type, bill_date, total_amount, paid_amount, payment_mode, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, ((f"B{i:08d}", rng.choice(('Sales', 'Sales', 'Purchase')),
+           (first + timedelta(days=i * args.days // args.bills)).isoformat(), amount, amount,
+           rng.choice(('Cash', 'Card', 'UPI')), rng.choice(('Completed', 'Completed', 'Pending', 'Cancelled')))
+          for i, amount in ((i, rng.uniform(1000, 500000)) for i in range(args.bills))))
+    conn.commit()
+    conn.close()
+    print(f"inserted {args.bills:,} bills through the rollup triggers in {time.perf_counter() - started:.2f}s")
+    
+    groups = db.fetch_one("SELECT COUNT(*) FROM daily_sales_summary")[0]
+    print(f"rollup holds {groups:,} groups")
+    
+    for label, start in (("30 days", date.today() - timedelta(days=29)), ("all days", first)):
+        rollup_rows, rollup_seconds = timed(DAILY_SUMMARY_QUERY, db.date_bounds(start, date.today()), args.runs)
+        bills_rows, bills_seconds = timed(BILLS_QUERY, (start.isoformat(), date.today().isoformat()), args.runs)
+        same = rounded(rollup_rows) == rounded(bills_rows)
+        print(f"{label:<9} rollup {rollup_seconds * 1000:8.1f} ms   bills {bills_seconds * 1000:8.1f} ms   "
+              f"{len(rollup_rows):,} days, results match: {same}")
+
+
+if __name__ == '__main__':
+    main()
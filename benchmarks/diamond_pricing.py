@@ -0,0 +1,95 @@
+"""Time pricing a loose-diamond parcel through the DiamondRateService rate matrix
+against one diamond_rates query per stone.
+
+Usage: python benchmarks/diamond_pricing.py [--stones 5000] [--days 1] [--repeat 5]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from services.gold_rate_service import DiamondRateService
+
+CARAT_BANDS = [(0, 0.3), (0.3, 0.5), (0.5, 0.7), (0.7, 1.0), (1.0, 1.5), (1.5, 2.0), (2.0, 3.0), (3.0, 10)]
+
+PER_STONE_QUERY = """
+    SELECT rate_per_carat FROM diamond_rates
+    WHERE clarity = ? AND color = ? AND shape = ? AND carat_from <= ? AND carat_to >= ? AND is_active = 1
+    ORDER BY rate_date DESC, id DESC
+    LIMIT 1
+"""
+
+
+def populate(cursor, days, rng):
+    rows = []
+    for day in range(days):
+        rate_date = (date(2026, 1, 1) + timedelta(days=day)).isoformat()
+        for shape in DiamondRateService.SHAPES:
+            for clarity in DiamondRateService.CLARITIES:
+                for color in DiamondRateService.COLORS:
+                    for carat_from, carat_to in CARAT_BANDS:
+                        rows.append((rate_date, shape, clarity, color, carat_from, carat_to,
+                                     rng.uniform(20000, 900000)))
+    cursor.executemany("""
+        INSERT INTO diamond_rates (rate_date, shape, clarity, color, carat_from, carat_to, rate_per_carat)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    return len(rows)
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stones', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=1, help="days of rate history")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    rng = random.Random(11)
+    
+    conn = db.get_connection()
+    rates = populate(conn.cursor(), args.days, rng)
+    conn.commit()
+    conn.close()
+    
+    stones = [(round(rng.uniform(0.1, 4.0), 2), rng.choice(DiamondRateService.CLARITIES),
+               rng.choice(DiamondRateService.COLORS), rng.choice(DiamondRateService.SHAPES))
+              for _ in range(args.stones)]
+    
+    def per_stone():
+        values = []
+        for carat, clarity, color, shape in stones:
+            row = db.fetch_one(PER_STONE_QUERY, (clarity, color, shape, carat, carat))
+            values.append(carat * row[0] if row else None)
+        return values
+    
+    build_ms = best_of(args.repeat, DiamondRateService.refresh_matrix)
+    matrix_ms = best_of(args.repeat, lambda: DiamondRateService.price_parcel(stones))
+    query_ms = best_of(1, per_stone)
+    assert DiamondRateService.price_parcel(stones) == per_stone()
+    
+    print(f"{rates:,} rate rows, {args.stones:,} stones")
+    print(f"{'build matrix':<16}{build_ms:>10.2f} ms")
+    print(f"{'price_parcel':<16}{matrix_ms:>10.2f} ms")
+    print(f"{'query per stone':<16}{query_ms:>10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Time ExportService.export_stock_movements streaming a large stock_movements table to
+CSV, gzipped CSV and TSV, with the peak memory of the process.
+
+Usage: python benchmarks/export.py [--movements 1000000] [--items 5000]
+"""
+import argparse
+import random
+import resource
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+import utils.export as export
+from utils.export import ExportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movements', type=int, default=1000000)
+    parser.add_argument('--items', type=int, default=5000)
+    args = parser.parse_args()
+    
+    workdir = Path(tempfile.mkdtemp())
+    db.DATABASE_PATH = workdir / 'benchmark.db'
+    export.EXPORT_PATH = workdir
+    db.create_tables()
+    rng = random.Random(5)
+    
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO items (name, barcode, price, quantity, weight_in_gm) VALUES (?, ?, ?, ?, ?)",
+                     ((f"Item {i}", f"EXP{i:08d}", rng.uniform(1000, 200000), 10, rng.uniform(1, 50))
+                      for i in range(args.items)))
+    conn.executemany("""
+        INSERT INTO stock_movements (item_id, transaction_type, quantity_change, weight_change,
+                                     new_quantity, new_weight, reason, date_created)
+        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('2024-01-01', ? || ' seconds'))
+    """, ((rng.randint(1, args.items), rng.choice(('IN', 'OUT')), rng.randint(1, 5), rng.uniform(0, 20),
+           rng.randint(0, 50), rng.uniform(0, 500), "Benchmark", i * 30) for i in range(args.movements)))
+    conn.commit()
+    conn.close()
+    
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for label, compress, delimiter in (("csv", False, ','), ("csv.gz", True, ','), ("tsv", False, '\t')):
+        stats = ExportService.export_stock_movements(compress=compress, delimiter=delimiter)
+        size = stats['path'].stat().st_size / 2 ** 20
+        print(f"{label:<7} {stats['rows']:>10,} rows in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second']:,.0f}/s), {size:,.1f} MB")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"peak RSS grew {(peak - before) / 1024:,.1f} MB while exporting")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Time the hot dashboard/report/bill-list queries on a synthetic database,
+without and with the versioned index pack.
+
+Usage: python benchmarks/index_pack.py [--bills 1000000] [--repeat 5]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+
+QUERIES = [
+    ("today's sales", """
+        SELECT COALESCE(SUM(total_amount), 0), COUNT(*) FROM bills
+        WHERE bill_type = 'Sales' AND DATE(bill_date) = ?
+    """, lambda today: (today,)),
+    ("month sales", """
+        SELECT COALESCE(SUM(total_amount), 0) FROM bills
+        WHERE bill_type = 'Sales' AND bill_date >= ? AND bill_date < ?
+    """, lambda today: (today[:8] + '01', today)),
+    ("customer bills", """
+        SELECT id, bill_number, bill_date, total_amount FROM bills
+        WHERE customer_id = ? ORDER BY bill_date DESC
+    """, lambda today: (42,)),
+    ("supplier bills", """
+        SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM bills WHERE supplier_id = ?
+    """, lambda today: (7,)),
+    ("bill lines", """
+        SELECT item_id, quantity, line_total FROM bill_items WHERE bill_id = ?
+    """, lambda today: (123456,)),
+    ("item movements", """
+        SELECT id, transaction_type, quantity_change, date_created FROM stock_movements
+        WHERE item_id = ? ORDER BY date_created DESC LIMIT 100
+    """, lambda today: (17,)),
+    ("recent movements", """
+        SELECT COUNT(*) FROM stock_movements WHERE date_created >= ?
+    """, lambda today: (today,)),
+    ("due advance orders", """
+        SELECT COUNT(*) FROM advance_orders
+        WHERE status = 'Pending' AND expected_delivery_date <= ?
+    """, lambda today: (today,)),
+    ("current 22K rate", """
+        SELECT rate_per_gram FROM gold_rates
+        WHERE purity = '22K' AND is_active = 1 ORDER BY rate_date DESC LIMIT 1
+    """, lambda today: ()),
+]
+
+
+def populate(cursor, bill_count, item_count=5000, customer_count=20000, supplier_count=200):
+    rng = random.Random(1)
+    start = date.today() - timedelta(days=3 * 365)
+    now = datetime.now()
+    
+    cursor.executemany("INSERT INTO customers (name, phone) VALUES (?, ?)",
+                       ((f"Customer {i}", f"9{i:09d}") for i in range(customer_count)))
+    cursor.executemany("INSERT INTO suppliers (name) VALUES (?)",
+                       ((f"Supplier {i}",) for i in range(supplier_count)))
+    cursor.executemany("INSERT INTO items (name, price, quantity, material_id) VALUES (?, ?, ?, ?)",
+                       ((f"Item {i}", rng.uniform(1000, 200000), rng.randint(0, 50), 1 + i % 3)
+                        for i in range(item_count)))
+    
+    def bills():
+        for i in range(bill_count):
+            bill_date = (start + timedelta(days=i * 3 * 365 // bill_count)).isoformat()
+            if rng.random() < 0.8:
+                yield (f"SB-{i}", 'Sales', rng.randint(1, customer_count), None, bill_date,
+                       rng.uniform(1000, 500000))
+            else:
+                yield (f"PB-{i}", 'Purchase', None, rng.randint(1, supplier_count), bill_date,
+                       rng.uniform(1000, 500000))
+    
+    cursor.executemany("""
+        INSERT INTO bills (bill_number, bill_type, customer_id, supplier_id, bill_date, total_amount)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, bills())
+    cursor.executemany("""
+        INSERT INTO bill_items (bill_id, item_id, quantity, unit_price, line_total)
+        VALUES (?, ?, 1, ?, ?)
+    """, ((bill_id, rng.randint(1, item_count), price, price)
+          for bill_id in range(1, bill_count + 1) for price in (rng.uniform(1000, 100000),)))
+    cursor.executemany("""
+        INSERT INTO stock_movements (item_id, transaction_type, quantity_change, date_created)
+        VALUES (?, ?, ?, ?)
+    """, ((rng.randint(1, item_count), 'OUT', -1,
+           str(start + timedelta(days=i * 3 * 365 // bill_count))) for i in range(bill_count)))
+    cursor.executemany("""
+        INSERT INTO advance_orders (order_number, customer_id, order_date, expected_delivery_date, status)
+        VALUES (?, ?, ?, ?, ?)
+    """, ((f"AO-{i}", rng.randint(1, customer_count), start.isoformat(),
+           (start + timedelta(days=rng.randint(0, 3 * 365 + 60))).isoformat(),
+           rng.choice(['Pending', 'Completed', 'Delivered', 'Cancelled']))
+          for i in range(bill_count // 20)))
+    cursor.executemany("""
+        INSERT INTO gold_rates (rate_date, purity, rate_per_gram, date_created) VALUES (?, ?, ?, ?)
+    """, (((start + timedelta(days=d)).isoformat(), purity, rng.uniform(5000, 7000), now)
+          for d in range(3 * 365) for purity in ('24K', '22K', '18K')))
+
+
+def time_queries(cursor, repeat):
+    today = date.today().isoformat()
+    timings = {}
+    for label, sql, params in QUERIES:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(sql, params(today)).fetchall()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = best * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bills', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    db.drop_indexes(cursor, db.INDEX_PACK_V1)
+    
+    started = time.perf_counter()
+    populate(cursor, args.bills)
+    conn.commit()
+    print(f"Populated {args.bills:,} bills in {time.perf_counter() - started:.1f}s ({db.DATABASE_PATH})")
+    
+    before = time_queries(cursor, args.repeat)
+    
+    started = time.perf_counter()
+    cursor.execute("PRAGMA user_version = 0")
+    db.run_schema_migrations(cursor)
+    conn.commit()
+    print(f"Applied index pack in {time.perf_counter() - started:.1f}s")
+    
+    after = time_queries(cursor, args.repeat)
+    conn.close()
+    
+    print(f"\n{'query':<22}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for label, _, _ in QUERIES:
+        speedup = before[label] / after[label] if after[label] else float('inf')
+        print(f"{label:<22}{before[label]:>12.2f}{after[label]:>12.2f}{speedup:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
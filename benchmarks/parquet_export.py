@@ -0,0 +1,79 @@
+"""Time ExportService.export_parquet on a synthetic year of bills, bill items, payments,
+transactions and stock movements: the first full export, an incremental run after a few
+bills change, and reading the year back with read_parquet.
+
+Usage: python benchmarks/parquet_export.py [--bills 50000] [--movements 1000000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from database.db import EXPORT_TABLES
+from utils.export import ExportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bills', type=int, default=50000)
+    parser.add_argument('--movements', type=int, default=1000000)
+    parser.add_argument('--changed', type=int, default=500, help="bills updated before the incremental run")
+    args = parser.parse_args()
+    
+    workdir = Path(tempfile.mkdtemp())
+    db.DATABASE_PATH = workdir / 'benchmark.db'
+    root = workdir / 'analytics'
+    db.create_tables()
+    rng = random.Random(9)
+    
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO items (name, price, quantity) VALUES (?, ?, ?)",
+                     ((f"Item {i}", rng.uniform(1000, 200000), 10) for i in range(5000)))
+    conn.executemany("""
+        INSERT INTO bills (bill_number, bill_type, bill_date, total_amount, paid_amount, status)
+        VALUES (?, 'Sales', date('2024-01-01', ? || ' days'), ?, ?, 'Paid')
+    """, ((f"B{i:08d}", i * 366 // args.bills, amount, amount)
+          for i, amount in ((i, rng.uniform(1000, 500000)) for i in range(args.bills))))
+    conn.executemany("""
+        INSERT INTO bill_items (bill_id, item_id, quantity, unit_price, line_total, weight_in_gm)
+        VALUES (?, ?, 1, ?, ?, ?)
+    """, ((bill_id, rng.randint(1, 5000), price, price, rng.uniform(1, 50))
+          for bill_id in range(1, args.bills + 1) for price in (rng.uniform(1000, 200000) for _ in range(3))))
+    conn.executemany("""
+        INSERT INTO payments (payment_type, payment_date, amount, reference_type, reference_id)
+        VALUES ('Receipt', date('2024-01-01', ? || ' days'), ?, 'bill', ?)
+    """, ((bill_id * 366 // args.bills, rng.uniform(1000, 500000), bill_id) for bill_id in range(1, args.bills + 1)))
+    conn.executemany("""
+        INSERT INTO transactions (transaction_type, transaction_date, account_head, credit_amount)
+        VALUES ('Sale', date('2024-01-01', ? || ' days'), 'Sales', ?)
+    """, ((i * 366 // args.bills, rng.uniform(1000, 500000)) for i in range(args.bills)))
+    conn.executemany("""
+        INSERT INTO stock_movements (item_id, transaction_type, quantity_change, new_quantity, date_created)
+        VALUES (?, 'OUT', -1, ?, datetime('2024-01-01', ? || ' seconds'))
+    """, ((rng.randint(1, 5000), rng.randint(0, 20), i * 31622400 // args.movements) for i in range(args.movements)))
+    conn.commit()
+    conn.close()
+    
+    stats = ExportService.export_parquet(root=root)
+    print(f"full export   {stats['rows']:>10,} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f}/s)")
+    
+    changed = rng.sample(range(1, args.bills + 1), args.changed)
+    db.execute_many("UPDATE bills SET status = 'Cancelled' WHERE id = ?", [(bill_id,) for bill_id in changed])
+    stats = ExportService.export_parquet(root=root)
+    print(f"incremental   {stats['rows']:>10,} rows in {stats['seconds']:.2f}s")
+    
+    size = sum(path.stat().st_size for path in root.rglob('*.parquet')) / 2 ** 20
+    print(f"dataset size  {size:,.1f} MB")
+    for table in EXPORT_TABLES:
+        started = time.perf_counter()
+        rows = ExportService.read_parquet(table, '2024-01', '2024-12', root=root)
+        print(f"read {table:<16} {rows.num_rows:>10,} rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
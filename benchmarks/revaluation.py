@@ -0,0 +1,87 @@
+"""Time RevaluationEngine marking a synthetic inventory to market at current gold and diamond rates.
+
+Usage: python benchmarks/revaluation.py [--items 100000] [--repeat 5]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from services.gold_rate_service import GoldRateService, DiamondRateService
+from services.revaluation_service import RevaluationEngine
+
+GOLD_RATES = {'24K': 7200, '22K': 6600, '18K': 5400, '14K': 4200, '916': 6600}
+CARAT_BANDS = [(0, 0.3), (0.3, 0.5), (0.5, 1.0), (1.0, 2.0), (2.0, 10)]
+
+
+def populate(cursor, items, rng):
+    materials = dict(cursor.execute("SELECT name, id FROM materials").fetchall())
+    cursor.executemany("""
+        INSERT INTO gold_rates (rate_date, purity, rate_per_gram, making_charges) VALUES ('2026-10-01', ?, ?, 0)
+    """, GOLD_RATES.items())
+    cursor.executemany("""
+        INSERT INTO diamond_rates (rate_date, shape, clarity, color, carat_from, carat_to, rate_per_carat)
+        VALUES ('2026-10-01', 'Round', ?, ?, ?, ?, ?)
+    """, ((clarity, color, low, high, rng.uniform(30000, 600000))
+          for clarity in DiamondRateService.CLARITIES for color in DiamondRateService.COLORS
+          for low, high in CARAT_BANDS))
+    
+    rows = []
+    for i in range(items):
+        diamond = rng.random() < 0.3
+        rows.append((f"Item {i}", f"MTG{i:08d}", rng.uniform(1000, 300000), rng.randint(0, 20),
+                     materials['Diamond' if diamond else 'Gold'], rng.uniform(1, 60), rng.choice(list(GOLD_RATES)),
+                     rng.uniform(0, 800), rng.choice(['per_gram', 'fixed']),
+                     rng.uniform(0.05, 3) if diamond else 0,
+                     rng.choice(DiamondRateService.CLARITIES) if diamond else None,
+                     rng.choice(DiamondRateService.COLORS) if diamond else None))
+    cursor.executemany("""
+        INSERT INTO items (name, barcode, price, quantity, material_id, weight_in_gm, purity, making_charges,
+                           making_charges_type, diamond_carat, diamond_clarity, diamond_color)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    
+    conn = db.get_connection()
+    populate(conn.cursor(), args.items, random.Random(5))
+    conn.commit()
+    conn.close()
+    GoldRateService.refresh_rates()
+    DiamondRateService.refresh_matrix()
+    
+    load_ms = best_of(args.repeat, RevaluationEngine.load_items)
+    items = RevaluationEngine.load_items()
+    revalue_ms = best_of(args.repeat, lambda: RevaluationEngine.revalue(items))
+    valuation = RevaluationEngine.revalue(items)
+    
+    print(f"{valuation['items']:,} items, {valuation['priced_items']:,} priced at current rates")
+    print(f"market value {valuation['total_value']:,.0f} vs book value {valuation['book_value']:,.0f}")
+    print(f"{'load items':<14}{load_ms:>10.1f} ms")
+    print(f"{'revalue':<14}{revalue_ms:>10.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Compare LIKE and FTS5 search times for items, customers and bills on a synthetic database.
+
+Usage: python benchmarks/search.py [--rows 500000] [--repeat 5]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from services.search_service import SearchService
+
+ITEM_WORDS = ['gold', 'diamond', 'silver', 'platinum', 'ring', 'chain', 'bangle', 'necklace', 'earring',
+              'pendant', 'bracelet', 'anklet', 'mangalsutra', 'nose', 'pin', 'kada', 'haram', 'jhumka',
+              'solitaire', 'antique', 'temple', 'kundan', 'polki', 'rose', 'white', 'yellow', 'twisted',
+              'floral', 'peacock', 'lakshmi', 'classic', 'bridal', 'daily', 'wear', 'kids', 'mens']
+FIRST_NAMES = ['Arun', 'Priya', 'Lakshmi', 'Ravi', 'Meena', 'Suresh', 'Anitha', 'Karthik', 'Deepa',
+               'Vijay', 'Kavya', 'Ramesh', 'Divya', 'Ganesh', 'Sangeetha', 'Mohan', 'Revathi', 'Siva']
+LAST_NAMES = ['Kumar', 'Nair', 'Iyer', 'Reddy', 'Pillai', 'Menon', 'Rao', 'Sharma', 'Krishnan',
+              'Subramanian', 'Natarajan', 'Varghese', 'Joseph', 'Thomas', 'Patel', 'Shah']
+CITIES = ['Chennai', 'Kochi', 'Madurai', 'Coimbatore', 'Trichy', 'Bengaluru', 'Thrissur', 'Salem']
+
+SEARCHES = [
+    ('items', 'gol'),
+    ('items', 'gold ring'),
+    ('items', 'kundan neck'),
+    ('customers', 'pri'),
+    ('customers', 'lakshmi nair'),
+    ('customers', '98400'),
+    ('bills', 'SB-2024'),
+    ('bills', 'ravi kum'),
+]
+
+LIKE_QUERIES = {
+    'items': ("""
+        SELECT i.id, i.name FROM items i LEFT JOIN item_categories ic ON i.category_id = ic.id
+        WHERE i.is_active = 1 AND (i.name LIKE ? OR i.barcode LIKE ? OR ic.name LIKE ?)
+        ORDER BY i.name LIMIT 50
+    """, 3),
+    'customers': ("""
+        SELECT id, name FROM customers
+        WHERE name LIKE ? OR phone LIKE ? OR email LIKE ? OR city LIKE ?
+        ORDER BY name LIMIT 50
+    """, 4),
+    'bills': ("""
+        SELECT b.id, b.bill_number FROM bills b
+        LEFT JOIN customers c ON b.customer_id = c.id
+        LEFT JOIN suppliers s ON b.supplier_id = s.id
+        WHERE b.bill_number LIKE ? OR c.name LIKE ? OR s.name LIKE ?
+        ORDER BY b.bill_date DESC LIMIT 50
+    """, 3),
+}
+
+
+def populate(cursor, rows):
+    rng = random.Random(7)
+    cursor.executemany("INSERT INTO items (name, barcode, price, quantity) VALUES (?, ?, ?, ?)",
+                       ((' '.join(rng.sample(ITEM_WORDS, 3)).title(), f"MTG{i:08d}",
+                         rng.uniform(1000, 200000), rng.randint(0, 20)) for i in range(rows)))
+    cursor.executemany("INSERT INTO customers (name, phone, city) VALUES (?, ?, ?)",
+                       ((f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"9{rng.randint(0, 999999999):09d}",
+                         rng.choice(CITIES)) for _ in range(rows)))
+    cursor.executemany("""
+        INSERT INTO bills (bill_number, bill_type, customer_id, bill_date, total_amount)
+        VALUES (?, 'Sales', ?, ?, ?)
+    """, ((f"SB-{2020 + i % 6}{i % 12 + 1:02d}01-{i:06X}", rng.randint(1, rows),
+           f"{2020 + i % 6}-{i % 12 + 1:02d}-01", rng.uniform(1000, 500000)) for i in range(rows)))
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    
+    conn = db.get_connection()
+    started = time.perf_counter()
+    populate(conn.cursor(), args.rows)
+    conn.commit()
+    conn.close()
+    print(f"Populated {args.rows:,} items, customers and bills in {time.perf_counter() - started:.1f}s")
+    
+    fts_search = {
+        'items': SearchService.search_items,
+        'customers': SearchService.search_customers,
+        'bills': SearchService.search_bills,
+    }
+    
+    print(f"\n{'search':<28}{'LIKE ms':>10}{'FTS ms':>10}{'hits':>7}")
+    for table, text in SEARCHES:
+        like_query, placeholders = LIKE_QUERIES[table]
+        pattern = f"%{text}%"
+        like_ms = best_of(args.repeat, lambda: db.fetch_query(like_query, (pattern,) * placeholders))
+        fts_ms = best_of(args.repeat, lambda: fts_search[table](text))
+        hits = len(fts_search[table](text))
+        print(f"{table + ': ' + repr(text):<28}{like_ms:>10.2f}{fts_ms:>10.2f}{hits:>7}")
+
+
+if __name__ == '__main__':
+    main()
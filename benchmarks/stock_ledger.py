@@ -0,0 +1,99 @@
+"""Time as-of-date stock queries from daily snapshots against replaying every movement,
+on a synthetic stock_movements history.
+
+Usage: python benchmarks/stock_ledger.py [--movements 10000000] [--items 20000] [--days 730] [--repeat 3]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from services.ledger_service import LedgerService
+
+REPLAY_QUERY = """
+    SELECT item_id, SUM(new_quantity - previous_quantity), SUM(new_weight - previous_weight)
+    FROM stock_movements WHERE date_created < ? GROUP BY item_id
+"""
+
+
+def populate(conn, movements, items, days):
+    rng = random.Random(11)
+    start = date.today() - timedelta(days=days)
+    conn.executemany("INSERT INTO items (id, name, price, quantity, weight_in_gm, date_created) VALUES (?, ?, 1, 0, 0, ?)",
+                     ((item_id, f"Item {item_id}", f"{start - timedelta(days=1)} 09:00:00") for item_id in range(1, items + 1)))
+    stock = [[0, 0.0] for _ in range(items + 1)]
+    per_day = movements // days
+    
+    def rows():
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            for n in range(per_day):
+                item_id = rng.randint(1, items)
+                previous = stock[item_id]
+                quantity = max(0, previous[0] + rng.randint(-2, 3))
+                weight = max(0.0, previous[1] + rng.uniform(-5, 8))
+                yield (item_id, 'IN' if quantity >= previous[0] else 'OUT', quantity - previous[0], weight - previous[1],
+                       previous[0], quantity, previous[1], weight,
+                       f"{day} {9 + n * 10 // per_day:02d}:{n % 60:02d}:00")
+                stock[item_id] = [quantity, weight]
+    
+    conn.executemany("""
+        INSERT INTO stock_movements (item_id, transaction_type, quantity_change, weight_change,
+                                     previous_quantity, new_quantity, previous_weight, new_weight, date_created)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows())
+    conn.executemany("UPDATE items SET quantity = ?, weight_in_gm = ? WHERE id = ?",
+                     ((quantity, weight, item_id) for item_id, (quantity, weight) in enumerate(stock) if item_id))
+    return start
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movements', type=int, default=10000000)
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    
+    conn = db.get_connection()
+    started = time.perf_counter()
+    start = populate(conn, args.movements, args.items, args.days)
+    conn.commit()
+    conn.close()
+    print(f"Populated {args.movements:,} movements over {args.days} days in {time.perf_counter() - started:.1f}s")
+    
+    started = time.perf_counter()
+    LedgerService.take_snapshots(through=start)
+    rows = LedgerService.take_snapshots()
+    print(f"Snapshotted {args.days} days ({rows:,} rows) in {time.perf_counter() - started:.1f}s")
+    
+    print(f"\n{'as of':<14}{'replay ms':>12}{'snapshot ms':>14}")
+    for back in (args.days - 1, args.days // 2, 90, 1):
+        day = date.today() - timedelta(days=back)
+        end = (day + timedelta(days=1)).isoformat()
+        replay_ms = best_of(args.repeat, lambda: db.fetch_query(REPLAY_QUERY, (end,)))
+        snapshot_ms = best_of(args.repeat, lambda: LedgerService.stock_as_of(day))
+        print(f"{day.isoformat():<14}{replay_ms:>12.1f}{snapshot_ms:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Time StockService.apply_movements for a purchase receipt and a year-end stock count
+on a synthetic database, against the same movements applied one item at a time.
+
+Usage: python benchmarks/stock_movements.py [--items 20000] [--single 500]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.db as db
+from services.stock_service import StockService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=500, help="movements to time through add_stock")
+    args = parser.parse_args()
+    
+    db.DATABASE_PATH = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    db.create_tables()
+    rng = random.Random(3)
+    
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO items (name, barcode, price, quantity, weight_in_gm) VALUES (?, ?, ?, ?, ?)",
+                     ((f"Item {i}", f"MTG{i:08d}", rng.uniform(1000, 200000), rng.randint(0, 20),
+                       rng.uniform(1, 50)) for i in range(args.items)))
+    conn.commit()
+    conn.close()
+    item_ids = [row[0] for row in db.fetch_query("SELECT id FROM items")]
+    
+    receipt = [(item_id, rng.randint(1, 5), rng.uniform(1, 20), "Purchase receipt") for item_id in item_ids]
+    count = [(item_id, rng.randint(0, 25), None, "Year-end count") for item_id in item_ids]
+    
+    for label, batch, mode in (("receipt", receipt, 'delta'), ("stock count", count, 'count')):
+        stats = StockService.apply_movements(batch, mode, reference=label)
+        print(f"{label:<12} {stats['movements']:>7,} movements in {stats['seconds']:.2f}s "
+              f"({stats['movements_per_second']:,.0f}/s)")
+    
+    started = time.perf_counter()
+    for item_id, quantity, weight, reason in receipt[:args.single]:
+        StockService.add_stock(item_id, quantity, weight, "single", reason)
+    seconds = time.perf_counter() - started
+    print(f"{'add_stock':<12} {args.single:>7,} movements in {seconds:.2f}s ({args.single / seconds:,.0f}/s)")
+
+
+if __name__ == '__main__':
+    main()
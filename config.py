@@ -26,6 +26,32 @@ DECIMAL_PLACES = 3
 # Database settings
 DB_TIMEOUT = 30
 DB_CHECK_SAME_THREAD = False
+DB_POOL_MAX_IDLE = 300
+DB_POOL_HEALTH_CHECK_INTERVAL = 30
+DB_PRAGMAS = {
+    'busy_timeout': DB_TIMEOUT * 1000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+# Cache settings
+DASHBOARD_CACHE_TTL = 60
+
+# Background loading
+BACKGROUND_WORKERS = 2
+BACKGROUND_POLL_MS = 30
+LIST_PAGE_SIZE = 200
+
+# Search-as-you-type
+SEARCH_DEBOUNCE_MS = 250
+SEARCH_CACHE_SIZE = 32
+
+# Exports
+EXPORT_CHUNK_SIZE = 5000
+ANALYTICS_EXPORT_PATH = EXPORT_PATH / 'analytics'
 
 # UI Colors
 PRIMARY_COLOR = "#1e2d3d"
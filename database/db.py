@@ -1,13 +1,156 @@
+import re
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from config import DATABASE_PATH
+from config import (DATABASE_PATH, DB_TIMEOUT, DB_CHECK_SAME_THREAD,
+                    DB_POOL_MAX_IDLE, DB_POOL_HEALTH_CHECK_INTERVAL, DB_PRAGMAS)
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pooled_connections = {}
+_pool_stats = {'opened': 0, 'reused': 0, 'evicted': 0, 'health_check_failures': 0}
+_change_listeners = []
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT|REPLACE|UPDATE|DELETE)(?:\s+OR\s+\w+)?(?:\s+INTO|\s+FROM)?\s+[\"`\[]?(\w+)",
+    re.IGNORECASE)
 
 def get_connection():
-    conn = sqlite3.connect(str(DATABASE_PATH))
+    conn = sqlite3.connect(str(DATABASE_PATH), timeout=DB_TIMEOUT, check_same_thread=DB_CHECK_SAME_THREAD)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
+    with _pool_lock:
+        _pool_stats['opened'] += 1
+    return conn
+
+def apply_pragmas(conn, pragmas=None):
+    for name, value in (DB_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+def _drop_thread_connection():
+    conn = getattr(_local, 'conn', None)
+    _local.conn = None
+    with _pool_lock:
+        _pooled_connections.pop(threading.get_ident(), None)
+    if conn is not None:
+        _close_quietly(conn)
+
+def evict_idle_connections():
+    """Close cached connections whose owning thread has exited"""
+    alive = {t.ident for t in threading.enumerate()}
+    with _pool_lock:
+        dead = [ident for ident in _pooled_connections if ident not in alive]
+        stale = [_pooled_connections.pop(ident) for ident in dead]
+        _pool_stats['evicted'] += len(stale)
+    for conn in stale:
+        _close_quietly(conn)
+
+def get_pooled_connection():
+    """Return the calling thread's long-lived connection.
+    
+    The connection is reopened when it has been idle longer than
+    DB_POOL_MAX_IDLE, and pinged before reuse once it has been idle
+    longer than DB_POOL_HEALTH_CHECK_INTERVAL. Idle time runs from the
+    end of its last query, and a connection inside a transaction is
+    never replaced.
+    """
+    now = time.monotonic()
+    conn = getattr(_local, 'conn', None)
+    
+    if conn is not None and not conn.in_transaction:
+        idle = now - _local.last_used
+        if idle > DB_POOL_MAX_IDLE:
+            _drop_thread_connection()
+            with _pool_lock:
+                _pool_stats['evicted'] += 1
+            conn = None
+        elif idle > DB_POOL_HEALTH_CHECK_INTERVAL:
+            try:
+                conn.execute("SELECT 1").fetchone()
+            except sqlite3.Error:
+                _drop_thread_connection()
+                with _pool_lock:
+                    _pool_stats['health_check_failures'] += 1
+                conn = None
+    
+    if conn is None:
+        evict_idle_connections()
+        conn = get_connection()
+        _local.conn = conn
+        with _pool_lock:
+            _pooled_connections[threading.get_ident()] = conn
+    else:
+        with _pool_lock:
+            _pool_stats['reused'] += 1
+    
+    _local.last_used = now
     return conn
 
+def mark_connection_used():
+    """Restart the calling thread's idle clock, e.g. when a query on its pooled connection finishes"""
+    _local.last_used = time.monotonic()
+
+def close_all_connections():
+    with _pool_lock:
+        conns = list(_pooled_connections.values())
+        _pooled_connections.clear()
+    _local.conn = None
+    for conn in conns:
+        _close_quietly(conn)
+
+def register_change_listener(callback, tables=None):
+    """Call callback(changed_tables) after a committed write touches any of tables"""
+    _change_listeners.append((callback, frozenset(tables) if tables else None))
+
+def unregister_change_listener(callback):
+    _change_listeners[:] = [(cb, tables) for cb, tables in _change_listeners if cb != callback]
+
+def written_table(query):
+    match = _WRITE_TABLE_RE.match(query)
+    return match.group(1).lower() if match else None
+
+def notify_change(tables):
+    tables = {table for table in tables if table}
+    if not tables:
+        return
+    for callback, watched in list(_change_listeners):
+        if watched is None or watched & tables:
+            callback(tables)
+
+@contextmanager
+def transaction():
+    """Run several statements on the pooled connection as one atomic unit"""
+    conn = get_pooled_connection()
+    cursor = conn.cursor()
+    written = set()
+    conn.set_trace_callback(lambda statement: written.add(written_table(statement)))
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.set_trace_callback(None)
+        cursor.close()
+        mark_connection_used()
+    notify_change(written)
+
+def get_connection_stats():
+    with _pool_lock:
+        stats = dict(_pool_stats)
+        stats['active'] = len(_pooled_connections)
+    return stats
+
 def create_tables():
     conn = get_connection()
     cursor = conn.cursor()
@@ -474,6 +617,7 @@ def create_tables():
     
     # Run migrations to add missing columns to existing tables
     run_migrations(cursor)
+    prune_catalog_changes(cursor)
     
     conn.commit()
     conn.close()
@@ -528,10 +672,464 @@ def run_migrations(cursor):
     add_column_if_not_exists('stock_movements', 'previous_weight', 'REAL DEFAULT 0')
     add_column_if_not_exists('stock_movements', 'new_weight', 'REAL DEFAULT 0')
     add_column_if_not_exists('stock_movements', 'adjusted_by', 'TEXT')
+    
+    run_schema_migrations(cursor)
+
+
+INDEX_PACK_V1 = [
+    ('idx_bills_type_date', 'bills', 'bill_type, bill_date'),
+    ('idx_bills_date', 'bills', 'bill_date'),
+    ('idx_bills_customer', 'bills', 'customer_id'),
+    ('idx_bills_supplier', 'bills', 'supplier_id'),
+    ('idx_bills_employee', 'bills', 'employee_id'),
+    ('idx_bill_items_bill', 'bill_items', 'bill_id'),
+    ('idx_bill_items_item', 'bill_items', 'item_id'),
+    ('idx_items_active_name', 'items', 'is_active, name'),
+    ('idx_items_material', 'items', 'material_id'),
+    ('idx_stock_movements_item_date', 'stock_movements', 'item_id, date_created'),
+    ('idx_stock_movements_date', 'stock_movements', 'date_created'),
+    ('idx_advance_orders_status_delivery', 'advance_orders', 'status, expected_delivery_date'),
+    ('idx_advance_orders_customer', 'advance_orders', 'customer_id'),
+    ('idx_gold_rates_purity_date', 'gold_rates', 'purity, rate_date'),
+    ('idx_payments_type_date', 'payments', 'payment_type, payment_date'),
+]
+
+def create_indexes(cursor, index_pack):
+    for name, table, columns in index_pack:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+def drop_indexes(cursor, index_pack):
+    for name, table, columns in index_pack:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+INDEX_PACK_V2 = [
+    ('idx_customers_name', 'customers', 'name'),
+    ('idx_employees_name', 'employees', 'name'),
+]
+
+def _migration_index_pack_v1(cursor):
+    create_indexes(cursor, INDEX_PACK_V1)
+    cursor.execute("ANALYZE")
+
+def _migration_index_pack_v2(cursor):
+    create_indexes(cursor, INDEX_PACK_V2)
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+FTS_PREFIXES = "2 3"
+
+FTS_TABLES = {
+    'items_fts': ('name', 'barcode', 'category'),
+    'customers_fts': ('name', 'phone', 'email', 'city'),
+    'suppliers_fts': ('name', 'phone', 'email', 'city'),
+    'bills_fts': ('bill_number', 'party'),
+}
+
+FTS_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts (rowid, name, barcode, category)
+        VALUES (new.id, new.name, new.barcode, (SELECT name FROM item_categories WHERE id = new.category_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, barcode, category_id ON items BEGIN
+        UPDATE items_fts SET name = new.name, barcode = new.barcode,
+               category = (SELECT name FROM item_categories WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS item_categories_fts_update AFTER UPDATE OF name ON item_categories BEGIN
+        UPDATE items_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM items WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN
+        INSERT INTO customers_fts (rowid, name, phone, email, city)
+        VALUES (new.id, new.name, new.phone, new.email, new.city);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF name, phone, email, city ON customers BEGIN
+        UPDATE customers_fts SET name = new.name, phone = new.phone, email = new.email, city = new.city
+        WHERE rowid = new.id;
+        UPDATE bills_fts SET party = new.name
+        WHERE old.name IS NOT new.name AND rowid IN (SELECT id FROM bills WHERE customer_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN
+        DELETE FROM customers_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS suppliers_fts_insert AFTER INSERT ON suppliers BEGIN
+        INSERT INTO suppliers_fts (rowid, name, phone, email, city)
+        VALUES (new.id, new.name, new.phone, new.email, new.city);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS suppliers_fts_update AFTER UPDATE OF name, phone, email, city ON suppliers BEGIN
+        UPDATE suppliers_fts SET name = new.name, phone = new.phone, email = new.email, city = new.city
+        WHERE rowid = new.id;
+        UPDATE bills_fts SET party = new.name
+        WHERE old.name IS NOT new.name AND rowid IN (SELECT id FROM bills WHERE supplier_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS suppliers_fts_delete AFTER DELETE ON suppliers BEGIN
+        DELETE FROM suppliers_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS bills_fts_insert AFTER INSERT ON bills BEGIN
+        INSERT INTO bills_fts (rowid, bill_number, party)
+        VALUES (new.id, new.bill_number, COALESCE((SELECT name FROM customers WHERE id = new.customer_id),
+                                                  (SELECT name FROM suppliers WHERE id = new.supplier_id)));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS bills_fts_update AFTER UPDATE OF bill_number, customer_id, supplier_id ON bills BEGIN
+        UPDATE bills_fts SET bill_number = new.bill_number,
+               party = COALESCE((SELECT name FROM customers WHERE id = new.customer_id),
+                                (SELECT name FROM suppliers WHERE id = new.supplier_id))
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS bills_fts_delete AFTER DELETE ON bills BEGIN
+        DELETE FROM bills_fts WHERE rowid = old.id;
+    END""",
+]
+
+FTS_BACKFILL = [
+    """INSERT INTO items_fts (rowid, name, barcode, category)
+       SELECT i.id, i.name, i.barcode, ic.name FROM items i
+       LEFT JOIN item_categories ic ON i.category_id = ic.id""",
+    """INSERT INTO customers_fts (rowid, name, phone, email, city)
+       SELECT id, name, phone, email, city FROM customers""",
+    """INSERT INTO suppliers_fts (rowid, name, phone, email, city)
+       SELECT id, name, phone, email, city FROM suppliers""",
+    """INSERT INTO bills_fts (rowid, bill_number, party)
+       SELECT b.id, b.bill_number, COALESCE(c.name, s.name) FROM bills b
+       LEFT JOIN customers c ON b.customer_id = c.id
+       LEFT JOIN suppliers s ON b.supplier_id = s.id""",
+]
+
+def _migration_full_text_search(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE fts5_probe")
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; searches fall back to LIKE
+        return
+    
+    for table, columns in FTS_TABLES.items():
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                {', '.join(columns)}, tokenize = '{FTS_TOKENIZER}', prefix = '{FTS_PREFIXES}'
+            )
+        """)
+        cursor.execute(f"DELETE FROM {table}")
+    for trigger in FTS_TRIGGERS:
+        cursor.execute(trigger)
+    for backfill in FTS_BACKFILL:
+        cursor.execute(backfill)
+
+CATALOG_TABLES = ('items', 'customers')
+
+def _migration_catalog_changes(cursor):
+    """Log changed item and customer ids so in-memory catalogs can refresh incrementally"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL
+        )
+    """)
+    create_indexes(cursor, [('idx_catalog_changes_table_seq', 'catalog_changes', 'table_name, seq')])
+    for table in CATALOG_TABLES:
+        for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_catalog_{event.lower()} AFTER {event} ON {table} BEGIN
+                    INSERT INTO catalog_changes (table_name, row_id) VALUES ('{table}', {row}.id);
+                END
+            """)
+
+def prune_catalog_changes(cursor):
+    """Clear the catalog_changes log at startup.
+    
+    Its only readers are the in-memory catalogs, which load their table whole on first use
+    and then prune what they have applied; no catalog of a starting process has consumed
+    anything yet, so every entry left by earlier runs is at or below the lowest consumed seq.
+    """
+    cursor.execute("DELETE FROM catalog_changes")
+
+INVENTORY_UPSERT = """
+    INSERT INTO inventory (item_id, quantity, weight_in_gm, last_updated)
+    VALUES (new.id, new.quantity, new.weight_in_gm, datetime('now', 'localtime'))
+    ON CONFLICT (item_id) DO UPDATE SET quantity = excluded.quantity,
+        weight_in_gm = excluded.weight_in_gm, last_updated = excluded.last_updated;
+"""
+
+INVENTORY_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS items_inventory_insert AFTER INSERT ON items BEGIN
+        {INVENTORY_UPSERT}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_inventory_update AFTER UPDATE OF quantity, weight_in_gm ON items
+    WHEN old.quantity IS NOT new.quantity OR old.weight_in_gm IS NOT new.weight_in_gm BEGIN
+        {INVENTORY_UPSERT}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_inventory_delete AFTER DELETE ON items BEGIN
+        DELETE FROM inventory WHERE item_id = old.id;
+    END""",
+]
+
+def reconcile_inventory(cursor):
+    """Bring inventory back in line with items; returns how many rows were repaired"""
+    drifted = cursor.execute("""
+        UPDATE inventory SET quantity = items.quantity, weight_in_gm = items.weight_in_gm,
+               last_updated = datetime('now', 'localtime')
+        FROM items
+        WHERE items.id = inventory.item_id
+          AND (inventory.quantity IS NOT items.quantity OR inventory.weight_in_gm IS NOT items.weight_in_gm)
+    """).rowcount
+    missing = cursor.execute("""
+        INSERT INTO inventory (item_id, quantity, weight_in_gm, last_updated)
+        SELECT id, quantity, weight_in_gm, datetime('now', 'localtime') FROM items
+        WHERE id NOT IN (SELECT item_id FROM inventory)
+    """).rowcount
+    orphaned = cursor.execute("""
+        DELETE FROM inventory WHERE item_id NOT IN (SELECT id FROM items)
+    """).rowcount
+    return {'drifted': drifted, 'missing': missing, 'orphaned': orphaned}
+
+def _migration_inventory_triggers(cursor):
+    for trigger in INVENTORY_TRIGGERS:
+        cursor.execute(trigger)
+    reconcile_inventory(cursor)
+
+def _migration_stock_snapshots(cursor):
+    """End-of-day stock per item, written only for items whose stock changed that day"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_snapshots (
+            item_id INTEGER NOT NULL,
+            snapshot_date TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            weight_in_gm REAL NOT NULL,
+            PRIMARY KEY (item_id, snapshot_date)
+        ) WITHOUT ROWID
+    """)
+    create_indexes(cursor, [('idx_stock_snapshots_date', 'stock_snapshots', 'snapshot_date')])
+
+def _migration_rate_series_indexes(cursor):
+    create_indexes(cursor, [
+        ('idx_metal_rates_material_purity_date', 'metal_rates', 'material_id, purity, rate_date'),
+        ('idx_diamond_rates_grade_date', 'diamond_rates', 'shape, clarity, color, rate_date'),
+    ])
+
+GOLD_MATERIAL_ID = "(SELECT id FROM materials WHERE name = 'Gold')"
+
+GOLD_RATES_VIEW = [
+    f"""
+    CREATE VIEW IF NOT EXISTS gold_rates AS
+    SELECT id, rate_date, purity, rate_per_gram, making_charges, is_active, notes, date_created, date_modified
+    FROM metal_rates
+    WHERE material_id = {GOLD_MATERIAL_ID}
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS gold_rates_insert INSTEAD OF INSERT ON gold_rates
+    BEGIN
+        INSERT INTO metal_rates (material_id, rate_date, purity, rate_per_gram, making_charges, is_active,
+                                 notes, date_created, date_modified)
+        VALUES ({GOLD_MATERIAL_ID}, NEW.rate_date, NEW.purity, NEW.rate_per_gram, COALESCE(NEW.making_charges, 0),
+                COALESCE(NEW.is_active, 1), NEW.notes, COALESCE(NEW.date_created, CURRENT_TIMESTAMP),
+                COALESCE(NEW.date_modified, CURRENT_TIMESTAMP));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gold_rates_update INSTEAD OF UPDATE ON gold_rates
+    BEGIN
+        UPDATE metal_rates
+        SET rate_date = NEW.rate_date, purity = NEW.purity, rate_per_gram = NEW.rate_per_gram,
+            making_charges = NEW.making_charges, is_active = NEW.is_active, notes = NEW.notes,
+            date_modified = NEW.date_modified
+        WHERE id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gold_rates_delete INSTEAD OF DELETE ON gold_rates
+    BEGIN
+        DELETE FROM metal_rates WHERE id = OLD.id;
+    END
+    """,
+]
+
+def _migration_consolidate_gold_rates(cursor):
+    """Move the legacy gold_rates table into metal_rates and leave a writable gold_rates view behind"""
+    legacy = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'gold_rates'").fetchone()
+    if legacy:
+        cursor.execute(f"""
+            INSERT INTO metal_rates (material_id, rate_date, purity, rate_per_gram, making_charges, is_active,
+                                     notes, date_created, date_modified)
+            SELECT {GOLD_MATERIAL_ID}, rate_date, purity, rate_per_gram, making_charges, is_active,
+                   notes, date_created, date_modified
+            FROM gold_rates WHERE true
+            ON CONFLICT (material_id, rate_date, purity) DO UPDATE SET
+                rate_per_gram = excluded.rate_per_gram, making_charges = excluded.making_charges,
+                is_active = excluded.is_active, notes = excluded.notes, date_modified = excluded.date_modified
+        """)
+        cursor.execute("DROP TABLE gold_rates")
+    for statement in GOLD_RATES_VIEW:
+        cursor.execute(statement)
+
+EXPORT_TABLES = ('bills', 'bill_items', 'stock_movements', 'payments', 'transactions')
+
+def _migration_export_changes(cursor):
+    """Log inserted and updated bill, payment and movement ids for incremental analytics exports"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL
+        )
+    """)
+    create_indexes(cursor, [('idx_export_changes_table_seq', 'export_changes', 'table_name, seq')])
+    for table in EXPORT_TABLES:
+        for event in ('INSERT', 'UPDATE'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_export_{event.lower()} AFTER {event} ON {table} BEGIN
+                    INSERT INTO export_changes (table_name, row_id) VALUES ('{table}', new.id);
+                END
+            """)
+
+SUMMARY_KEY = "summary_date, bill_type, status, payment_mode"
+SUMMARY_MEASURES = ('total_amount', 'discount_amount', 'tax_amount', 'paid_amount', 'outstanding_amount')
+
+def _summary_upsert(row, sign):
+    """Add (sign 1) or take away (sign -1) bill row's contribution to its daily_sales_summary group"""
+    return f"""
+        INSERT INTO daily_sales_summary ({SUMMARY_KEY}, bill_count, {', '.join(SUMMARY_MEASURES)})
+        VALUES (COALESCE(date({row}.bill_date), {row}.bill_date), {row}.bill_type, COALESCE({row}.status, ''),
+                COALESCE({row}.payment_mode, ''), {sign},
+                {', '.join(f"{sign} * COALESCE({row}.{measure}, 0)" for measure in SUMMARY_MEASURES)})
+        ON CONFLICT ({SUMMARY_KEY}) DO UPDATE SET bill_count = bill_count + excluded.bill_count,
+            {', '.join(f"{measure} = {measure} + excluded.{measure}" for measure in SUMMARY_MEASURES)};
+    """
+
+SUMMARY_PRUNE = f"""
+    DELETE FROM daily_sales_summary WHERE bill_count = 0
+      AND ({SUMMARY_KEY}) = (COALESCE(date(old.bill_date), old.bill_date), old.bill_type,
+                             COALESCE(old.status, ''), COALESCE(old.payment_mode, ''));
+"""
+
+DAILY_SUMMARY_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS bills_summary_insert AFTER INSERT ON bills BEGIN
+        {_summary_upsert('new', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS bills_summary_update
+    AFTER UPDATE OF bill_date, bill_type, status, payment_mode, {', '.join(SUMMARY_MEASURES)} ON bills BEGIN
+        {_summary_upsert('old', -1)}
+        {_summary_upsert('new', 1)}
+        {SUMMARY_PRUNE}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS bills_summary_delete AFTER DELETE ON bills BEGIN
+        {_summary_upsert('old', -1)}
+        {SUMMARY_PRUNE}
+    END""",
+]
+
+def rebuild_daily_sales_summary(cursor):
+    """Recompute daily_sales_summary from bills; returns the number of groups written"""
+    cursor.execute("DELETE FROM daily_sales_summary")
+    return cursor.execute(f"""
+        INSERT INTO daily_sales_summary ({SUMMARY_KEY}, bill_count, {', '.join(SUMMARY_MEASURES)})
+        SELECT COALESCE(date(bill_date), bill_date), bill_type, COALESCE(status, ''), COALESCE(payment_mode, ''),
+               COUNT(*), {', '.join(f"SUM(COALESCE({measure}, 0))" for measure in SUMMARY_MEASURES)}
+        FROM bills
+        GROUP BY 1, 2, 3, 4
+    """).rowcount
+
+def _migration_daily_sales_summary(cursor):
+    """Bill counts and amounts per day, bill type, status and payment mode, kept current by triggers on bills"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_sales_summary (
+            summary_date TEXT NOT NULL,
+            bill_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            bill_count INTEGER NOT NULL DEFAULT 0,
+            {' '.join(f"{measure} REAL NOT NULL DEFAULT 0," for measure in SUMMARY_MEASURES)}
+            PRIMARY KEY ({SUMMARY_KEY})
+        ) WITHOUT ROWID
+    """)
+    for trigger in DAILY_SUMMARY_TRIGGERS:
+        cursor.execute(trigger)
+    rebuild_daily_sales_summary(cursor)
+
+def _normalize_date_column(cursor, table, column):
+    """Rewrite column as YYYY-MM-DD: DD-MM-YYYY and DD/MM/YYYY are reordered and time parts dropped"""
+    cursor.execute(f"""
+        UPDATE {table} SET {column} = substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2)
+        WHERE {column} GLOB '[0-9][0-9][-/][0-9][0-9][-/][0-9][0-9][0-9][0-9]*'
+    """)
+    cursor.execute(f"""
+        UPDATE {table} SET {column} = date({column})
+        WHERE date({column}) IS NOT NULL AND {column} IS NOT date({column})
+    """)
+
+def _migration_iso_dates(cursor):
+    """Store every DATE column as ISO YYYY-MM-DD text so range predicates on it can seek an index"""
+    tables = [row[0] for row in cursor.execute("""
+        SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE '%VIRTUAL%'
+    """).fetchall()]
+    for table in tables:
+        for column in cursor.execute(f"PRAGMA table_info({table})").fetchall():
+            if (column[2] or '').upper() == 'DATE':
+                _normalize_date_column(cursor, table, column[1])
+
+def _migration_export_watermarks(cursor):
+    """Replace the export_changes insert/update log with per-table id watermarks.
+    
+    Inserted rows are found by id above the table's watermark, so only updates to rows an
+    export already covered are logged, one entry per row, and nothing is logged for a table
+    that has never been exported. The old log is dropped; the next export runs in full.
+    """
+    for table in EXPORT_TABLES:
+        for event in ('insert', 'update'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_export_{event}")
+    cursor.execute("DROP TABLE IF EXISTS export_changes")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            UNIQUE (table_name, row_id)
+        )
+    """)
+    create_indexes(cursor, [('idx_export_changes_table_seq', 'export_changes', 'table_name, seq')])
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            table_name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    """)
+    for table in EXPORT_TABLES:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_export_update AFTER UPDATE ON {table}
+            WHEN new.id <= (SELECT last_id FROM export_watermarks WHERE table_name = '{table}') BEGIN
+                INSERT OR REPLACE INTO export_changes (table_name, row_id) VALUES ('{table}', new.id);
+            END
+        """)
+
+SCHEMA_MIGRATIONS = [
+    (1, _migration_index_pack_v1),
+    (2, _migration_index_pack_v2),
+    (3, _migration_full_text_search),
+    (4, _migration_catalog_changes),
+    (5, _migration_inventory_triggers),
+    (6, _migration_stock_snapshots),
+    (7, _migration_rate_series_indexes),
+    (8, _migration_consolidate_gold_rates),
+    (9, _migration_export_changes),
+    (10, _migration_daily_sales_summary),
+    (11, _migration_iso_dates),
+    (12, _migration_export_watermarks),
+]
+
+def run_schema_migrations(cursor):
+    """Apply versioned schema migrations newer than the database's user_version"""
+    current_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    
+    for version, migration in SCHEMA_MIGRATIONS:
+        if version > current_version:
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
 
 
 def execute_query(query, params=None):
-    conn = get_connection()
+    conn = get_pooled_connection()
     cursor = conn.cursor()
     try:
         if params:
@@ -539,15 +1137,18 @@ def execute_query(query, params=None):
         else:
             cursor.execute(query)
         conn.commit()
-        return cursor.lastrowid
+        lastrowid = cursor.lastrowid
     except Exception as e:
         conn.rollback()
         raise e
     finally:
-        conn.close()
+        cursor.close()
+        mark_connection_used()
+    notify_change({written_table(query)})
+    return lastrowid
 
 def fetch_query(query, params=None):
-    conn = get_connection()
+    conn = get_pooled_connection()
     cursor = conn.cursor()
     try:
         if params:
@@ -556,10 +1157,11 @@ def fetch_query(query, params=None):
             cursor.execute(query)
         return cursor.fetchall()
     finally:
-        conn.close()
+        cursor.close()
+        mark_connection_used()
 
 def fetch_one(query, params=None):
-    conn = get_connection()
+    conn = get_pooled_connection()
     cursor = conn.cursor()
     try:
         if params:
@@ -568,10 +1170,11 @@ def fetch_one(query, params=None):
             cursor.execute(query)
         return cursor.fetchone()
     finally:
-        conn.close()
+        cursor.close()
+        mark_connection_used()
 
 def execute_many(query, params_list):
-    conn = get_connection()
+    conn = get_pooled_connection()
     cursor = conn.cursor()
     try:
         cursor.executemany(query, params_list)
@@ -580,4 +1183,57 @@ def execute_many(query, params_list):
         conn.rollback()
         raise e
     finally:
-        conn.close()
+        cursor.close()
+        mark_connection_used()
+    notify_change({written_table(query)})
+
+def fetch_page(query, params=(), order_by=('id',), after=None, limit=100, descending=False):
+    """Keyset pagination: the next `limit` rows of query, ordered by order_by, after the key `after`.
+    
+    query must already have a WHERE clause; `after` is the order_by values of the last row seen.
+    """
+    params = list(params)
+    if after is not None:
+        query += f" AND ({', '.join(order_by)}) {'<' if descending else '>'} ({', '.join('?' * len(order_by))})"
+        params.extend(after)
+    direction = " DESC" if descending else ""
+    query += " ORDER BY " + ", ".join(column + direction for column in order_by) + " LIMIT ?"
+    params.append(limit)
+    return fetch_query(query, tuple(params))
+
+DATE_INPUT_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d')
+
+def iso_date(value):
+    """value as the YYYY-MM-DD text DATE columns are stored as; takes a date, a datetime or a
+    date string in DATE_INPUT_FORMATS, with any time part ignored"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value).strip().split(' ')[0].split('T')[0]
+    for date_format in DATE_INPUT_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+def date_bounds(start, end):
+    """(first day, day after the last) for the half-open range column >= ? AND column < ?"""
+    return iso_date(start), (date.fromisoformat(iso_date(end)) + timedelta(days=1)).isoformat()
+
+def date_range(column, start=None, end=None):
+    """(conditions, params) keeping column within the days [start, end], either bound optional.
+    
+    The bare column is compared, so an index on it is seeked instead of every row being
+    run through DATE(); the exclusive upper bound also covers timestamps on the last day.
+    """
+    conditions = ""
+    params = []
+    if start is not None:
+        conditions += f" AND {column} >= ?"
+        params.append(iso_date(start))
+    if end is not None:
+        conditions += f" AND {column} < ?"
+        params.append(date_bounds(end, end)[1])
+    return conditions, tuple(params)
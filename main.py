@@ -6,7 +6,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from database.db import create_tables, get_connection, fetch_query, execute_query
+from database.db import create_tables, get_connection, fetch_query, execute_query, close_all_connections
 from pages.items import items_page, refresh_items_list
 from pages.customers import customers_page, refresh_customers_list
 from pages.employees import employees_page, refresh_employees_list
@@ -25,6 +25,9 @@ from services.advance_order_service import AdvanceOrderService
 from utils.validators import Validators
 from utils.helpers import Helpers
 from utils.export import ExportService
+from services.catalog_service import warm_catalogs
+from services.ledger_service import LedgerService
+from utils.background import load_async, shutdown_background_loader
 
 create_tables()
 
@@ -445,6 +448,37 @@ def stock_report():
     ttk.Label(dialog, text=f"Total Stock Value: {total_value:,.2f}", font=("Segoe UI", 12, "bold")).pack(pady=5)
     ttk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=10)
 
+def reconcile_inventory():
+    try:
+        repaired = StockService.reconcile_inventory()
+    except Exception as e:
+        messagebox.showerror("Error", f"Error reconciling inventory: {str(e)}")
+        return
+    messagebox.showinfo("Reconcile Inventory",
+        f"Updated: {repaired['drifted']}\nAdded: {repaired['missing']}\nRemoved: {repaired['orphaned']}")
+
+def export_stock_movements():
+    def done(stats):
+        messagebox.showinfo("Export Stock Movements",
+            f"Rows: {stats['rows']:,} ({stats['rows_per_second']:,.0f} rows/sec)\nFile: {stats['path']}")
+    
+    load_async(root, ExportService.export_stock_movements, done, key='stock-movements-export')
+
+def export_analytics():
+    def done(stats):
+        tables = "\n".join(f"{table}: {rows:,}" for table, rows in stats['tables'].items())
+        messagebox.showinfo("Analytics Export", f"{tables}\n\nFolder: {stats['path']}")
+    
+    load_async(root, ExportService.export_parquet, done, key='analytics-export')
+
+def rebuild_sales_summary():
+    try:
+        groups = SalesService.rebuild_daily_summary()
+    except Exception as e:
+        messagebox.showerror("Error", f"Error rebuilding sales summary: {str(e)}")
+        return
+    messagebox.showinfo("Rebuild Sales Summary", f"Daily summary rebuilt from bills ({groups:,} day groups).")
+
 def sales_report():
     sales_data = SalesService.get_sales_report()
     
@@ -488,25 +522,9 @@ def purchase_report():
 def today_summary():
     today = datetime.now().date()
     
-    sales_total = fetch_query(
-        "SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE bill_type = 'Sales' AND DATE(bill_date) = ?",
-        (today,)
-    )[0][0]
-    
-    purchase_total = fetch_query(
-        "SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE bill_type = 'Purchase' AND DATE(bill_date) = ?",
-        (today,)
-    )[0][0]
-    
-    sales_count = fetch_query(
-        "SELECT COUNT(*) FROM bills WHERE bill_type = 'Sales' AND DATE(bill_date) = ?",
-        (today,)
-    )[0][0]
-    
-    purchase_count = fetch_query(
-        "SELECT COUNT(*) FROM bills WHERE bill_type = 'Purchase' AND DATE(bill_date) = ?",
-        (today,)
-    )[0][0]
+    totals = SalesService.daily_totals(today, today).get(today.isoformat(), {})
+    sales_total, sales_count = totals.get('Sales', (0, 0))
+    purchase_total, purchase_count = totals.get('Purchase', (0, 0))
     
     collections = fetch_query(
         "SELECT COALESCE(SUM(amount), 0) FROM payments WHERE payment_type = 'Receipt' AND payment_date = ?",
@@ -658,11 +676,17 @@ def show_old_gold_exchange():
     
     ttk.Label(form_frame, text="Rate per gm:").grid(row=4, column=0, sticky='w', pady=5)
     rate_entry = ttk.Entry(form_frame, width=33)
-    current_rate = GoldRateService.get_current_rate('22K')
-    if current_rate:
-        rate_entry.insert(0, str(current_rate['rate_per_gram']))
     rate_entry.grid(row=4, column=1, pady=5, padx=5)
     
+    def fill_rate(event=None):
+        current_rate = GoldRateService.get_current_rate(purity_combo.get())
+        if current_rate:
+            rate_entry.delete(0, tk.END)
+            rate_entry.insert(0, str(current_rate['rate_per_gram']))
+    
+    fill_rate()
+    purity_combo.bind('<<ComboboxSelected>>', fill_rate)
+    
     ttk.Label(form_frame, text="Deduction %:").grid(row=5, column=0, sticky='w', pady=5)
     deduction_entry = ttk.Entry(form_frame, width=33)
     deduction_entry.insert(0, "5")
@@ -893,6 +917,8 @@ menubar.add_cascade(label="Transactions", menu=transactions_menu)
 stock_menu = Menu(menubar, tearoff=0)
 stock_menu.add_command(label="Manage Stock", command=show_manage_items)
 stock_menu.add_command(label="Stock Report", command=stock_report)
+stock_menu.add_command(label="Reconcile Inventory", command=reconcile_inventory)
+stock_menu.add_command(label="Export Stock Movements", command=export_stock_movements)
 stock_menu.add_separator()
 stock_menu.add_command(label="Low Stock Items", command=lambda: messagebox.showinfo("Low Stock", 
     "\n".join([f"{i[1]}: {i[2]} units" for i in StockService.get_low_stock_items()]) or "No low stock items"))
@@ -905,6 +931,9 @@ reports_menu.add_command(label="Purchase Report", command=purchase_report)
 reports_menu.add_separator()
 reports_menu.add_command(label="Today's Summary", command=today_summary)
 reports_menu.add_command(label="All Reports", command=show_reports)
+reports_menu.add_command(label="Rebuild Sales Summary", command=rebuild_sales_summary)
+reports_menu.add_separator()
+reports_menu.add_command(label="Analytics Export (Parquet)", command=export_analytics)
 menubar.add_cascade(label="Reports", menu=reports_menu)
 
 help_menu = Menu(menubar, tearoff=0)
@@ -916,5 +945,9 @@ menubar.add_cascade(label="Help", menu=help_menu)
 root.config(menu=menubar)
 
 show_dashboard()
+load_async(root, warm_catalogs, lambda result: None, on_error=None, key='catalogs', indicator=False)
+load_async(root, LedgerService.take_snapshots, lambda rows: None, on_error=None, key='stock-snapshots', indicator=False)
 
 root.mainloop()
+shutdown_background_loader()
+close_all_connections()
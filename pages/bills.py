@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import execute_query, fetch_query, fetch_one, fetch_page
 from datetime import datetime
-import uuid
+from services.bill_posting_service import BillPostingService
+from services.sales_service import SalesService
+from services.gold_rate_service import GoldRateService
+from utils.background import load_async
+from utils.virtual_tree import VirtualTreeview
+from services.search_service import SearchService
+from services.catalog_service import item_catalog, customer_catalog
 
 bills_tree = None
 
+TYPE_AHEAD_IGNORED_KEYS = ('Up', 'Down', 'Return', 'Escape', 'Tab')
+
 def bills_page(parent):
     global bills_tree
     
@@ -53,13 +61,14 @@ def bills_page(parent):
     ttk.Button(button_frame, text="View Bill", command=lambda: view_bill_details(bills_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Add Payment", command=lambda: add_payment_dialog(bills_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Cancel Bill", command=lambda: cancel_bill(bills_tree)).pack(side=tk.LEFT, padx=5)
-    ttk.Button(button_frame, text="Refresh", command=lambda: refresh_bills_list(bills_tree)).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Refresh", command=lambda: bills_tree.refresh()).pack(side=tk.LEFT, padx=5)
     
     tree_frame = ttk.Frame(frame)
     tree_frame.pack(fill=tk.BOTH, expand=True)
     
     columns = ('ID', 'Bill #', 'Type', 'Customer/Supplier', 'Employee', 'Date', 'Total', 'Paid', 'Outstanding', 'Status')
-    bills_tree = ttk.Treeview(tree_frame, columns=columns, height=15, show='headings')
+    bills_tree = VirtualTreeview(tree_frame, key_of=lambda bill: (bill[5], bill[0]),
+                                 format_row=format_bill_row, columns=columns, height=15, show='headings')
     
     col_widths = {'ID': 40, 'Bill #': 120, 'Type': 70, 'Customer/Supplier': 130, 'Employee': 90,
                   'Date': 90, 'Total': 90, 'Paid': 90, 'Outstanding': 90, 'Status': 80}
@@ -82,24 +91,42 @@ def bills_page(parent):
     status_frame.pack(fill=tk.X, pady=5)
     
     today = datetime.now().date()
-    today_sales = fetch_query("SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE bill_type='Sales' AND DATE(bill_date)=?", (today,))[0][0]
-    today_purchases = fetch_query("SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE bill_type='Purchase' AND DATE(bill_date)=?", (today,))[0][0]
-    ttk.Label(status_frame, text=f"Today's Sales: {today_sales:,.2f} | Today's Purchases: {today_purchases:,.2f}").pack(side=tk.LEFT)
+    status_label = ttk.Label(status_frame, text="")
+    status_label.pack(side=tk.LEFT)
+    
+    def load_today_totals():
+        totals = SalesService.daily_totals(today, today).get(today.isoformat(), {})
+        return totals.get('Sales', (0, 0))[0], totals.get('Purchase', (0, 0))[0]
+    
+    def show_today_totals(totals):
+        status_label.config(text=f"Today's Sales: {totals[0]:,.2f} | Today's Purchases: {totals[1]:,.2f}")
+    
+    load_async(status_label, load_today_totals, show_today_totals, indicator=False)
+
+def format_bill_row(bill):
+    return (
+        bill[0], bill[1], bill[2], bill[3], bill[4], bill[5],
+        f"{bill[6]:,.2f}", f"{bill[7]:,.2f}", f"{bill[8]:,.2f}", bill[9]
+    )
+
+def piece_weight(item_info):
+    """One piece's share of an item's stock weight, the default weight of a bill line for it"""
+    weight = item_info['weight'] or 0
+    return weight / item_info['stock'] if (item_info['stock'] or 0) > 0 else weight
 
 def refresh_bills_list(tree, bill_type="All", status="All", search=""):
-    if tree is None:
+    if tree is None or not tree.winfo_exists():
         return
-        
-    for item in tree.get_children():
-        tree.delete(item)
     
-    query = """
+    fts_search = SearchService.fts_filter('bills_fts', search) if search else None
+    
+    query = f"""
         SELECT b.id, b.bill_number, b.bill_type, 
                CASE WHEN b.bill_type = 'Sales' THEN COALESCE(c.name, 'Walk-in')
                     ELSE COALESCE(s.name, 'Unknown') END as party,
                COALESCE(e.name, 'N/A') as employee,
-               b.bill_date, b.total_amount, b.paid_amount, b.outstanding_amount, b.status
-        FROM bills b
+               b.bill_date, b.total_amount, b.paid_amount, b.outstanding_amount, b.status{", bills_fts.rank" if fts_search else ""}
+        FROM {"bills_fts JOIN bills b ON b.id = bills_fts.rowid" if fts_search else "bills b"}
         LEFT JOIN customers c ON b.customer_id = c.id
         LEFT JOIN suppliers s ON b.supplier_id = s.id
         LEFT JOIN employees e ON b.employee_id = e.id
@@ -115,21 +142,23 @@ def refresh_bills_list(tree, bill_type="All", status="All", search=""):
         query += " AND b.status = ?"
         params.append(status)
     
-    if search:
+    if fts_search:
+        query += " AND " + fts_search[0]
+        params.extend(fts_search[1])
+    elif search:
         query += " AND (b.bill_number LIKE ? OR c.name LIKE ? OR s.name LIKE ?)"
         search_pattern = f"%{search}%"
         params.extend([search_pattern, search_pattern, search_pattern])
     
-    query += " ORDER BY b.bill_date DESC, b.id DESC LIMIT 200"
-    
-    bills = fetch_query(query, tuple(params)) if params else fetch_query(query)
-    
-    for bill in bills:
-        formatted = (
-            bill[0], bill[1], bill[2], bill[3], bill[4], bill[5],
-            f"{bill[6]:,.2f}", f"{bill[7]:,.2f}", f"{bill[8]:,.2f}", bill[9]
-        )
-        tree.insert('', 'end', values=formatted)
+    if fts_search and fts_search[2]:
+        tree.set_source(lambda after, limit: fetch_page(query, params, ('bills_fts.rank', 'b.id'), after, limit),
+                        (bill_type, status, search), key_of=lambda bill: (bill[10], bill[0]))
+    elif fts_search:
+        tree.set_source(lambda after, limit: fetch_page(query, params, ('bills_fts.rowid',), after, limit, descending=True),
+                        (bill_type, status, search), key_of=lambda bill: (bill[0],))
+    else:
+        tree.set_source(lambda after, limit: fetch_page(query, params, ('b.bill_date', 'b.id'), after, limit, descending=True),
+                        (bill_type, status, search))
 
 def get_or_create_customer(name, phone=None, email=None):
     if not name or name.strip() == "":
@@ -168,13 +197,20 @@ def show_new_bill_dialog(parent, bill_type):
     
     if bill_type == 'Sales':
         ttk.Label(row1, text="Customer:").pack(side=tk.LEFT, padx=5)
-        customers = fetch_query("SELECT id, name, phone FROM customers ORDER BY name")
-        customer_names = ['Walk-in Customer'] + [f"{c[1]} ({c[2] or 'No Phone'})" for c in customers]
-        customer_var = ttk.Combobox(row1, values=customer_names, width=25)
+        customer_var = ttk.Combobox(row1, values=['Walk-in Customer'], width=25)
         customer_var.set('Walk-in Customer')
         customer_var.pack(side=tk.LEFT, padx=5)
         party_combo = customer_var
-        party_data = {f"{c[1]} ({c[2] or 'No Phone'})": c[0] for c in customers}
+        party_data = {}
+        
+        def on_customer_typed(event):
+            if event.keysym in TYPE_AHEAD_IGNORED_KEYS:
+                return
+            matches = customer_catalog.search(customer_var.get())
+            party_data.update((c['label'], c['id']) for c in matches)
+            customer_var['values'] = ['Walk-in Customer'] + [c['label'] for c in matches]
+        
+        customer_var.bind('<KeyRelease>', on_customer_typed)
         
         ttk.Button(row1, text="+ New", command=lambda: show_quick_add_customer(customer_var, party_data)).pack(side=tk.LEFT, padx=2)
     else:
@@ -204,26 +240,39 @@ def show_new_bill_dialog(parent, bill_type):
     payment_mode.set('Cash')
     payment_mode.pack(side=tk.LEFT, padx=5)
     
-    gold_rate = fetch_query("SELECT rate_per_gram FROM gold_rates WHERE purity='22K' AND is_active=1 ORDER BY rate_date DESC LIMIT 1")
-    current_rate = gold_rate[0][0] if gold_rate else 0
+    gold_rate = GoldRateService.get_current_rate('22K')
+    current_rate = gold_rate['rate_per_gram'] if gold_rate else 0
     ttk.Label(row2, text=f"Gold Rate (22K): {current_rate:,.2f}/gm", font=("Segoe UI", 9, "bold")).pack(side=tk.RIGHT, padx=10)
     
     items_frame = ttk.LabelFrame(main_frame, text="Items", padding=10)
     items_frame.pack(fill=tk.BOTH, expand=True, pady=5)
     
+    scan_frame = ttk.Frame(items_frame)
+    scan_frame.pack(fill=tk.X, pady=5)
+    
+    ttk.Label(scan_frame, text="Scan Barcode:").pack(side=tk.LEFT, padx=5)
+    scan_entry = ttk.Entry(scan_frame, width=25)
+    scan_entry.pack(side=tk.LEFT, padx=5)
+    scan_status = ttk.Label(scan_frame, text="")
+    scan_status.pack(side=tk.LEFT, padx=10)
+    
     add_item_frame = ttk.Frame(items_frame)
     add_item_frame.pack(fill=tk.X, pady=5)
     
     ttk.Label(add_item_frame, text="Item:").pack(side=tk.LEFT, padx=5)
-    items_list = fetch_query("""
-        SELECT i.id, i.name, i.price, i.quantity, COALESCE(m.name, 'N/A') as material, i.weight_in_gm
-        FROM items i
-        LEFT JOIN materials m ON i.material_id = m.id
-        WHERE i.is_active=1 ORDER BY i.name
-    """)
-    item_combo = ttk.Combobox(add_item_frame, values=[f"{i[1]} [{i[4]}] ({i[2]:,.0f})" for i in items_list], width=35)
+    item_combo = ttk.Combobox(add_item_frame, width=35)
     item_combo.pack(side=tk.LEFT, padx=5)
-    item_data = {f"{i[1]} [{i[4]}] ({i[2]:,.0f})": {'id': i[0], 'name': i[1], 'price': i[2], 'stock': i[3], 'material': i[4], 'weight': i[5]} for i in items_list}
+    item_data = {}
+    
+    def on_item_typed(event):
+        if event.keysym in TYPE_AHEAD_IGNORED_KEYS:
+            return
+        matches = item_catalog.search(item_combo.get())
+        item_data.clear()
+        item_data.update((i['label'], i) for i in matches)
+        item_combo['values'] = list(item_data)
+    
+    item_combo.bind('<KeyRelease>', on_item_typed)
     
     ttk.Label(add_item_frame, text="Qty:").pack(side=tk.LEFT, padx=5)
     qty_entry = ttk.Entry(add_item_frame, width=6)
@@ -239,13 +288,17 @@ def show_new_bill_dialog(parent, bill_type):
     weight_entry.insert(0, "0")
     weight_entry.pack(side=tk.LEFT, padx=5)
     
+    def selected_item():
+        selected = item_combo.get()
+        return item_data.get(selected) or item_catalog.find_label(selected)
+    
     def on_item_select(event):
         selected = item_combo.get()
         if selected in item_data:
             price_entry.delete(0, tk.END)
             price_entry.insert(0, str(item_data[selected]['price']))
             weight_entry.delete(0, tk.END)
-            weight_entry.insert(0, str(item_data[selected]['weight'] or 0))
+            weight_entry.insert(0, f"{piece_weight(item_data[selected]):.3f}")
     
     item_combo.bind('<<ComboboxSelected>>', on_item_select)
     
@@ -260,9 +313,65 @@ def show_new_bill_dialog(parent, bill_type):
     
     bill_items = []
     
+    def add_line(item_info, qty, price, weight, merge=False):
+        """Add a bill line, or with merge grow an existing line for the same item and price"""
+        already = sum(line['quantity'] for line in bill_items if line['item_id'] == item_info['id'])
+        if bill_type == 'Sales' and already + qty > item_info['stock']:
+            if not messagebox.askyesno("Stock Warning", f"Available stock: {item_info['stock']}\nYou're adding: {already + qty}\n\nProceed anyway?"):
+                return False
+        
+        index = next((i for i, line in enumerate(bill_items)
+                      if merge and line['item_id'] == item_info['id'] and line['unit_price'] == price), None)
+        if index is None:
+            line = {
+                'item_id': item_info['id'],
+                'name': item_info['name'],
+                'material': item_info['material'],
+                'quantity': 0,
+                'unit_price': price,
+                'weight': 0,
+                'line_total': 0
+            }
+            bill_items.append(line)
+            row = items_tree.insert('', 'end')
+        else:
+            line = bill_items[index]
+            row = items_tree.get_children()[index]
+        
+        line['quantity'] += qty
+        line['weight'] += weight
+        line['line_total'] = line['quantity'] * price
+        items_tree.item(row, values=(line['name'], line['material'], line['quantity'], f"{price:,.2f}",
+                                     f"{line['weight']:.3f}", f"{line['line_total']:,.2f}"))
+        update_totals()
+        return True
+    
+    def scan_barcode(event=None):
+        barcode = scan_entry.get().strip()
+        scan_entry.delete(0, tk.END)
+        if not barcode:
+            return
+        item_info = item_catalog.by_key(barcode)
+        if item_info is None:
+            scan_entry.bell()
+            scan_status.config(text=f"Unknown barcode: {barcode}", foreground="red")
+            return
+        if not item_info['price']:
+            scan_entry.bell()
+            scan_status.config(text=f"No price set for {item_info['name']}", foreground="red")
+            return
+        if add_line(item_info, 1, item_info['price'], piece_weight(item_info), merge=True):
+            scan_status.config(text=f"Added {item_info['name']}", foreground="")
+        scan_entry.focus_set()
+    
+    scan_entry.bind('<Return>', scan_barcode)
+    scan_entry.bind('<KP_Enter>', scan_barcode)
+    item_catalog.ensure_current()
+    scan_entry.focus_set()
+    
     def add_item():
-        selected = item_combo.get()
-        if not selected or selected not in item_data:
+        item_info = selected_item() if item_combo.get() else None
+        if item_info is None:
             messagebox.showwarning("Warning", "Please select an item!")
             return
         
@@ -278,26 +387,8 @@ def show_new_bill_dialog(parent, bill_type):
             messagebox.showwarning("Warning", "Quantity and price must be positive!")
             return
         
-        item_info = item_data[selected]
-        
-        if bill_type == 'Sales' and qty > item_info['stock']:
-            if not messagebox.askyesno("Stock Warning", f"Available stock: {item_info['stock']}\nYou're adding: {qty}\n\nProceed anyway?"):
-                return
-        
-        total = qty * price
-        
-        bill_items.append({
-            'item_id': item_info['id'],
-            'name': item_info['name'],
-            'material': item_info['material'],
-            'quantity': qty,
-            'unit_price': price,
-            'weight': weight,
-            'line_total': total
-        })
-        
-        items_tree.insert('', 'end', values=(item_info['name'], item_info['material'], qty, f"{price:,.2f}", f"{weight:.3f}", f"{total:,.2f}"))
-        update_totals()
+        if not add_line(item_info, qty, price, weight):
+            return
         
         item_combo.set("")
         qty_entry.delete(0, tk.END)
@@ -363,9 +454,6 @@ def show_new_bill_dialog(parent, bill_type):
     remarks_entry.pack(side=tk.LEFT, padx=5)
     
     def update_totals(*args):
-        subtotal = sum(item['line_total'] for item in bill_items)
-        subtotal_var.set(f"{subtotal:,.2f}")
-        
         try:
             discount = float(discount_var.get() or 0)
             tax_percent = float(tax_var.get() or 0)
@@ -375,10 +463,9 @@ def show_new_bill_dialog(parent, bill_type):
             tax_percent = 0
             making = 0
         
-        after_discount = subtotal - discount + making
-        tax_amount = after_discount * (tax_percent / 100)
-        total = after_discount + tax_amount
-        total_var.set(f"{total:,.2f}")
+        totals = BillPostingService.calculate_totals(bill_items, discount, tax_percent, making)
+        subtotal_var.set(f"{totals['subtotal']:,.2f}")
+        total_var.set(f"{totals['total']:,.2f}")
     
     discount_var.trace('w', update_totals)
     tax_var.trace('w', update_totals)
@@ -402,6 +489,9 @@ def show_new_bill_dialog(parent, bill_type):
         if bill_type == 'Sales':
             if party_selected and party_selected != 'Walk-in Customer':
                 party_id = party_data.get(party_selected)
+                if not party_id:
+                    customer = customer_catalog.find_label(party_selected)
+                    party_id = customer['id'] if customer else None
                 if not party_id:
                     customer_name = party_selected.split(' (')[0] if ' (' in party_selected else party_selected
                     party_id = get_or_create_customer(customer_name)
@@ -417,61 +507,15 @@ def show_new_bill_dialog(parent, bill_type):
             messagebox.showerror("Error", "Invalid amount values!")
             return
         
-        subtotal = sum(item['line_total'] for item in bill_items)
-        total_weight = sum(item['weight'] for item in bill_items)
-        after_discount = subtotal - discount + making
-        tax_amount = after_discount * (tax_percent / 100)
-        total = after_discount + tax_amount
-        outstanding = total - paid
-        
-        bill_number = f"{'SB' if bill_type == 'Sales' else 'PB'}-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
-        
-        status = 'Completed' if outstanding <= 0 else 'Pending'
-        
         try:
-            if bill_type == 'Sales':
-                bill_id = execute_query("""
-                    INSERT INTO bills (bill_number, bill_type, customer_id, employee_id, bill_date, 
-                                      total_amount, total_weight, discount_amount, tax_amount, 
-                                      making_charges, paid_amount, outstanding_amount, payment_mode,
-                                      status, remarks, date_created, date_modified)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    bill_number, bill_type, party_id, employee_id, date_entry.get(), total,
-                    total_weight, discount, tax_amount, making, paid, outstanding, 
-                    payment_mode.get(), status, remarks_entry.get() or None, 
-                    datetime.now(), datetime.now()
-                ))
-            else:
-                bill_id = execute_query("""
-                    INSERT INTO bills (bill_number, bill_type, supplier_id, employee_id, bill_date, 
-                                      total_amount, total_weight, discount_amount, tax_amount, 
-                                      making_charges, paid_amount, outstanding_amount, payment_mode,
-                                      status, remarks, date_created, date_modified)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    bill_number, bill_type, party_id, employee_id, date_entry.get(), total,
-                    total_weight, discount, tax_amount, making, paid, outstanding, 
-                    payment_mode.get(), status, remarks_entry.get() or None, 
-                    datetime.now(), datetime.now()
-                ))
-            
-            for item in bill_items:
-                execute_query("""
-                    INSERT INTO bill_items (bill_id, item_id, quantity, unit_price, line_total, weight_in_gm)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (bill_id, item['item_id'], item['quantity'], item['unit_price'], item['line_total'], item['weight']))
-                
-                if bill_type == 'Sales':
-                    execute_query("UPDATE items SET quantity = quantity - ? WHERE id = ?", (item['quantity'], item['item_id']))
-                else:
-                    execute_query("UPDATE items SET quantity = quantity + ? WHERE id = ?", (item['quantity'], item['item_id']))
-            
-            if party_id and bill_type == 'Sales' and outstanding > 0:
-                execute_query("""
-                    UPDATE customers SET outstanding_balance = outstanding_balance + ?, date_modified = ?
-                    WHERE id = ?
-                """, (outstanding, datetime.now(), party_id))
+            posted = BillPostingService.post_bill(
+                bill_type, party_id, employee_id, date_entry.get(), bill_items,
+                discount=discount, tax_percent=tax_percent, making=making, paid=paid,
+                payment_mode=payment_mode.get(), remarks=remarks_entry.get() or None
+            )
+            bill_number = posted['bill_number']
+            total = posted['total']
+            outstanding = posted['outstanding']
             
             messagebox.showinfo("Success", f"Bill {bill_number} created successfully!\n\nTotal: {total:,.2f}\nPaid: {paid:,.2f}\nOutstanding: {outstanding:,.2f}")
             dialog.destroy()
@@ -591,21 +635,8 @@ def add_payment_dialog(tree):
             messagebox.showerror("Error", "Amount must be positive!")
             return
         
-        new_outstanding = outstanding - amount
-        new_status = 'Completed' if new_outstanding <= 0 else 'Pending'
-        
         try:
-            execute_query("""
-                UPDATE bills SET paid_amount = paid_amount + ?, outstanding_amount = ?,
-                                 status = ?, date_modified = ? WHERE id = ?
-            """, (amount, max(0, new_outstanding), new_status, datetime.now(), bill_id))
-            
-            execute_query("""
-                INSERT INTO payments (payment_type, payment_date, amount, payment_mode, 
-                                     reference_type, reference_id, description, date_created)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, ('Receipt', datetime.now().date(), amount, mode_combo.get(), 
-                  'Bill', bill_id, f"Payment for {bill_num}", datetime.now()))
+            BillPostingService.record_payment(bill_id, amount, mode_combo.get())
             
             messagebox.showinfo("Success", f"Payment of {amount:,.2f} recorded!")
             dialog.destroy()
@@ -692,22 +723,7 @@ def cancel_bill(tree):
     
     if messagebox.askyesno("Confirm Cancel", f"Are you sure you want to cancel bill {bill_num}?\n\nThis will restore the stock quantities."):
         try:
-            bill = fetch_one("SELECT bill_type, customer_id, outstanding_amount FROM bills WHERE id = ?", (bill_id,))
-            items = fetch_query("SELECT item_id, quantity FROM bill_items WHERE bill_id = ?", (bill_id,))
-            
-            for item in items:
-                if bill['bill_type'] == 'Sales':
-                    execute_query("UPDATE items SET quantity = quantity + ? WHERE id = ?", (item[1], item[0]))
-                else:
-                    execute_query("UPDATE items SET quantity = quantity - ? WHERE id = ?", (item[1], item[0]))
-            
-            if bill['customer_id'] and bill['bill_type'] == 'Sales':
-                execute_query("""
-                    UPDATE customers SET outstanding_balance = outstanding_balance - ?, date_modified = ?
-                    WHERE id = ?
-                """, (bill['outstanding_amount'] or 0, datetime.now(), bill['customer_id']))
-            
-            execute_query("UPDATE bills SET status = 'Cancelled', date_modified = ? WHERE id = ?", (datetime.now(), bill_id))
+            BillPostingService.cancel_bill(bill_id)
             
             messagebox.showinfo("Success", f"Bill {bill_num} has been cancelled!")
             refresh_bills_list(tree)
@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import execute_query, fetch_query, fetch_one, fetch_page
 from datetime import datetime
+from utils.background import Debouncer, load_async
+from services.search_service import customer_search_cache
+from utils.virtual_tree import VirtualTreeview
 
 customers_tree = None
 
@@ -31,8 +34,12 @@ def customers_page(parent):
     def search_customers():
         refresh_customers_list(customers_tree, search_var.get())
     
-    ttk.Button(search_frame, text="Search", command=search_customers).pack(side=tk.LEFT, padx=5)
-    ttk.Button(search_frame, text="Clear", command=lambda: [search_var.set(""), refresh_customers_list(customers_tree)]).pack(side=tk.LEFT, padx=5)
+    search_as_you_type = Debouncer(search_entry, search_customers)
+    search_var.trace_add('write', search_as_you_type)
+    search_entry.bind('<Return>', search_as_you_type.flush)
+    
+    ttk.Button(search_frame, text="Search", command=search_as_you_type.flush).pack(side=tk.LEFT, padx=5)
+    ttk.Button(search_frame, text="Clear", command=lambda: [search_var.set(""), search_as_you_type.flush()]).pack(side=tk.LEFT, padx=5)
     
     button_frame = ttk.Frame(frame)
     button_frame.pack(fill=tk.X, pady=10)
@@ -42,13 +49,14 @@ def customers_page(parent):
     ttk.Button(button_frame, text="Delete Customer", command=lambda: delete_customer(customers_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="View Details", command=lambda: view_customer_details(customers_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="View Transactions", command=lambda: view_customer_transactions(customers_tree)).pack(side=tk.LEFT, padx=5)
-    ttk.Button(button_frame, text="Refresh", command=lambda: refresh_customers_list(customers_tree)).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Refresh", command=lambda: customers_tree.refresh()).pack(side=tk.LEFT, padx=5)
     
     tree_frame = ttk.Frame(frame)
     tree_frame.pack(fill=tk.BOTH, expand=True)
     
     columns = ('ID', 'Name', 'Phone', 'Email', 'City', 'GST', 'Credit Limit', 'Outstanding')
-    customers_tree = ttk.Treeview(tree_frame, columns=columns, height=15, show='headings')
+    customers_tree = VirtualTreeview(tree_frame, key_of=lambda customer: (customer[1], customer[0]),
+                                     format_row=format_customer_row, columns=columns, height=15, show='headings')
     
     col_widths = {'ID': 50, 'Name': 150, 'Phone': 100, 'Email': 150, 'City': 100, 
                   'GST': 120, 'Credit Limit': 100, 'Outstanding': 100}
@@ -70,9 +78,15 @@ def customers_page(parent):
     status_frame = ttk.Frame(frame)
     status_frame.pack(fill=tk.X, pady=5)
     
-    customer_count = fetch_query("SELECT COUNT(*) FROM customers")[0][0]
-    total_outstanding = fetch_query("SELECT COALESCE(SUM(outstanding_balance), 0) FROM customers")[0][0]
-    ttk.Label(status_frame, text=f"Total Customers: {customer_count} | Total Outstanding: ₹{total_outstanding:,.2f}").pack(side=tk.LEFT)
+    status_label = ttk.Label(status_frame, text="")
+    status_label.pack(side=tk.LEFT)
+    
+    def show_totals(totals):
+        customer_count, total_outstanding = totals
+        status_label.config(text=f"Total Customers: {customer_count} | Total Outstanding: ₹{total_outstanding:,.2f}")
+    
+    load_async(status_label, lambda: tuple(fetch_one("SELECT COUNT(*), COALESCE(SUM(outstanding_balance), 0) FROM customers")),
+               show_totals, indicator=False)
 
 def sort_column(tree, col, reverse):
     items = [(tree.set(k, col), k) for k in tree.get_children('')]
@@ -86,37 +100,30 @@ def sort_column(tree, col, reverse):
     
     tree.heading(col, command=lambda: sort_column(tree, col, not reverse))
 
+def format_customer_row(customer):
+    return (
+        customer[0], customer[1], customer[2] or "N/A", customer[3] or "N/A",
+        customer[4] or "N/A", customer[5] or "N/A",
+        f"₹{customer[6]:,.2f}" if customer[6] else "₹0.00",
+        f"₹{customer[7]:,.2f}" if customer[7] else "₹0.00"
+    )
+
 def refresh_customers_list(tree, search_term=""):
-    if tree is None:
+    if tree is None or not tree.winfo_exists():
         return
-        
-    for item in tree.get_children():
-        tree.delete(item)
-    
-    if search_term:
-        query = """
-            SELECT id, name, phone, email, city, gst_number, credit_limit, outstanding_balance
-            FROM customers
-            WHERE name LIKE ? OR phone LIKE ? OR email LIKE ? OR city LIKE ?
-            ORDER BY name
-        """
-        search_pattern = f"%{search_term}%"
-        customers = fetch_query(query, (search_pattern, search_pattern, search_pattern, search_pattern))
-    else:
-        customers = fetch_query("""
-            SELECT id, name, phone, email, city, gst_number, credit_limit, outstanding_balance
-            FROM customers
-            ORDER BY name
-        """)
-    
-    for customer in customers:
-        formatted = (
-            customer[0], customer[1], customer[2] or "N/A", customer[3] or "N/A",
-            customer[4] or "N/A", customer[5] or "N/A",
-            f"₹{customer[6]:,.2f}" if customer[6] else "₹0.00",
-            f"₹{customer[7]:,.2f}" if customer[7] else "₹0.00"
-        )
-        tree.insert('', 'end', values=formatted)
+    
+    query = """
+        SELECT id, name, phone, email, city, gst_number, credit_limit, outstanding_balance
+        FROM customers
+        WHERE 1=1
+    """
+    
+    if search_term.strip():
+        tree.set_source(lambda after, limit: customer_search_cache.fetch_page(None, search_term, query, after, limit),
+                        (search_term,), key_of=lambda customer: (customer[-1], customer[0]))
+        return
+    
+    tree.set_source(lambda after, limit: fetch_page(query, (), ('name', 'id'), after, limit), (search_term,))
 
 def show_add_customer_dialog(parent):
     dialog = tk.Toplevel(parent)
@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import execute_query, fetch_query, fetch_one, fetch_page
 from datetime import datetime
+from services.search_service import employee_search_cache
+from utils.background import Debouncer
+from utils.virtual_tree import VirtualTreeview
 
 employees_tree = None
 
@@ -29,10 +32,14 @@ def employees_page(parent):
     search_entry.pack(side=tk.LEFT, padx=5)
     
     def search_employees():
-        refresh_employees_list(employees_tree, search_var.get())
+        refresh_employees_list(employees_tree, search_var.get(), status_var.get())
     
-    ttk.Button(search_frame, text="Search", command=search_employees).pack(side=tk.LEFT, padx=5)
-    ttk.Button(search_frame, text="Clear", command=lambda: [search_var.set(""), refresh_employees_list(employees_tree)]).pack(side=tk.LEFT, padx=5)
+    search_as_you_type = Debouncer(search_entry, search_employees)
+    search_var.trace_add('write', search_as_you_type)
+    search_entry.bind('<Return>', search_as_you_type.flush)
+    
+    ttk.Button(search_frame, text="Search", command=search_as_you_type.flush).pack(side=tk.LEFT, padx=5)
+    ttk.Button(search_frame, text="Clear", command=lambda: [search_var.set(""), status_var.set("All"), search_as_you_type.flush()]).pack(side=tk.LEFT, padx=5)
     
     filter_frame = ttk.Frame(frame)
     filter_frame.pack(fill=tk.X, pady=5)
@@ -41,7 +48,7 @@ def employees_page(parent):
     status_var = tk.StringVar(value="All")
     status_combo = ttk.Combobox(filter_frame, textvariable=status_var, values=['All', 'Active', 'Inactive'], width=15)
     status_combo.pack(side=tk.LEFT, padx=5)
-    status_combo.bind('<<ComboboxSelected>>', lambda e: refresh_employees_list(employees_tree, "", status_var.get()))
+    status_combo.bind('<<ComboboxSelected>>', lambda e: search_as_you_type.flush())
     
     button_frame = ttk.Frame(frame)
     button_frame.pack(fill=tk.X, pady=10)
@@ -51,13 +58,14 @@ def employees_page(parent):
     ttk.Button(button_frame, text="Delete Employee", command=lambda: delete_employee(employees_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="View Details", command=lambda: view_employee_details(employees_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Toggle Status", command=lambda: toggle_employee_status(employees_tree)).pack(side=tk.LEFT, padx=5)
-    ttk.Button(button_frame, text="Refresh", command=lambda: refresh_employees_list(employees_tree)).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Refresh", command=lambda: employees_tree.refresh()).pack(side=tk.LEFT, padx=5)
     
     tree_frame = ttk.Frame(frame)
     tree_frame.pack(fill=tk.BOTH, expand=True)
     
     columns = ('ID', 'Name', 'Position', 'Phone', 'Email', 'Salary', 'Date Joined', 'Status')
-    employees_tree = ttk.Treeview(tree_frame, columns=columns, height=15, show='headings')
+    employees_tree = VirtualTreeview(tree_frame, key_of=lambda emp: (emp[1], emp[0]),
+                                     format_row=format_employee_row, columns=columns, height=15, show='headings')
     
     col_widths = {'ID': 50, 'Name': 150, 'Position': 100, 'Phone': 100, 
                   'Email': 150, 'Salary': 100, 'Date Joined': 100, 'Status': 80}
@@ -96,40 +104,35 @@ def sort_column(tree, col, reverse):
     
     tree.heading(col, command=lambda: sort_column(tree, col, not reverse))
 
+def format_employee_row(emp):
+    return (
+        emp[0], emp[1], emp[2] or "N/A", emp[3] or "N/A",
+        emp[4] or "N/A", f"₹{emp[5]:,.2f}" if emp[5] else "₹0.00",
+        emp[6] or "N/A", emp[7]
+    )
+
 def refresh_employees_list(tree, search_term="", status_filter="All"):
-    if tree is None:
+    if tree is None or not tree.winfo_exists():
         return
-        
-    for item in tree.get_children():
-        tree.delete(item)
     
     query = """
         SELECT id, name, position, phone, email, salary, date_joined, status
         FROM employees
         WHERE 1=1
     """
-    params = []
     
-    if search_term:
-        query += " AND (name LIKE ? OR position LIKE ? OR phone LIKE ?)"
-        search_pattern = f"%{search_term}%"
-        params.extend([search_pattern, search_pattern, search_pattern])
+    if search_term.strip():
+        tree.set_source(lambda after, limit: employee_search_cache.fetch_page(status_filter, search_term, query, after, limit),
+                        (search_term, status_filter), key_of=lambda emp: (emp[-1], emp[0]))
+        return
     
+    params = []
     if status_filter and status_filter != "All":
         query += " AND status = ?"
         params.append(status_filter)
     
-    query += " ORDER BY name"
-    
-    employees = fetch_query(query, tuple(params)) if params else fetch_query(query)
-    
-    for emp in employees:
-        formatted = (
-            emp[0], emp[1], emp[2] or "N/A", emp[3] or "N/A",
-            emp[4] or "N/A", f"₹{emp[5]:,.2f}" if emp[5] else "₹0.00",
-            emp[6] or "N/A", emp[7]
-        )
-        tree.insert('', 'end', values=formatted)
+    tree.set_source(lambda after, limit: fetch_page(query, params, ('name', 'id'), after, limit),
+                    (search_term, status_filter))
 
 def show_add_employee_dialog(parent):
     dialog = tk.Toplevel(parent)
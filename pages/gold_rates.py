@@ -1,8 +1,9 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from database.db import execute_query, fetch_query
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from services.gold_rate_service import GoldRateService, DiamondRateService
+from services.rate_series_service import RateSeriesService
 
 rates_tree = None
 diamond_tree = None
@@ -26,7 +27,7 @@ def gold_rates_page(parent):
     notebook.pack(fill=tk.BOTH, expand=True, pady=10)
     
     gold_tab = ttk.Frame(notebook)
-    notebook.add(gold_tab, text="Gold Rates")
+    notebook.add(gold_tab, text="Metal Rates")
     
     diamond_tab = ttk.Frame(notebook)
     notebook.add(diamond_tab, text="Diamond Rates")
@@ -37,21 +38,24 @@ def gold_rates_page(parent):
 def create_gold_rates_tab(frame, parent):
     global rates_tree
     
-    current_rates_frame = ttk.LabelFrame(frame, text="Current Gold Rates", padding=10)
+    current_rates_frame = ttk.LabelFrame(frame, text="Current Metal Rates", padding=10)
     current_rates_frame.pack(fill=tk.X, pady=10, padx=10)
     
-    current_rates = GoldRateService.get_all_current_rates()
-    
-    if current_rates:
-        for i, rate in enumerate(current_rates):
-            rate_text = f"{rate['purity']}: {rate['rate_per_gram']:,.2f}/gm"
-            if rate.get('making_charges'):
-                rate_text += f" (Making: {rate['making_charges']:,.2f}/gm)"
-            ttk.Label(current_rates_frame, text=rate_text, font=("Segoe UI", 11)).grid(row=0, column=i, padx=20)
+    metals = [material for material in GoldRateService.METAL_PURITIES
+              if GoldRateService.get_all_current_rates(material)]
+    
+    if metals:
+        for row, material in enumerate(metals):
+            ttk.Label(current_rates_frame, text=f"{material}:", font=("Segoe UI", 11, "bold")).grid(row=row, column=0, sticky='w')
+            for i, rate in enumerate(GoldRateService.get_all_current_rates(material)):
+                rate_text = f"{rate['purity']}: {rate['rate_per_gram']:,.2f}/gm"
+                if rate.get('making_charges'):
+                    rate_text += f" (Making: {rate['making_charges']:,.2f}/gm)"
+                ttk.Label(current_rates_frame, text=rate_text, font=("Segoe UI", 11)).grid(row=row, column=i + 1, padx=20)
     else:
         ttk.Label(current_rates_frame, text="No rates set. Please add rates below.", font=("Segoe UI", 11)).pack()
     
-    update_frame = ttk.LabelFrame(frame, text="Update Gold Rates", padding=10)
+    update_frame = ttk.LabelFrame(frame, text="Update Metal Rates", padding=10)
     update_frame.pack(fill=tk.X, pady=10, padx=10)
     
     form_row = ttk.Frame(update_frame)
@@ -62,11 +66,23 @@ def create_gold_rates_tab(frame, parent):
     date_entry.insert(0, datetime.now().strftime('%Y-%m-%d'))
     date_entry.pack(side=tk.LEFT, padx=5)
     
+    ttk.Label(form_row, text="Metal:").pack(side=tk.LEFT, padx=10)
+    material_combo = ttk.Combobox(form_row, values=list(GoldRateService.METAL_PURITIES), width=9, state='readonly')
+    material_combo.set('Gold')
+    material_combo.pack(side=tk.LEFT, padx=5)
+    
     ttk.Label(form_row, text="Purity:").pack(side=tk.LEFT, padx=10)
     purity_combo = ttk.Combobox(form_row, values=GoldRateService.PURITIES, width=8)
     purity_combo.set('22K')
     purity_combo.pack(side=tk.LEFT, padx=5)
     
+    def on_material_selected(event=None):
+        purities = GoldRateService.METAL_PURITIES[material_combo.get()]
+        purity_combo['values'] = purities
+        purity_combo.set('22K' if '22K' in purities else purities[0])
+    
+    material_combo.bind('<<ComboboxSelected>>', on_material_selected)
+    
     ttk.Label(form_row, text="Rate/gm:").pack(side=tk.LEFT, padx=10)
     rate_entry = ttk.Entry(form_row, width=12)
     rate_entry.pack(side=tk.LEFT, padx=5)
@@ -93,8 +109,8 @@ def create_gold_rates_tab(frame, parent):
             return
         
         try:
-            GoldRateService.update_rate(purity, rate, making, "", rate_date)
-            messagebox.showinfo("Success", f"Rate updated for {purity}!\n\nNew Rate: {rate:,.2f}/gm")
+            GoldRateService.update_rate(purity, rate, making, "", rate_date, material_combo.get())
+            messagebox.showinfo("Success", f"Rate updated for {material_combo.get()} {purity}!\n\nNew Rate: {rate:,.2f}/gm")
             gold_rates_page(parent)
         except Exception as e:
             messagebox.showerror("Error", f"Error updating rate: {str(e)}")
@@ -138,12 +154,17 @@ def create_gold_rates_tab(frame, parent):
     
     ttk.Button(quick_row, text="Update All", command=update_all_rates).pack(side=tk.LEFT, padx=20)
     
-    history_frame = ttk.LabelFrame(frame, text="Gold Rate History", padding=10)
+    history_frame = ttk.LabelFrame(frame, text="Metal Rate History", padding=10)
     history_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
     
     filter_row = ttk.Frame(history_frame)
     filter_row.pack(fill=tk.X, pady=5)
     
+    ttk.Label(filter_row, text="Metal:").pack(side=tk.LEFT, padx=5)
+    filter_material = ttk.Combobox(filter_row, values=list(GoldRateService.METAL_PURITIES), width=9, state='readonly')
+    filter_material.set('Gold')
+    filter_material.pack(side=tk.LEFT, padx=5)
+    
     ttk.Label(filter_row, text="Filter by Purity:").pack(side=tk.LEFT, padx=5)
     filter_purity = ttk.Combobox(filter_row, values=['All'] + GoldRateService.PURITIES, width=10)
     filter_purity.set('All')
@@ -166,11 +187,12 @@ def create_gold_rates_tab(frame, parent):
         for item in rates_tree.get_children():
             rates_tree.delete(item)
         
+        material = filter_material.get()
         purity_filter = filter_purity.get()
         if purity_filter == 'All':
-            history = GoldRateService.get_rate_history(limit=100)
+            history = GoldRateService.get_rate_history(limit=100, material=material)
         else:
-            history = GoldRateService.get_rate_history(purity=purity_filter, limit=100)
+            history = GoldRateService.get_rate_history(purity=purity_filter, limit=100, material=material)
         
         for rate in history:
             rates_tree.insert('', 'end', values=(
@@ -179,6 +201,12 @@ def create_gold_rates_tab(frame, parent):
                 rate[5] or ""
             ))
     
+    def on_filter_material(event=None):
+        filter_purity['values'] = ['All'] + GoldRateService.METAL_PURITIES[filter_material.get()]
+        filter_purity.set('All')
+        refresh_history()
+    
+    filter_material.bind('<<ComboboxSelected>>', on_filter_material)
     filter_purity.bind('<<ComboboxSelected>>', lambda e: refresh_history())
     refresh_history()
     
@@ -198,6 +226,50 @@ def create_gold_rates_tab(frame, parent):
     
     ttk.Button(btn_frame, text="Delete Selected", command=delete_selected).pack(side=tk.LEFT, padx=5)
     ttk.Button(btn_frame, text="Refresh", command=refresh_history).pack(side=tk.LEFT, padx=5)
+    
+    def show_trend():
+        material = filter_material.get()
+        purity = filter_purity.get()
+        if purity == 'All':
+            purities = GoldRateService.METAL_PURITIES[material]
+            purity = '22K' if '22K' in purities else purities[0]
+        show_rate_trend(frame, purity, material)
+    
+    ttk.Button(btn_frame, text="1 Year Trend", command=show_trend).pack(side=tk.LEFT, padx=5)
+
+def show_rate_trend(parent, purity, material='Gold'):
+    dialog = tk.Toplevel(parent)
+    dialog.title(f"{material} Rate Trend - {purity}")
+    dialog.geometry("620x420")
+    
+    period_row = ttk.Frame(dialog)
+    period_row.pack(fill=tk.X, padx=10, pady=5)
+    
+    ttk.Label(period_row, text="Period:").pack(side=tk.LEFT, padx=5)
+    period_combo = ttk.Combobox(period_row, values=['Daily', 'Weekly', 'Monthly'], width=10, state='readonly')
+    period_combo.set('Weekly')
+    period_combo.pack(side=tk.LEFT, padx=5)
+    
+    columns = ('Period', 'Open', 'High', 'Low', 'Close', 'Change %')
+    tree = ttk.Treeview(dialog, columns=columns, height=15, show='headings')
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, width=95, anchor='center')
+    tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    
+    def load():
+        for item in tree.get_children():
+            tree.delete(item)
+        end = date.today()
+        period = {'Daily': 'day', 'Weekly': 'week', 'Monthly': 'month'}[period_combo.get()]
+        candles = RateSeriesService.ohlc('metal', (material, purity), end - timedelta(days=365), end, period)
+        for bucket, first, high, low, close, points in reversed(candles):
+            change = (close - first) / first * 100 if first else 0
+            tree.insert('', 'end', values=(bucket, f"{first:,.2f}", f"{high:,.2f}", f"{low:,.2f}",
+                                           f"{close:,.2f}", f"{change:+.2f}"))
+    
+    period_combo.bind('<<ComboboxSelected>>', lambda e: load())
+    load()
 
 def create_diamond_rates_tab(frame, parent):
     global diamond_tree
@@ -223,6 +295,15 @@ def create_diamond_rates_tab(frame, parent):
     shape_combo.set('Round')
     shape_combo.pack(side=tk.LEFT, padx=5)
     
+    ttk.Label(row1, text="Carat:").pack(side=tk.LEFT, padx=10)
+    carat_from_entry = ttk.Entry(row1, width=6)
+    carat_from_entry.insert(0, "0")
+    carat_from_entry.pack(side=tk.LEFT, padx=2)
+    ttk.Label(row1, text="to").pack(side=tk.LEFT)
+    carat_to_entry = ttk.Entry(row1, width=6)
+    carat_to_entry.insert(0, "10")
+    carat_to_entry.pack(side=tk.LEFT, padx=2)
+    
     ttk.Label(row1, text="Rate/Carat:").pack(side=tk.LEFT, padx=10)
     rate_entry = ttk.Entry(row1, width=12)
     rate_entry.pack(side=tk.LEFT, padx=5)
@@ -230,8 +311,13 @@ def create_diamond_rates_tab(frame, parent):
     def add_rate():
         try:
             rate = float(rate_entry.get())
+            carat_from = float(carat_from_entry.get() or 0)
+            carat_to = float(carat_to_entry.get() or 10)
+            if carat_to <= carat_from:
+                messagebox.showerror("Error", "Carat range end must be above its start!")
+                return
             DiamondRateService.update_rate(
-                clarity_combo.get(), color_combo.get(), rate,
+                clarity_combo.get(), color_combo.get(), rate, carat_from, carat_to,
                 shape=shape_combo.get()
             )
             messagebox.showinfo("Success", "Diamond rate updated!")
@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import execute_query, fetch_query, fetch_one, fetch_page
 from datetime import datetime
 from services.stock_service import StockService
+from services.search_service import item_search_cache
+from utils.background import Debouncer, load_async
+from utils.virtual_tree import VirtualTreeview
 
 items_tree = None
 
@@ -38,8 +41,13 @@ def items_page(parent):
     def search_items():
         refresh_items_list(items_tree, search_var.get(), material_var.get())
     
-    ttk.Button(filter_frame, text="Search", command=search_items).pack(side=tk.LEFT, padx=5)
-    ttk.Button(filter_frame, text="Clear", command=lambda: [search_var.set(""), material_var.set("All"), refresh_items_list(items_tree)]).pack(side=tk.LEFT, padx=5)
+    search_as_you_type = Debouncer(search_entry, search_items)
+    search_var.trace_add('write', search_as_you_type)
+    search_entry.bind('<Return>', search_as_you_type.flush)
+    material_combo.bind('<<ComboboxSelected>>', lambda e: search_as_you_type.flush())
+    
+    ttk.Button(filter_frame, text="Search", command=search_as_you_type.flush).pack(side=tk.LEFT, padx=5)
+    ttk.Button(filter_frame, text="Clear", command=lambda: [search_var.set(""), material_var.set("All"), search_as_you_type.flush()]).pack(side=tk.LEFT, padx=5)
     
     button_frame = ttk.Frame(frame)
     button_frame.pack(fill=tk.X, pady=10)
@@ -50,13 +58,14 @@ def items_page(parent):
     ttk.Button(button_frame, text="Adjust Stock", command=lambda: show_stock_adjustment_dialog(parent, items_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="View Details", command=lambda: view_item_details(items_tree)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Stock History", command=lambda: view_stock_history(items_tree)).pack(side=tk.LEFT, padx=5)
-    ttk.Button(button_frame, text="Refresh", command=lambda: refresh_items_list(items_tree)).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Refresh", command=lambda: items_tree.refresh()).pack(side=tk.LEFT, padx=5)
     
     tree_frame = ttk.Frame(frame)
     tree_frame.pack(fill=tk.BOTH, expand=True)
     
     columns = ('ID', 'Name', 'Material', 'Category', 'Price', 'Stock', 'Weight', 'Purity/Clarity', 'Barcode')
-    items_tree = ttk.Treeview(tree_frame, columns=columns, height=15, show='headings')
+    items_tree = VirtualTreeview(tree_frame, key_of=lambda item: (item[1], item[0]), format_row=format_item_row,
+                                 columns=columns, height=15, show='headings')
     
     col_widths = {'ID': 50, 'Name': 150, 'Material': 80, 'Category': 100, 'Price': 100, 
                   'Stock': 60, 'Weight': 80, 'Purity/Clarity': 80, 'Barcode': 100}
@@ -78,8 +87,13 @@ def items_page(parent):
     status_frame = ttk.Frame(frame)
     status_frame.pack(fill=tk.X, pady=5)
     
-    stats = get_item_stats()
-    ttk.Label(status_frame, text=f"Total Items: {stats['total']} | Gold: {stats['gold']} | Diamond: {stats['diamond']} | Low Stock: {stats['low_stock']}").pack(side=tk.LEFT)
+    status_label = ttk.Label(status_frame, text="")
+    status_label.pack(side=tk.LEFT)
+    
+    def show_stats(stats):
+        status_label.config(text=f"Total Items: {stats['total']} | Gold: {stats['gold']} | Diamond: {stats['diamond']} | Low Stock: {stats['low_stock']}")
+    
+    load_async(status_label, get_item_stats, show_stats, indicator=False)
 
 def get_item_stats():
     total = fetch_query("SELECT COUNT(*) FROM items WHERE is_active = 1")[0][0]
@@ -108,12 +122,17 @@ def sort_column(tree, col, reverse):
     
     tree.heading(col, command=lambda: sort_column(tree, col, not reverse))
 
+def format_item_row(item):
+    return (
+        item[0], item[1], item[2], item[3],
+        f"₹{item[4]:,.2f}" if item[4] else "₹0.00",
+        item[5], f"{item[6]:.3f}" if item[6] else "0.000", 
+        item[7] or "N/A", item[8] or "N/A"
+    )
+
 def refresh_items_list(tree, search_term="", material_filter="All"):
-    if tree is None:
+    if tree is None or not tree.winfo_exists():
         return
-        
-    for item in tree.get_children():
-        tree.delete(item)
     
     query = """
         SELECT i.id, i.name, COALESCE(m.name, 'N/A'), COALESCE(ic.name, 'N/A'), i.price, 
@@ -125,29 +144,19 @@ def refresh_items_list(tree, search_term="", material_filter="All"):
         LEFT JOIN materials m ON i.material_id = m.id
         WHERE i.is_active = 1
     """
-    params = []
     
-    if search_term:
-        query += " AND (i.name LIKE ? OR i.barcode LIKE ? OR ic.name LIKE ?)"
-        search_pattern = f"%{search_term}%"
-        params.extend([search_pattern, search_pattern, search_pattern])
+    if search_term.strip():
+        tree.set_source(lambda after, limit: item_search_cache.fetch_page(material_filter, search_term, query, after, limit, 'i.id'),
+                        (search_term, material_filter), key_of=lambda item: (item[-1], item[0]))
+        return
     
+    params = []
     if material_filter and material_filter != "All":
         query += " AND m.name = ?"
         params.append(material_filter)
     
-    query += " ORDER BY i.name"
-    
-    items = fetch_query(query, tuple(params)) if params else fetch_query(query)
-    
-    for item in items:
-        formatted_item = (
-            item[0], item[1], item[2], item[3],
-            f"₹{item[4]:,.2f}" if item[4] else "₹0.00",
-            item[5], f"{item[6]:.3f}" if item[6] else "0.000", 
-            item[7] or "N/A", item[8] or "N/A"
-        )
-        tree.insert('', 'end', values=formatted_item)
+    tree.set_source(lambda after, limit: fetch_page(query, params, ('i.name', 'i.id'), after, limit),
+                    (search_term, material_filter))
 
 def get_categories():
     categories = fetch_query("SELECT id, name FROM item_categories ORDER BY name")
@@ -1,9 +1,65 @@
 import tkinter as tk
-from tkinter import messagebox, ttk, filedialog
-from database.db import fetch_query
+from tkinter import messagebox, ttk
+from database.db import fetch_query, date_bounds
 from datetime import datetime, timedelta
-import pandas as pd
-import os
+import time
+from utils.background import load_async
+from services.ledger_service import LedgerService
+from utils.export import ExportService, MONEY_FORMAT, WEIGHT_FORMAT
+from config import EXPORT_CHUNK_SIZE
+
+STOCK_REPORT_QUERY = """
+    SELECT i.id, i.name, COALESCE(ic.name, 'Uncategorized') as category, 
+           i.quantity, i.weight_in_gm, i.purity, i.price,
+           (i.quantity * i.price) as total_value
+    FROM items i
+    LEFT JOIN item_categories ic ON i.category_id = ic.id
+    WHERE i.is_active = 1
+    ORDER BY ic.name, i.name
+"""
+
+SALES_REPORT_QUERY = """
+    SELECT b.bill_number, b.bill_date, COALESCE(c.name, 'Walk-in') as customer,
+           b.total_amount, b.discount_amount, b.paid_amount, b.outstanding_amount, b.status
+    FROM bills b
+    LEFT JOIN customers c ON b.customer_id = c.id
+    WHERE b.bill_type = 'Sales' AND b.bill_date >= ? AND b.bill_date < ?
+    ORDER BY b.bill_date DESC
+"""
+
+PURCHASE_REPORT_QUERY = """
+    SELECT b.bill_number, b.bill_date, COALESCE(s.name, 'Unknown') as supplier,
+           b.total_amount, b.discount_amount, b.paid_amount, b.outstanding_amount, b.status
+    FROM bills b
+    LEFT JOIN suppliers s ON b.supplier_id = s.id
+    WHERE b.bill_type = 'Purchase' AND b.bill_date >= ? AND b.bill_date < ?
+    ORDER BY b.bill_date DESC
+"""
+
+CUSTOMER_REPORT_QUERY = """
+    SELECT c.id, c.name, c.phone, c.city, c.credit_limit, c.outstanding_balance,
+           COUNT(b.id) as total_bills,
+           COALESCE(SUM(CASE WHEN b.status != 'Cancelled' THEN b.total_amount ELSE 0 END), 0) as total_business
+    FROM customers c
+    LEFT JOIN bills b ON c.id = b.customer_id
+    GROUP BY c.id
+    ORDER BY total_business DESC
+"""
+
+DAILY_SUMMARY_QUERY = """
+    SELECT summary_date as date,
+           SUM(CASE WHEN bill_type = 'Sales' AND status != 'Cancelled' THEN total_amount ELSE 0 END) as sales,
+           SUM(CASE WHEN bill_type = 'Purchase' AND status != 'Cancelled' THEN total_amount ELSE 0 END) as purchases,
+           SUM(CASE WHEN status != 'Cancelled' THEN
+               CASE bill_type WHEN 'Sales' THEN total_amount WHEN 'Purchase' THEN -total_amount ELSE 0 END
+           ELSE 0 END) as net,
+           SUM(CASE WHEN bill_type = 'Sales' THEN bill_count ELSE 0 END) as sales_count,
+           SUM(CASE WHEN bill_type = 'Purchase' THEN bill_count ELSE 0 END) as purchase_count
+    FROM daily_sales_summary
+    WHERE summary_date >= ? AND summary_date < ?
+    GROUP BY summary_date
+    ORDER BY date DESC
+"""
 
 def reports_page(parent):
     for widget in parent.winfo_children():
@@ -32,6 +88,7 @@ def reports_page(parent):
     button_frame.pack(fill=tk.X, pady=10)
     
     ttk.Button(button_frame, text="Stock Report", command=lambda: show_stock_report(frame, from_date.get(), to_date.get())).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Stock As Of", command=lambda: show_stock_as_of_report(frame, to_date.get())).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Sales Report", command=lambda: show_sales_report(frame, from_date.get(), to_date.get())).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Purchase Report", command=lambda: show_purchase_report(frame, from_date.get(), to_date.get())).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Customer Report", command=lambda: show_customer_report(frame)).pack(side=tk.LEFT, padx=5)
@@ -54,51 +111,97 @@ def show_stock_report(parent, from_date, to_date):
     title = ttk.Label(report_frame, text="Stock Report", font=("Segoe UI", 14, "bold"))
     title.pack(pady=10)
     
-    data = fetch_query("""
-        SELECT i.id, i.name, COALESCE(ic.name, 'Uncategorized') as category, 
-               i.quantity, i.weight_in_gm, i.purity, i.price,
-               (i.quantity * i.price) as total_value
-        FROM items i
-        LEFT JOIN item_categories ic ON i.category_id = ic.id
-        WHERE i.is_active = 1
-        ORDER BY ic.name, i.name
-    """)
-    
-    columns = ('ID', 'Item Name', 'Category', 'Qty', 'Weight(gm)', 'Purity', 'Price', 'Total Value')
-    tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
-    
-    widths = {'ID': 40, 'Item Name': 150, 'Category': 100, 'Qty': 60, 'Weight(gm)': 80, 'Purity': 60, 'Price': 100, 'Total Value': 120}
-    for col in columns:
-        tree.heading(col, text=col)
-        tree.column(col, width=widths.get(col, 100), anchor='center')
-    
-    total_qty = 0
-    total_weight = 0
-    total_value = 0
-    
-    for row in data:
-        tree.insert('', 'end', values=(
-            row[0], row[1], row[2], row[3], f"{row[4]:.2f}",
-            row[5] or 'N/A', f"₹{row[6]:,.2f}", f"₹{row[7]:,.2f}"
-        ))
-        total_qty += row[3] or 0
-        total_weight += row[4] or 0
-        total_value += row[7] or 0
-    
-    scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
-    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    summary = ttk.Frame(report_frame)
-    summary.pack(fill=tk.X, pady=10)
-    
-    ttk.Label(summary, text=f"Total Items: {len(data)} | Total Qty: {total_qty} | Total Weight: {total_weight:.2f}gm | Total Value: ₹{total_value:,.2f}", font=("Segoe UI", 10, "bold")).pack()
-    
-    def export_report():
-        export_to_excel(data, columns, "Stock_Report")
-    
-    ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    def load_report():
+        return fetch_query(STOCK_REPORT_QUERY)
+    
+    def show_report(data):
+        columns = ('ID', 'Item Name', 'Category', 'Qty', 'Weight(gm)', 'Purity', 'Price', 'Total Value')
+        tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
+        
+        widths = {'ID': 40, 'Item Name': 150, 'Category': 100, 'Qty': 60, 'Weight(gm)': 80, 'Purity': 60, 'Price': 100, 'Total Value': 120}
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=widths.get(col, 100), anchor='center')
+        
+        total_qty = 0
+        total_weight = 0
+        total_value = 0
+        
+        for row in data:
+            tree.insert('', 'end', values=(
+                row[0], row[1], row[2], row[3], f"{row[4]:.2f}",
+                row[5] or 'N/A', f"₹{row[6]:,.2f}", f"₹{row[7]:,.2f}"
+            ))
+            total_qty += row[3] or 0
+            total_weight += row[4] or 0
+            total_value += row[7] or 0
+        
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        summary = ttk.Frame(report_frame)
+        summary.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(summary, text=f"Total Items: {len(data)} | Total Qty: {total_qty} | Total Weight: {total_weight:.2f}gm | Total Value: ₹{total_value:,.2f}", font=("Segoe UI", 10, "bold")).pack()
+        
+        def export_report():
+            export_to_excel((STOCK_REPORT_QUERY, ()), columns, "Stock_Report",
+                            {4: WEIGHT_FORMAT, 6: MONEY_FORMAT, 7: MONEY_FORMAT})
+        
+        ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    
+    load_async(report_frame, load_report, show_report)
+
+def show_stock_as_of_report(parent, as_of):
+    clear_report_frame()
+    
+    try:
+        day = datetime.strptime(as_of, '%Y-%m-%d').date()
+    except ValueError:
+        messagebox.showerror("Error", "Enter the 'To' date as YYYY-MM-DD!")
+        return
+    
+    title = ttk.Label(report_frame, text=f"Stock as of {as_of}", font=("Segoe UI", 14, "bold"))
+    title.pack(pady=10)
+    
+    def load_report():
+        items = {row[0]: row for row in fetch_query("""
+            SELECT i.id, i.name, COALESCE(ic.name, 'Uncategorized') FROM items i
+            LEFT JOIN item_categories ic ON i.category_id = ic.id
+        """)}
+        stock = [(item_id, items[item_id][1], items[item_id][2], quantity, weight)
+                 for item_id, quantity, weight in LedgerService.stock_as_of(day) if item_id in items]
+        return sorted(stock, key=lambda row: (row[2], row[1]))
+    
+    def show_report(data):
+        columns = ('ID', 'Item Name', 'Category', 'Qty', 'Weight(gm)')
+        tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
+        
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=150 if col == 'Item Name' else 100, anchor='center')
+        
+        for row in data:
+            tree.insert('', 'end', values=(row[0], row[1], row[2], f"{row[3]:g}", f"{row[4]:.2f}"))
+        
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        summary = ttk.Frame(report_frame)
+        summary.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(summary, text=f"Total Items: {len(data)} | Total Qty: {sum(row[3] for row in data):g} | Total Weight: {sum(row[4] for row in data):.2f}gm", font=("Segoe UI", 10, "bold")).pack()
+        
+        def export_report():
+            export_to_excel(data, columns, f"Stock_As_Of_{as_of}", {4: WEIGHT_FORMAT})
+        
+        ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    
+    load_async(report_frame, load_report, show_report)
 
 def show_sales_report(parent, from_date, to_date):
     clear_report_frame()
@@ -106,50 +209,48 @@ def show_sales_report(parent, from_date, to_date):
     title = ttk.Label(report_frame, text=f"Sales Report ({from_date} to {to_date})", font=("Segoe UI", 14, "bold"))
     title.pack(pady=10)
     
-    data = fetch_query("""
-        SELECT b.bill_number, b.bill_date, COALESCE(c.name, 'Walk-in') as customer,
-               b.total_amount, b.discount_amount, b.paid_amount, b.outstanding_amount, b.status
-        FROM bills b
-        LEFT JOIN customers c ON b.customer_id = c.id
-        WHERE b.bill_type = 'Sales' AND b.bill_date BETWEEN ? AND ?
-        ORDER BY b.bill_date DESC
-    """, (from_date, to_date))
-    
-    columns = ('Bill #', 'Date', 'Customer', 'Amount', 'Discount', 'Paid', 'Outstanding', 'Status')
-    tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
-    
-    for col in columns:
-        tree.heading(col, text=col)
-        tree.column(col, width=100, anchor='center')
-    
-    total_sales = 0
-    total_paid = 0
-    total_outstanding = 0
-    
-    for row in data:
-        tree.insert('', 'end', values=(
-            row[0], row[1], row[2], f"₹{row[3]:,.2f}",
-            f"₹{row[4]:,.2f}", f"₹{row[5]:,.2f}", f"₹{row[6]:,.2f}", row[7]
-        ))
-        if row[7] != 'Cancelled':
-            total_sales += row[3] or 0
-            total_paid += row[5] or 0
-            total_outstanding += row[6] or 0
-    
-    scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
-    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    summary = ttk.Frame(report_frame)
-    summary.pack(fill=tk.X, pady=10)
-    
-    ttk.Label(summary, text=f"Total Bills: {len(data)} | Total Sales: ₹{total_sales:,.2f} | Collected: ₹{total_paid:,.2f} | Outstanding: ₹{total_outstanding:,.2f}", font=("Segoe UI", 10, "bold")).pack()
-    
-    def export_report():
-        export_to_excel(data, columns, "Sales_Report")
-    
-    ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    def load_report():
+        return fetch_query(SALES_REPORT_QUERY, date_bounds(from_date, to_date))
+    
+    def show_report(data):
+        columns = ('Bill #', 'Date', 'Customer', 'Amount', 'Discount', 'Paid', 'Outstanding', 'Status')
+        tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
+        
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=100, anchor='center')
+        
+        total_sales = 0
+        total_paid = 0
+        total_outstanding = 0
+        
+        for row in data:
+            tree.insert('', 'end', values=(
+                row[0], row[1], row[2], f"₹{row[3]:,.2f}",
+                f"₹{row[4]:,.2f}", f"₹{row[5]:,.2f}", f"₹{row[6]:,.2f}", row[7]
+            ))
+            if row[7] != 'Cancelled':
+                total_sales += row[3] or 0
+                total_paid += row[5] or 0
+                total_outstanding += row[6] or 0
+        
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        summary = ttk.Frame(report_frame)
+        summary.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(summary, text=f"Total Bills: {len(data)} | Total Sales: ₹{total_sales:,.2f} | Collected: ₹{total_paid:,.2f} | Outstanding: ₹{total_outstanding:,.2f}", font=("Segoe UI", 10, "bold")).pack()
+        
+        def export_report():
+            export_to_excel((SALES_REPORT_QUERY, date_bounds(from_date, to_date)), columns, "Sales_Report",
+                            dict.fromkeys(range(3, 7), MONEY_FORMAT))
+        
+        ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    
+    load_async(report_frame, load_report, show_report)
 
 def show_purchase_report(parent, from_date, to_date):
     clear_report_frame()
@@ -157,50 +258,48 @@ def show_purchase_report(parent, from_date, to_date):
     title = ttk.Label(report_frame, text=f"Purchase Report ({from_date} to {to_date})", font=("Segoe UI", 14, "bold"))
     title.pack(pady=10)
     
-    data = fetch_query("""
-        SELECT b.bill_number, b.bill_date, COALESCE(s.name, 'Unknown') as supplier,
-               b.total_amount, b.discount_amount, b.paid_amount, b.outstanding_amount, b.status
-        FROM bills b
-        LEFT JOIN suppliers s ON b.supplier_id = s.id
-        WHERE b.bill_type = 'Purchase' AND b.bill_date BETWEEN ? AND ?
-        ORDER BY b.bill_date DESC
-    """, (from_date, to_date))
-    
-    columns = ('Bill #', 'Date', 'Supplier', 'Amount', 'Discount', 'Paid', 'Outstanding', 'Status')
-    tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
-    
-    for col in columns:
-        tree.heading(col, text=col)
-        tree.column(col, width=100, anchor='center')
-    
-    total_purchases = 0
-    total_paid = 0
-    total_outstanding = 0
-    
-    for row in data:
-        tree.insert('', 'end', values=(
-            row[0], row[1], row[2], f"₹{row[3]:,.2f}",
-            f"₹{row[4]:,.2f}", f"₹{row[5]:,.2f}", f"₹{row[6]:,.2f}", row[7]
-        ))
-        if row[7] != 'Cancelled':
-            total_purchases += row[3] or 0
-            total_paid += row[5] or 0
-            total_outstanding += row[6] or 0
-    
-    scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
-    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    summary = ttk.Frame(report_frame)
-    summary.pack(fill=tk.X, pady=10)
-    
-    ttk.Label(summary, text=f"Total Bills: {len(data)} | Total Purchases: ₹{total_purchases:,.2f} | Paid: ₹{total_paid:,.2f} | Payable: ₹{total_outstanding:,.2f}", font=("Segoe UI", 10, "bold")).pack()
-    
-    def export_report():
-        export_to_excel(data, columns, "Purchase_Report")
-    
-    ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    def load_report():
+        return fetch_query(PURCHASE_REPORT_QUERY, date_bounds(from_date, to_date))
+    
+    def show_report(data):
+        columns = ('Bill #', 'Date', 'Supplier', 'Amount', 'Discount', 'Paid', 'Outstanding', 'Status')
+        tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
+        
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=100, anchor='center')
+        
+        total_purchases = 0
+        total_paid = 0
+        total_outstanding = 0
+        
+        for row in data:
+            tree.insert('', 'end', values=(
+                row[0], row[1], row[2], f"₹{row[3]:,.2f}",
+                f"₹{row[4]:,.2f}", f"₹{row[5]:,.2f}", f"₹{row[6]:,.2f}", row[7]
+            ))
+            if row[7] != 'Cancelled':
+                total_purchases += row[3] or 0
+                total_paid += row[5] or 0
+                total_outstanding += row[6] or 0
+        
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        summary = ttk.Frame(report_frame)
+        summary.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(summary, text=f"Total Bills: {len(data)} | Total Purchases: ₹{total_purchases:,.2f} | Paid: ₹{total_paid:,.2f} | Payable: ₹{total_outstanding:,.2f}", font=("Segoe UI", 10, "bold")).pack()
+        
+        def export_report():
+            export_to_excel((PURCHASE_REPORT_QUERY, date_bounds(from_date, to_date)), columns, "Purchase_Report",
+                            dict.fromkeys(range(3, 7), MONEY_FORMAT))
+        
+        ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    
+    load_async(report_frame, load_report, show_report)
 
 def show_customer_report(parent):
     clear_report_frame()
@@ -208,48 +307,45 @@ def show_customer_report(parent):
     title = ttk.Label(report_frame, text="Customer Report", font=("Segoe UI", 14, "bold"))
     title.pack(pady=10)
     
-    data = fetch_query("""
-        SELECT c.id, c.name, c.phone, c.city, c.credit_limit, c.outstanding_balance,
-               COUNT(b.id) as total_bills,
-               COALESCE(SUM(CASE WHEN b.status != 'Cancelled' THEN b.total_amount ELSE 0 END), 0) as total_business
-        FROM customers c
-        LEFT JOIN bills b ON c.id = b.customer_id
-        GROUP BY c.id
-        ORDER BY total_business DESC
-    """)
-    
-    columns = ('ID', 'Name', 'Phone', 'City', 'Credit Limit', 'Outstanding', 'Bills', 'Total Business')
-    tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
-    
-    for col in columns:
-        tree.heading(col, text=col)
-        tree.column(col, width=100, anchor='center')
-    
-    total_outstanding = 0
-    total_business = 0
-    
-    for row in data:
-        tree.insert('', 'end', values=(
-            row[0], row[1], row[2] or 'N/A', row[3] or 'N/A',
-            f"₹{row[4]:,.2f}", f"₹{row[5]:,.2f}", row[6], f"₹{row[7]:,.2f}"
-        ))
-        total_outstanding += row[5] or 0
-        total_business += row[7] or 0
-    
-    scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
-    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    summary = ttk.Frame(report_frame)
-    summary.pack(fill=tk.X, pady=10)
-    
-    ttk.Label(summary, text=f"Total Customers: {len(data)} | Total Outstanding: ₹{total_outstanding:,.2f} | Total Business: ₹{total_business:,.2f}", font=("Segoe UI", 10, "bold")).pack()
+    def load_report():
+        return fetch_query(CUSTOMER_REPORT_QUERY)
     
-    def export_report():
-        export_to_excel(data, columns, "Customer_Report")
+    def show_report(data):
+        columns = ('ID', 'Name', 'Phone', 'City', 'Credit Limit', 'Outstanding', 'Bills', 'Total Business')
+        tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
+        
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=100, anchor='center')
+        
+        total_outstanding = 0
+        total_business = 0
+        
+        for row in data:
+            tree.insert('', 'end', values=(
+                row[0], row[1], row[2] or 'N/A', row[3] or 'N/A',
+                f"₹{row[4]:,.2f}", f"₹{row[5]:,.2f}", row[6], f"₹{row[7]:,.2f}"
+            ))
+            total_outstanding += row[5] or 0
+            total_business += row[7] or 0
+        
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        summary = ttk.Frame(report_frame)
+        summary.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(summary, text=f"Total Customers: {len(data)} | Total Outstanding: ₹{total_outstanding:,.2f} | Total Business: ₹{total_business:,.2f}", font=("Segoe UI", 10, "bold")).pack()
+        
+        def export_report():
+            export_to_excel((CUSTOMER_REPORT_QUERY, ()), columns, "Customer_Report",
+                            {4: MONEY_FORMAT, 5: MONEY_FORMAT, 7: MONEY_FORMAT})
+        
+        ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
     
-    ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    load_async(report_frame, load_report, show_report)
 
 def show_daily_summary(parent, from_date, to_date):
     clear_report_frame()
@@ -257,64 +353,97 @@ def show_daily_summary(parent, from_date, to_date):
     title = ttk.Label(report_frame, text=f"Daily Summary ({from_date} to {to_date})", font=("Segoe UI", 14, "bold"))
     title.pack(pady=10)
     
-    data = fetch_query("""
-        SELECT DATE(bill_date) as date,
-               SUM(CASE WHEN bill_type = 'Sales' AND status != 'Cancelled' THEN total_amount ELSE 0 END) as sales,
-               SUM(CASE WHEN bill_type = 'Purchase' AND status != 'Cancelled' THEN total_amount ELSE 0 END) as purchases,
-               COUNT(CASE WHEN bill_type = 'Sales' THEN 1 END) as sales_count,
-               COUNT(CASE WHEN bill_type = 'Purchase' THEN 1 END) as purchase_count
-        FROM bills
-        WHERE bill_date BETWEEN ? AND ?
-        GROUP BY DATE(bill_date)
-        ORDER BY date DESC
-    """, (from_date, to_date))
-    
-    columns = ('Date', 'Sales', 'Purchases', 'Net', 'Sales Bills', 'Purchase Bills')
-    tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
-    
-    for col in columns:
-        tree.heading(col, text=col)
-        tree.column(col, width=120, anchor='center')
-    
-    total_sales = 0
-    total_purchases = 0
-    
-    for row in data:
-        net = (row[1] or 0) - (row[2] or 0)
-        tree.insert('', 'end', values=(
-            row[0], f"₹{row[1]:,.2f}", f"₹{row[2]:,.2f}",
-            f"₹{net:,.2f}", row[3], row[4]
-        ))
-        total_sales += row[1] or 0
-        total_purchases += row[2] or 0
-    
-    scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
-    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    summary = ttk.Frame(report_frame)
-    summary.pack(fill=tk.X, pady=10)
-    
-    net_total = total_sales - total_purchases
-    ttk.Label(summary, text=f"Total Sales: ₹{total_sales:,.2f} | Total Purchases: ₹{total_purchases:,.2f} | Net: ₹{net_total:,.2f}", font=("Segoe UI", 10, "bold")).pack()
-    
-    def export_report():
-        export_to_excel(data, columns, "Daily_Summary")
-    
-    ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
-
-def export_to_excel(data, columns, filename):
-    try:
-        exports_dir = "exports"
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
+    def load_report():
+        return fetch_query(DAILY_SUMMARY_QUERY, date_bounds(from_date, to_date))
+    
+    def show_report(data):
+        columns = ('Date', 'Sales', 'Purchases', 'Net', 'Sales Bills', 'Purchase Bills')
+        tree = ttk.Treeview(report_frame, columns=columns, height=15, show='headings')
+        
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=120, anchor='center')
+        
+        total_sales = 0
+        total_purchases = 0
+        
+        for row in data:
+            tree.insert('', 'end', values=(
+                row[0], f"₹{row[1]:,.2f}", f"₹{row[2]:,.2f}",
+                f"₹{row[3]:,.2f}", row[4], row[5]
+            ))
+            total_sales += row[1] or 0
+            total_purchases += row[2] or 0
         
-        filepath = os.path.join(exports_dir, f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        df = pd.DataFrame(data, columns=columns)
-        df.to_excel(filepath, index=False)
+        summary = ttk.Frame(report_frame)
+        summary.pack(fill=tk.X, pady=10)
         
-        messagebox.showinfo("Success", f"Report exported successfully!\n\nFile: {filepath}")
-    except Exception as e:
-        messagebox.showerror("Error", f"Error exporting report: {str(e)}")
+        net_total = total_sales - total_purchases
+        ttk.Label(summary, text=f"Total Sales: ₹{total_sales:,.2f} | Total Purchases: ₹{total_purchases:,.2f} | Net: ₹{net_total:,.2f}", font=("Segoe UI", 10, "bold")).pack()
+        
+        def export_report():
+            export_to_excel((DAILY_SUMMARY_QUERY, date_bounds(from_date, to_date)), columns, "Daily_Summary",
+                            dict.fromkeys(range(1, 4), MONEY_FORMAT))
+        
+        ttk.Button(summary, text="Export to Excel", command=export_report).pack(pady=5)
+    
+    load_async(report_frame, load_report, show_report)
+
+def export_to_excel(source, columns, filename, number_formats=None):
+    """Write a report to exports/ on a worker thread behind a progress dialog.
+    
+    source is (query, params), streamed from the database a chunk at a time, or the
+    rows already on screen.
+    """
+    dialog = tk.Toplevel(report_frame)
+    dialog.title("Exporting")
+    dialog.transient(report_frame.winfo_toplevel())
+    
+    status = tk.StringVar(value="Preparing export...")
+    ttk.Label(dialog, textvariable=status, width=40).pack(padx=20, pady=(15, 5))
+    bar = ttk.Progressbar(dialog, length=300, mode='determinate', maximum=100)
+    bar.pack(padx=20, pady=(0, 15))
+    
+    state = {'done': 0, 'total': None}
+    
+    def progress(done, total):
+        state['done'] = done
+        state['total'] = total
+    
+    def show_progress():
+        if not dialog.winfo_exists():
+            return
+        done, total = state['done'], state['total']
+        if total:
+            bar['value'] = done * 100 / total
+            status.set(f"Exported {done:,} of {total:,} rows")
+        elif done:
+            status.set(f"Exported {done:,} rows")
+        dialog.after(200, show_progress)
+    
+    def export():
+        if isinstance(source, tuple):
+            query, params = source
+            return ExportService.stream_to_excel(query, params, columns, filename, number_formats, progress)
+        filepath = ExportService.export_path(filename, 'xlsx')
+        started = time.perf_counter()
+        chunks = (source[start:start + EXPORT_CHUNK_SIZE] for start in range(0, len(source), EXPORT_CHUNK_SIZE))
+        rows = ExportService.write_excel(chunks, columns, filepath, number_formats, progress, len(source))
+        return ExportService.export_stats(filepath, rows, time.perf_counter() - started)
+    
+    def done(stats):
+        dialog.destroy()
+        messagebox.showinfo("Success", f"Report exported successfully!\n\nRows: {stats['rows']:,} "
+                            f"({stats['rows_per_second']:,.0f} rows/sec)\nFile: {stats['path']}")
+    
+    def failed(error):
+        dialog.destroy()
+        messagebox.showerror("Error", f"Error exporting report: {str(error)}")
+    
+    show_progress()
+    load_async(dialog, export, done, on_error=failed, key='report-export', indicator=False)
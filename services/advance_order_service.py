@@ -1,4 +1,4 @@
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import execute_query, fetch_query, fetch_one, iso_date
 from datetime import datetime, date
 import uuid
 
@@ -25,8 +25,8 @@ class AdvanceOrderService:
                                        specifications, design_notes, status, priority,
                                        assigned_artisan, remarks, date_created, date_modified)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (order_number, customer_id, employee_id, date.today(),
-              expected_delivery_date, order_type, material_type,
+        """, (order_number, customer_id, employee_id, date.today().isoformat(),
+              iso_date(expected_delivery_date) if expected_delivery_date else None, order_type, material_type,
               estimated_weight, estimated_amount, advance_amount,
               balance_amount, gold_rate_locked, diamond_rate_locked,
               specifications, design_notes, 'Pending', priority,
@@ -66,6 +66,8 @@ class AdvanceOrderService:
         values = []
         for field, value in kwargs.items():
             if field in allowed_fields:
+                if field == 'expected_delivery_date' and value:
+                    value = iso_date(value)
                 updates.append(f"{field} = ?")
                 values.append(value)
         
@@ -0,0 +1,130 @@
+from database.db import transaction, iso_date
+from services.stock_service import StockService
+from datetime import datetime
+import uuid
+
+class BillPostingService:
+    @staticmethod
+    def generate_bill_number(bill_type):
+        prefix = 'SB' if bill_type == 'Sales' else 'PB'
+        return f"{prefix}-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+    
+    @staticmethod
+    def calculate_totals(items, discount=0, tax_percent=0, making=0, paid=0):
+        subtotal = sum(item['line_total'] for item in items)
+        total_weight = sum(item.get('weight', 0) for item in items)
+        after_discount = subtotal - discount + making
+        tax_amount = after_discount * (tax_percent / 100)
+        total = after_discount + tax_amount
+        outstanding = total - paid
+        
+        return {
+            'subtotal': subtotal,
+            'total_weight': total_weight,
+            'tax_amount': tax_amount,
+            'total': total,
+            'outstanding': outstanding,
+            'status': 'Completed' if outstanding <= 0 else 'Pending'
+        }
+    
+    @staticmethod
+    def post_bill(bill_type, party_id, employee_id, bill_date, items, discount=0, tax_percent=0,
+                  making=0, paid=0, payment_mode='Cash', remarks=None):
+        """Post header, lines, stock changes and customer balance in one transaction"""
+        totals = BillPostingService.calculate_totals(items, discount, tax_percent, making, paid)
+        bill_number = BillPostingService.generate_bill_number(bill_type)
+        party_column = 'customer_id' if bill_type == 'Sales' else 'supplier_id'
+        stock_sign = -1 if bill_type == 'Sales' else 1
+        movement_type = 'SALE' if bill_type == 'Sales' else 'PURCHASE'
+        bill_date = iso_date(bill_date)
+        now = datetime.now()
+        
+        with transaction() as cursor:
+            cursor.execute(f"""
+                INSERT INTO bills (bill_number, bill_type, {party_column}, employee_id, bill_date,
+                                  total_amount, total_weight, discount_amount, tax_amount,
+                                  making_charges, paid_amount, outstanding_amount, payment_mode,
+                                  status, remarks, date_created, date_modified)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                bill_number, bill_type, party_id, employee_id, bill_date, totals['total'],
+                totals['total_weight'], discount, totals['tax_amount'], making, paid,
+                totals['outstanding'], payment_mode, totals['status'], remarks, now, now
+            ))
+            bill_id = cursor.lastrowid
+            
+            cursor.executemany("""
+                INSERT INTO bill_items (bill_id, item_id, quantity, unit_price, line_total, weight_in_gm)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(bill_id, item['item_id'], item['quantity'], item['unit_price'],
+                   item['line_total'], item.get('weight', 0)) for item in items])
+            
+            for item in items:
+                StockService.record_bill_movement(cursor, item['item_id'], movement_type, stock_sign * item['quantity'],
+                                                  stock_sign * item.get('weight', 0), bill_id, bill_number,
+                                                  f"{bill_type} bill")
+            
+            if party_id and bill_type == 'Sales' and totals['outstanding'] > 0:
+                cursor.execute("""
+                    UPDATE customers SET outstanding_balance = outstanding_balance + ?, date_modified = ?
+                    WHERE id = ?
+                """, (totals['outstanding'], now, party_id))
+        
+        return {'bill_id': bill_id, 'bill_number': bill_number, **totals}
+    
+    @staticmethod
+    def record_payment(bill_id, amount, payment_mode='Cash'):
+        """Apply a payment to a bill and log the receipt in one transaction; returns the new outstanding"""
+        now = datetime.now()
+        with transaction() as cursor:
+            bill = cursor.execute("""
+                SELECT bill_number, outstanding_amount, status FROM bills WHERE id = ?
+            """, (bill_id,)).fetchone()
+            if bill is None:
+                raise ValueError(f"Bill {bill_id} not found")
+            if bill['status'] == 'Cancelled':
+                raise ValueError(f"Bill {bill['bill_number']} is cancelled")
+            outstanding = (bill['outstanding_amount'] or 0) - amount
+            cursor.execute("""
+                UPDATE bills SET paid_amount = paid_amount + ?, outstanding_amount = ?,
+                                 status = ?, date_modified = ? WHERE id = ?
+            """, (amount, max(0, outstanding), 'Completed' if outstanding <= 0 else 'Pending', now, bill_id))
+            
+            cursor.execute("""
+                INSERT INTO payments (payment_type, payment_date, amount, payment_mode,
+                                     reference_type, reference_id, description, date_created)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, ('Receipt', now.date().isoformat(), amount, payment_mode, 'Bill', bill_id,
+                  f"Payment for {bill['bill_number']}", now))
+        return max(0, outstanding)
+    
+    @staticmethod
+    def cancel_bill(bill_id):
+        """Reverse a bill's stock movements and customer balance and mark it Cancelled"""
+        with transaction() as cursor:
+            bill = cursor.execute("""
+                SELECT bill_number, bill_type, customer_id, outstanding_amount, status FROM bills WHERE id = ?
+            """, (bill_id,)).fetchone()
+            if bill is None:
+                raise ValueError(f"Bill {bill_id} not found")
+            if bill['status'] == 'Cancelled':
+                raise ValueError(f"Bill {bill['bill_number']} is already cancelled")
+            items = cursor.execute("""
+                SELECT item_id, quantity, COALESCE(weight_in_gm, 0) FROM bill_items WHERE bill_id = ?
+            """, (bill_id,)).fetchall()
+            
+            for item in items:
+                if bill['bill_type'] == 'Sales':
+                    StockService.record_bill_movement(cursor, item[0], 'SALE_CANCEL', item[1], item[2], bill_id,
+                                                      bill['bill_number'], "Bill cancelled")
+                else:
+                    StockService.record_bill_movement(cursor, item[0], 'PURCHASE_CANCEL', -item[1], -item[2], bill_id,
+                                                      bill['bill_number'], "Bill cancelled")
+            
+            if bill['customer_id'] and bill['bill_type'] == 'Sales':
+                cursor.execute("""
+                    UPDATE customers SET outstanding_balance = outstanding_balance - ?, date_modified = ?
+                    WHERE id = ?
+                """, (bill['outstanding_amount'] or 0, datetime.now(), bill['customer_id']))
+            
+            cursor.execute("UPDATE bills SET status = 'Cancelled', date_modified = ? WHERE id = ?", (datetime.now(), bill_id))
@@ -0,0 +1,189 @@
+from database.db import fetch_query, fetch_one, execute_query, register_change_listener
+from services.search_service import search_words
+from bisect import bisect_left
+import heapq
+import threading
+
+class Catalog:
+    """Shared in-memory copy of a table for type-ahead pickers, loaded once and kept
+    current from the catalog_changes log.
+    
+    query selects the rows with the id first and must end in a WHERE clause;
+    make_record(row) turns a row into a dict with at least 'id' and 'label', and
+    index_text(record) gives the text whose words are prefix-searchable.
+    """
+    
+    def __init__(self, table, query, id_column, make_record, index_text, key_field=None,
+                 reload_tables=(), max_matches=50):
+        self.table = table
+        self.query = query
+        self.id_column = id_column
+        self.make_record = make_record
+        self.index_text = index_text
+        self.key_field = key_field
+        self.max_matches = max_matches
+        self._records = None
+        self._postings = {}
+        self._words = []
+        self._record_words = {}
+        self._by_key = {}
+        self._watermark = 0
+        self._dirty = True
+        self._lock = threading.RLock()
+        register_change_listener(self._mark_dirty, {table})
+        if reload_tables:
+            register_change_listener(self.invalidate, set(reload_tables))
+    
+    def _mark_dirty(self, tables=None):
+        self._dirty = True
+    
+    def invalidate(self, tables=None):
+        """Drop everything; the next lookup reloads the whole table"""
+        with self._lock:
+            self._records = None
+            self._dirty = True
+    
+    def ensure_current(self):
+        if self._dirty or self._records is None:
+            self.refresh()
+    
+    def refresh(self):
+        """Load the table on first use, then apply only the rows changed since"""
+        with self._lock:
+            self._dirty = False
+            if self._records is None:
+                self._load_all()
+                return
+            
+            changes = fetch_query("""
+                SELECT seq, row_id FROM catalog_changes WHERE table_name = ? AND seq > ? ORDER BY seq
+            """, (self.table, self._watermark))
+            if not changes:
+                return
+            changed_ids = list({row_id for seq, row_id in changes})
+            rows = {}
+            for offset in range(0, len(changed_ids), 500):
+                chunk = changed_ids[offset:offset + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                for row in fetch_query(f"{self.query} AND {self.id_column} IN ({placeholders})", chunk):
+                    rows[row[0]] = row
+            for record_id in changed_ids:
+                self._remove(record_id)
+                if record_id in rows:
+                    self._add(self.make_record(rows[record_id]))
+            self._watermark = changes[-1][0]
+            self._prune()
+    
+    def _load_all(self):
+        self._watermark = fetch_one("SELECT COALESCE(MAX(seq), 0) FROM catalog_changes")[0]
+        self._records = {}
+        self._record_words = {}
+        self._by_key = {}
+        self._postings = {}
+        for row in fetch_query(self.query):
+            record = self.make_record(row)
+            record_words = set(search_words(self.index_text(record)))
+            self._store(record, record_words)
+            for word in record_words:
+                self._postings.setdefault(word, set()).add(record['id'])
+        self._words = sorted(self._postings)
+        self._prune()
+    
+    def _prune(self):
+        execute_query("DELETE FROM catalog_changes WHERE table_name = ? AND seq <= ?",
+                      (self.table, self._watermark))
+    
+    def _store(self, record, record_words):
+        self._records[record['id']] = record
+        self._record_words[record['id']] = record_words
+        if self.key_field and record.get(self.key_field):
+            self._by_key[record[self.key_field]] = record
+    
+    def _add(self, record):
+        record_words = set(search_words(self.index_text(record)))
+        self._store(record, record_words)
+        for word in record_words:
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                self._words.insert(bisect_left(self._words, word), word)
+            ids.add(record['id'])
+    
+    def _remove(self, record_id):
+        record = self._records.pop(record_id, None)
+        if record is None:
+            return
+        if self.key_field and self._by_key.get(record.get(self.key_field)) is record:
+            del self._by_key[record[self.key_field]]
+        for word in self._record_words.pop(record_id):
+            ids = self._postings[word]
+            ids.discard(record_id)
+            if not ids:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+    
+    def get(self, record_id):
+        self.ensure_current()
+        with self._lock:
+            return self._records.get(record_id)
+    
+    def by_key(self, value):
+        """Exact lookup on key_field, e.g. an item's barcode"""
+        self.ensure_current()
+        with self._lock:
+            return self._by_key.get(value)
+    
+    def search(self, text, limit=None):
+        """Records where every word of text starts some indexed word, ordered by label"""
+        tokens = search_words(text)
+        if not tokens:
+            return []
+        self.ensure_current()
+        
+        with self._lock:
+            candidates = None
+            for token in sorted(set(tokens), key=len, reverse=True):
+                ids = set()
+                position = bisect_left(self._words, token)
+                while position < len(self._words) and self._words[position].startswith(token):
+                    ids.update(self._postings[self._words[position]])
+                    position += 1
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            return heapq.nsmallest(limit or self.max_matches, (self._records[record_id] for record_id in candidates),
+                                   key=lambda record: record['label'])
+    
+    def find_label(self, label):
+        """The record whose label is exactly label, e.g. text typed into a picker"""
+        self.ensure_current()
+        with self._lock:
+            return next((record for record in self._records.values() if record['label'] == label), None)
+
+
+def item_label(name, material, price):
+    return f"{name} [{material}] ({price:,.0f})"
+
+def customer_label(name, phone):
+    return f"{name} ({phone or 'No Phone'})"
+
+
+item_catalog = Catalog('items', """
+    SELECT i.id, i.name, i.price, i.quantity, COALESCE(m.name, 'N/A'), i.weight_in_gm, i.barcode
+    FROM items i
+    LEFT JOIN materials m ON i.material_id = m.id
+    WHERE i.is_active = 1
+""", 'i.id', lambda row: {
+    'id': row[0], 'name': row[1], 'price': row[2], 'stock': row[3], 'material': row[4],
+    'weight': row[5], 'barcode': row[6], 'label': item_label(row[1], row[4], row[2] or 0),
+}, lambda item: f"{item['name']} {item['barcode'] or ''}", key_field='barcode', reload_tables=('materials',))
+
+customer_catalog = Catalog('customers', """
+    SELECT id, name, phone FROM customers WHERE 1=1
+""", 'id', lambda row: {
+    'id': row[0], 'name': row[1], 'phone': row[2], 'label': customer_label(row[1], row[2]),
+}, lambda customer: f"{customer['name']} {customer['phone'] or ''}")
+
+def warm_catalogs():
+    item_catalog.ensure_current()
+    customer_catalog.ensure_current()
@@ -0,0 +1,133 @@
+from database.db import fetch_query, fetch_one, register_change_listener
+from datetime import date, timedelta
+from services.gold_rate_service import GoldRateService
+from services.revaluation_service import RevaluationEngine
+from services.sales_service import SalesService
+from config import DASHBOARD_CACHE_TTL
+import threading
+import time
+
+class DashboardSnapshot:
+    CHART_DAYS = 7
+    WATCHED_TABLES = {'bills', 'items', 'materials', 'gold_rates', 'metal_rates', 'diamond_rates', 'customers',
+                      'employees', 'suppliers', 'advance_orders'}
+    
+    _lock = threading.Lock()
+    _snapshot = None
+    _expires_at = 0
+    _generation = 0
+    
+    @classmethod
+    def get(cls, force=False):
+        """Return the cached snapshot, recomputing it when stale, invalidated or from another day"""
+        today = date.today()
+        with cls._lock:
+            snapshot = cls._snapshot
+            generation = cls._generation
+            if (not force and snapshot is not None and snapshot['date'] == today
+                    and time.monotonic() < cls._expires_at):
+                return snapshot
+        
+        snapshot = cls.compute(today)
+        with cls._lock:
+            if cls._generation == generation:
+                cls._snapshot = snapshot
+                cls._expires_at = time.monotonic() + DASHBOARD_CACHE_TTL
+        return snapshot
+    
+    @classmethod
+    def invalidate(cls, tables=None):
+        with cls._lock:
+            cls._snapshot = None
+            cls._generation += 1
+    
+    @staticmethod
+    def compute(today=None):
+        if today is None:
+            today = date.today()
+        first_day = today - timedelta(days=DashboardSnapshot.CHART_DAYS - 1)
+        
+        gold_rate = GoldRateService.get_current_rate('22K')
+        counts = fetch_one("""
+            SELECT (SELECT COUNT(*) FROM customers),
+                   (SELECT COUNT(*) FROM items WHERE is_active = 1),
+                   (SELECT COUNT(*) FROM employees WHERE status = 'Active'),
+                   (SELECT COUNT(*) FROM suppliers),
+                   (SELECT COUNT(*) FROM advance_orders WHERE status IN ('Pending', 'In Progress')),
+                   (SELECT COUNT(*) FROM advance_orders
+                    WHERE status IN ('Pending', 'In Progress') AND expected_delivery_date < ?)
+        """, (today,))
+        
+        grouped = fetch_query("""
+            SELECT COALESCE(m.name, 'Other'),
+                   COALESCE(SUM(i.quantity * i.price), 0),
+                   COALESCE(SUM(i.weight_in_gm), 0),
+                   COALESCE(SUM(i.diamond_carat), 0)
+            FROM items i
+            LEFT JOIN materials m ON i.material_id = m.id
+            WHERE i.is_active = 1
+            GROUP BY m.name
+        """)
+        
+        days = {}
+        for day, totals in SalesService.daily_totals(first_day, today).items():
+            days[day] = (float(totals.get('Sales', (0, 0))[0]), float(totals.get('Purchase', (0, 0))[0]))
+        
+        materials = []
+        market_values = RevaluationEngine.get()['by_material']
+        for name, book_value, weight, carat in grouped:
+            market_value = market_values.get(name, (book_value,))[0]
+            materials.append((name, float(market_value), float(weight), float(carat)))
+        materials.sort(key=lambda row: row[1], reverse=True)
+        
+        chart_dates = [first_day + timedelta(days=i) for i in range(DashboardSnapshot.CHART_DAYS)]
+        daily_sales = [days.get(d.isoformat(), (0, 0))[0] for d in chart_dates]
+        daily_purchases = [days.get(d.isoformat(), (0, 0))[1] for d in chart_dates]
+        by_material = {row[0]: row for row in materials}
+        gold = by_material.get('Gold', ('Gold', 0, 0, 0))
+        diamond = by_material.get('Diamond', ('Diamond', 0, 0, 0))
+        
+        recent_sales = fetch_query("""
+            SELECT b.bill_number, COALESCE(c.name, 'Walk-in'), b.total_amount, b.bill_date
+            FROM bills b
+            LEFT JOIN customers c ON b.customer_id = c.id
+            WHERE b.bill_type = 'Sales'
+            ORDER BY b.id DESC
+            LIMIT 5
+        """)
+        
+        pending_orders = fetch_query("""
+            SELECT ao.order_number, c.name, ao.material_type, ao.expected_delivery_date
+            FROM advance_orders ao
+            JOIN customers c ON ao.customer_id = c.id
+            WHERE ao.status IN ('Pending', 'In Progress')
+            ORDER BY ao.expected_delivery_date ASC
+            LIMIT 5
+        """)
+        
+        return {
+            'date': today,
+            'total_customers': counts[0],
+            'total_items': counts[1],
+            'total_employees': counts[2],
+            'total_suppliers': counts[3],
+            'gold_rate_22k': gold_rate['rate_per_gram'] if gold_rate else 0,
+            'pending_orders': counts[4],
+            'overdue_orders': counts[5],
+            'today_sales': daily_sales[-1],
+            'today_purchases': daily_purchases[-1],
+            'total_stock_value': sum(row[1] for row in materials),
+            'gold_value': gold[1],
+            'gold_weight': gold[2],
+            'diamond_value': diamond[1],
+            'diamond_carat': diamond[3],
+            'material_values': [(row[0], row[1]) for row in materials],
+            'chart_dates': chart_dates,
+            'daily_sales': daily_sales,
+            'daily_purchases': daily_purchases,
+            'recent_sales': [tuple(row) for row in recent_sales],
+            'pending_order_list': [tuple(row) for row in pending_orders],
+        }
+
+
+register_change_listener(DashboardSnapshot.invalidate, DashboardSnapshot.WATCHED_TABLES)
@@ -1,98 +1,123 @@
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import execute_query, fetch_query, fetch_one, register_change_listener, iso_date
 from datetime import datetime, date
+from bisect import bisect_right
+import threading
 
 class GoldRateService:
+    """Rates per gram for every metal, all kept in metal_rates; gold_rates is a view of the Gold rows"""
+    
     PURITIES = ['24K', '22K', '21K', '18K', '14K', '916', '875', '750', '585']
+    METAL_PURITIES = {
+        'Gold': PURITIES,
+        'Silver': ['999', '925', '900', '800'],
+        'Platinum': ['999', '950', '900', '850'],
+    }
     
-    @staticmethod
-    def get_current_rate(purity='22K'):
-        result = fetch_one("""
-            SELECT rate_per_gram, making_charges, rate_date
-            FROM gold_rates
-            WHERE purity = ? AND is_active = 1
-            ORDER BY rate_date DESC
-            LIMIT 1
-        """, (purity,))
+    _lock = threading.Lock()
+    _rates = None
+    
+    @classmethod
+    def current_rates(cls):
+        """{(material, purity): rate} holding the latest active rate of each.
         
-        if result:
-            return {
-                'rate_per_gram': result[0],
-                'making_charges': result[1],
-                'rate_date': result[2]
-            }
-        return None
+        Loaded once and replaced as a whole whenever a rate table changes, so readers
+        never see a half-built map.
+        """
+        rates = cls._rates
+        if rates is None:
+            rates = cls.refresh_rates()
+        return rates
+    
+    @classmethod
+    def refresh_rates(cls):
+        with cls._lock:
+            rates = {}
+            for material, purity, rate_per_gram, making_charges, rate_date in fetch_query("""
+                SELECT m.name, mr.purity, mr.rate_per_gram, mr.making_charges, mr.rate_date
+                FROM metal_rates mr
+                JOIN materials m ON mr.material_id = m.id
+                WHERE mr.is_active = 1
+                ORDER BY mr.rate_date, mr.id
+            """):
+                rates[(material, purity)] = {
+                    'material': material,
+                    'purity': purity,
+                    'rate_per_gram': rate_per_gram,
+                    'making_charges': making_charges,
+                    'rate_date': rate_date
+                }
+            cls._rates = rates
+        return rates
+    
+    @classmethod
+    def invalidate(cls, tables=None):
+        with cls._lock:
+            cls._rates = None
     
     @staticmethod
-    def get_all_current_rates():
-        rates = fetch_query("""
-            SELECT gr1.purity, gr1.rate_per_gram, gr1.making_charges, gr1.rate_date
-            FROM gold_rates gr1
-            INNER JOIN (
-                SELECT purity, MAX(rate_date) as max_date
-                FROM gold_rates
-                WHERE is_active = 1
-                GROUP BY purity
-            ) gr2 ON gr1.purity = gr2.purity AND gr1.rate_date = gr2.max_date
-            WHERE gr1.is_active = 1
-            ORDER BY gr1.purity
-        """)
-        
-        return [{'purity': r[0], 'rate_per_gram': r[1], 'making_charges': r[2], 'rate_date': r[3]} for r in rates]
+    def get_current_rate(purity='22K', material='Gold'):
+        return GoldRateService.current_rates().get((material, purity))
     
     @staticmethod
-    def update_rate(purity, rate_per_gram, making_charges=0, notes="", rate_date=None):
-        if rate_date is None:
-            rate_date = date.today()
-        
-        existing = fetch_one("""
-            SELECT id FROM gold_rates 
-            WHERE rate_date = ? AND purity = ?
-        """, (rate_date, purity))
+    def get_all_current_rates(material='Gold'):
+        rates = GoldRateService.current_rates()
+        return [rates[key] for key in sorted(rates) if key[0] == material]
+    
+    @staticmethod
+    def material_id(material):
+        row = fetch_one("SELECT id FROM materials WHERE name = ?", (material,))
+        if not row:
+            raise ValueError(f"Unknown material '{material}'")
+        return row[0]
+    
+    @staticmethod
+    def update_rate(purity, rate_per_gram, making_charges=0, notes="", rate_date=None, material='Gold'):
+        rate_date = iso_date(date.today() if rate_date is None else rate_date)
         
-        if existing:
-            execute_query("""
-                UPDATE gold_rates 
-                SET rate_per_gram = ?, making_charges = ?, notes = ?, date_modified = ?
-                WHERE rate_date = ? AND purity = ?
-            """, (rate_per_gram, making_charges, notes, datetime.now(), rate_date, purity))
-        else:
-            execute_query("""
-                INSERT INTO gold_rates (rate_date, purity, rate_per_gram, making_charges, notes, date_created, date_modified)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (rate_date, purity, rate_per_gram, making_charges, notes, datetime.now(), datetime.now()))
+        execute_query("""
+            INSERT INTO metal_rates (material_id, rate_date, purity, rate_per_gram, making_charges, notes,
+                                     date_created, date_modified)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (material_id, rate_date, purity) DO UPDATE SET
+                rate_per_gram = excluded.rate_per_gram, making_charges = excluded.making_charges,
+                notes = excluded.notes, is_active = 1, date_modified = excluded.date_modified
+        """, (GoldRateService.material_id(material), rate_date, purity, rate_per_gram, making_charges, notes,
+              datetime.now(), datetime.now()))
         
+        GoldRateService.refresh_rates()
         return True
     
     @staticmethod
-    def get_rate_history(purity=None, limit=30):
+    def get_rate_history(purity=None, limit=30, material='Gold'):
         if purity:
             return fetch_query("""
                 SELECT id, rate_date, purity, rate_per_gram, making_charges, notes
-                FROM gold_rates
-                WHERE purity = ? AND is_active = 1
+                FROM metal_rates
+                WHERE material_id = (SELECT id FROM materials WHERE name = ?) AND purity = ? AND is_active = 1
                 ORDER BY rate_date DESC
                 LIMIT ?
-            """, (purity, limit))
+            """, (material, purity, limit))
         else:
             return fetch_query("""
                 SELECT id, rate_date, purity, rate_per_gram, making_charges, notes
-                FROM gold_rates
-                WHERE is_active = 1
+                FROM metal_rates
+                WHERE material_id = (SELECT id FROM materials WHERE name = ?) AND is_active = 1
                 ORDER BY rate_date DESC, purity
                 LIMIT ?
-            """, (limit,))
+            """, (material, limit))
     
     @staticmethod
     def delete_rate(rate_id):
         execute_query("""
-            UPDATE gold_rates SET is_active = 0, date_modified = ?
+            UPDATE metal_rates SET is_active = 0, date_modified = ?
             WHERE id = ?
         """, (datetime.now(), rate_id))
+        GoldRateService.refresh_rates()
         return True
     
     @staticmethod
-    def calculate_item_value(weight_gm, purity='22K', include_making=True):
-        rate_info = GoldRateService.get_current_rate(purity)
+    def calculate_item_value(weight_gm, purity='22K', include_making=True, material='Gold'):
+        rate_info = GoldRateService.get_current_rate(purity, material)
         if not rate_info:
             return None
         
@@ -102,6 +127,8 @@ class GoldRateService:
             return base_value + making
         return base_value
 
+register_change_listener(GoldRateService.invalidate, {'gold_rates', 'metal_rates', 'materials'})
+
 
 class DiamondRateService:
     CLARITIES = ['FL', 'IF', 'VVS1', 'VVS2', 'VS1', 'VS2', 'SI1', 'SI2', 'I1', 'I2', 'I3']
@@ -109,16 +136,18 @@ class DiamondRateService:
     CUTS = ['Excellent', 'Very Good', 'Good', 'Fair', 'Poor']
     SHAPES = ['Round', 'Princess', 'Cushion', 'Oval', 'Emerald', 'Pear', 'Marquise', 'Radiant', 'Heart', 'Asscher']
     
+    _lock = threading.Lock()
+    _matrix = None
+    
     @staticmethod
     def update_rate(clarity, color, rate_per_carat, carat_from=0, carat_to=10, 
                    shape='Round', certification=None, notes="", rate_date=None):
-        if rate_date is None:
-            rate_date = date.today()
+        rate_date = iso_date(date.today() if rate_date is None else rate_date)
         
         existing = fetch_one("""
             SELECT id FROM diamond_rates 
-            WHERE clarity = ? AND color = ? AND shape = ? AND rate_date = ?
-        """, (clarity, color, shape, rate_date))
+            WHERE clarity = ? AND color = ? AND shape = ? AND rate_date = ? AND carat_from = ? AND carat_to = ?
+        """, (clarity, color, shape, rate_date, carat_from, carat_to))
         
         if existing:
             execute_query("""
@@ -134,34 +163,106 @@ class DiamondRateService:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (rate_date, shape, clarity, color, carat_from, carat_to, 
                   rate_per_carat, certification, notes, datetime.now(), datetime.now()))
+        DiamondRateService.refresh_matrix()
         return True
     
-    @staticmethod
-    def get_current_rate(clarity='VS1', color='G', shape='Round'):
-        result = fetch_one("""
-            SELECT id, rate_date, shape, clarity, color, carat_from, carat_to, 
-                   rate_per_carat, certification, notes
-            FROM diamond_rates
-            WHERE clarity = ? AND color = ? AND shape = ? AND is_active = 1
-            ORDER BY rate_date DESC
-            LIMIT 1
-        """, (clarity, color, shape))
+    @classmethod
+    def rate_matrix(cls):
+        """{(shape, clarity, color): band} built from the active rates, replaced as a whole on change.
         
-        if result:
-            return {
-                'id': result[0],
-                'rate_date': result[1],
-                'shape': result[2],
-                'clarity': result[3],
-                'color': result[4],
-                'carat_from': result[5],
-                'carat_to': result[6],
-                'rate_per_carat': result[7],
-                'certification': result[8],
-                'notes': result[9]
-            }
+        A band is (starts, ends, rates, latest): disjoint carat ranges sorted by start,
+        each priced by the most recent rate covering it, plus the most recent rate overall.
+        """
+        matrix = cls._matrix
+        if matrix is None:
+            matrix = cls.refresh_matrix()
+        return matrix
+    
+    @classmethod
+    def refresh_matrix(cls):
+        with cls._lock:
+            rates = {}
+            for row in fetch_query("""
+                SELECT id, rate_date, shape, clarity, color, carat_from, carat_to,
+                       rate_per_carat, certification, notes
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY shape, clarity, color, carat_from, carat_to
+                        ORDER BY rate_date DESC, id DESC) AS recency
+                    FROM (
+                        SELECT id, rate_date, shape, clarity, color, COALESCE(carat_from, 0) AS carat_from,
+                               COALESCE(carat_to, 10) AS carat_to, rate_per_carat, certification, notes
+                        FROM diamond_rates
+                        WHERE is_active = 1
+                    )
+                )
+                WHERE recency = 1
+                ORDER BY rate_date, id
+            """):
+                rate = DiamondRateService._rate_record(row)
+                rates.setdefault((rate['shape'], rate['clarity'], rate['color']), []).append(rate)
+            matrix = {key: DiamondRateService._bands(key_rates) for key, key_rates in rates.items()}
+            cls._matrix = matrix
+        return matrix
+    
+    @classmethod
+    def invalidate(cls, tables=None):
+        with cls._lock:
+            cls._matrix = None
+    
+    @staticmethod
+    def _rate_record(row):
+        return {
+            'id': row[0],
+            'rate_date': row[1],
+            'shape': row[2],
+            'clarity': row[3],
+            'color': row[4],
+            'carat_from': row[5],
+            'carat_to': row[6],
+            'rate_per_carat': row[7],
+            'certification': row[8],
+            'notes': row[9]
+        }
+    
+    @staticmethod
+    def _bands(rates):
+        """Cut overlapping carat ranges (rates oldest first) into disjoint ones, each priced by the newest rate covering it"""
+        edges = sorted({rate['carat_from'] for rate in rates} | {rate['carat_to'] for rate in rates})
+        starts, ends, winners = [], [], []
+        for low, high in zip(edges, edges[1:]):
+            winner = None
+            for rate in rates:
+                if rate['carat_from'] <= low and high <= rate['carat_to']:
+                    winner = rate
+            if winner is None:
+                continue
+            if winners and winners[-1] is winner and ends[-1] == low:
+                ends[-1] = high
+            else:
+                starts.append(low)
+                ends.append(high)
+                winners.append(winner)
+        return starts, ends, winners, rates[-1]
+    
+    @staticmethod
+    def _band_rate(band, carat):
+        starts, ends, rates = band[:3]
+        position = bisect_right(starts, carat) - 1
+        if position >= 0 and carat <= ends[position]:
+            return rates[position]
         return None
     
+    @staticmethod
+    def get_current_rate(clarity='VS1', color='G', shape='Round', carat=None):
+        """The rate for a stone of carat weight, or the most recent rate of any band without one"""
+        band = DiamondRateService.rate_matrix().get((shape, clarity, color))
+        if band is None:
+            return None
+        if carat is None:
+            return band[3]
+        return DiamondRateService._band_rate(band, carat)
+    
     @staticmethod
     def get_all_current_rates():
         return fetch_query("""
@@ -184,15 +285,31 @@ class DiamondRateService:
     
     @staticmethod
     def calculate_diamond_value(carat, clarity='VS1', color='G', shape='Round'):
-        rate = DiamondRateService.get_current_rate(clarity, color, shape)
+        rate = DiamondRateService.get_current_rate(clarity, color, shape, carat)
         if rate:
             return carat * rate['rate_per_carat']
         return 0
     
+    @staticmethod
+    def price_parcel(stones):
+        """Values of (carat, clarity, color, shape) stones against one read of the matrix;
+        None for a stone no rate band covers."""
+        matrix = DiamondRateService.rate_matrix()
+        band_rate = DiamondRateService._band_rate
+        values = []
+        for carat, clarity, color, shape in stones:
+            band = matrix.get((shape or 'Round', clarity, color))
+            rate = band_rate(band, carat) if band else None
+            values.append(carat * rate['rate_per_carat'] if rate else None)
+        return values
+    
     @staticmethod
     def delete_rate(rate_id):
         execute_query("""
             UPDATE diamond_rates SET is_active = 0, date_modified = ?
             WHERE id = ?
         """, (datetime.now(), rate_id))
+        DiamondRateService.refresh_matrix()
         return True
+
+register_change_listener(DiamondRateService.invalidate, {'diamond_rates'})
@@ -0,0 +1,135 @@
+from database.db import fetch_query, fetch_one, transaction
+from datetime import date, timedelta
+
+class LedgerService:
+    """Point-in-time stock from daily snapshots plus the movements since.
+    
+    A stock_snapshots row is an item's stock at the end of snapshot_date and is only written
+    on days the item's stock changed, so its stock on any snapshotted day is its latest row
+    on or before that day. Lookups drive from items (CROSS JOIN keeps that join order) and
+    seek each item's latest row through the primary key.
+    """
+    
+    MOVEMENT_DELTA = "SUM(new_quantity - previous_quantity), SUM(new_weight - previous_weight)"
+    
+    @staticmethod
+    def snapshot_frontier():
+        """The last day snapshots have been taken for, or None"""
+        last = fetch_one("SELECT MAX(snapshot_date) FROM stock_snapshots")[0]
+        return date.fromisoformat(last) if last else None
+    
+    @staticmethod
+    def take_snapshots(through=None):
+        """Snapshot every day after the frontier up to through (yesterday by default); returns rows written.
+        
+        Each day's stock is worked out backwards from the live items table, so stock written
+        outside stock_movements still lands in the next snapshot.
+        """
+        through = through or date.today() - timedelta(days=1)
+        end = (through + timedelta(days=1)).isoformat()
+        
+        with transaction() as cursor:
+            last = cursor.execute("SELECT MAX(snapshot_date) FROM stock_snapshots").fetchone()[0]
+            frontier = date.fromisoformat(last) if last else None
+            if frontier is not None and frontier >= through:
+                return 0
+            first = frontier + timedelta(days=1) if frontier else through
+            
+            balance = {}
+            created = {}
+            for item_id, quantity, weight, created_day in cursor.execute("""
+                SELECT id, COALESCE(quantity, 0), COALESCE(weight_in_gm, 0), substr(date_created, 1, 10)
+                FROM items WHERE date_created IS NULL OR date_created < ?
+            """, (end,)):
+                balance[item_id] = [quantity, weight]
+                if created_day and created_day >= first.isoformat():
+                    created.setdefault(created_day, []).append(item_id)
+            
+            for item_id, quantity, weight in cursor.execute(f"""
+                SELECT item_id, {LedgerService.MOVEMENT_DELTA} FROM stock_movements
+                WHERE date_created >= ? GROUP BY item_id
+            """, (end,)):
+                if item_id in balance:
+                    balance[item_id][0] -= quantity
+                    balance[item_id][1] -= weight
+            
+            daily = {}
+            for item_id, day, quantity, weight in cursor.execute(f"""
+                SELECT item_id, substr(date_created, 1, 10), {LedgerService.MOVEMENT_DELTA} FROM stock_movements
+                WHERE date_created >= ? AND date_created < ? GROUP BY item_id, substr(date_created, 1, 10)
+            """, (first.isoformat(), end)):
+                daily.setdefault(day, []).append((item_id, quantity, weight))
+            
+            previous = {}
+            if frontier is not None:
+                previous = {row[0]: (row[1], row[2]) for row in cursor.execute("""
+                    SELECT s.item_id, s.quantity, s.weight_in_gm FROM items i
+                    CROSS JOIN stock_snapshots s ON s.item_id = i.id AND s.snapshot_date = (
+                        SELECT MAX(snapshot_date) FROM stock_snapshots WHERE item_id = i.id)
+                """)}
+            
+            rows = []
+            day = through
+            while day >= first:
+                key = day.isoformat()
+                moved = daily.get(key, [])
+                if day == first:
+                    changed = [item_id for item_id, stock in balance.items() if previous.get(item_id) != tuple(stock)]
+                else:
+                    changed = {item_id for item_id, quantity, weight in moved} | set(created.get(key, ()))
+                rows.extend((item_id, key, *balance[item_id]) for item_id in changed if item_id in balance)
+                
+                for item_id, quantity, weight in moved:
+                    if item_id in balance:
+                        balance[item_id][0] -= quantity
+                        balance[item_id][1] -= weight
+                for item_id in created.get(key, ()):
+                    balance.pop(item_id, None)
+                day -= timedelta(days=1)
+            
+            cursor.executemany("""
+                INSERT OR REPLACE INTO stock_snapshots (item_id, snapshot_date, quantity, weight_in_gm)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+        return len(rows)
+    
+    @staticmethod
+    def stock_as_of(day, item_id=None):
+        """(item_id, quantity, weight) at the end of day for every item that existed then.
+        
+        Reads the nearest snapshot on or after day and rolls back the movements in between;
+        after the frontier the live items table is the anchor instead.
+        """
+        end = (day + timedelta(days=1)).isoformat()
+        item_filter = " AND i.id = ?" if item_id is not None else ""
+        item_params = (item_id,) if item_id is not None else ()
+        anchor = fetch_one("SELECT MIN(snapshot_date) FROM stock_snapshots WHERE snapshot_date >= ?",
+                           (day.isoformat(),))[0]
+        
+        if anchor is None:
+            base = fetch_query(f"""
+                SELECT i.id, COALESCE(i.quantity, 0), COALESCE(i.weight_in_gm, 0) FROM items i
+                WHERE (i.date_created IS NULL OR i.date_created < ?){item_filter}
+            """, (end, *item_params))
+            delta = fetch_query(f"""
+                SELECT item_id, {LedgerService.MOVEMENT_DELTA} FROM stock_movements
+                WHERE date_created >= ?{item_filter.replace('i.id', 'item_id')} GROUP BY item_id
+            """, (end, *item_params))
+        else:
+            base = fetch_query(f"""
+                SELECT s.item_id, s.quantity, s.weight_in_gm FROM items i
+                CROSS JOIN stock_snapshots s ON s.item_id = i.id AND s.snapshot_date = (
+                    SELECT MAX(snapshot_date) FROM stock_snapshots WHERE item_id = i.id AND snapshot_date <= ?)
+                WHERE (i.date_created IS NULL OR i.date_created < ?){item_filter}
+            """, (anchor, end, *item_params))
+            delta = fetch_query(f"""
+                SELECT item_id, {LedgerService.MOVEMENT_DELTA} FROM stock_movements
+                WHERE date_created >= ? AND date_created < ?{item_filter.replace('i.id', 'item_id')} GROUP BY item_id
+            """, (end, (date.fromisoformat(anchor) + timedelta(days=1)).isoformat(), *item_params))
+        
+        changes = {row[0]: (row[1], row[2]) for row in delta}
+        stock = []
+        for row_id, quantity, weight in base:
+            change = changes.get(row_id, (0, 0))
+            stock.append((row_id, quantity - change[0], weight - change[1]))
+        return stock
@@ -1,5 +1,5 @@
-from database.db import execute_query, fetch_query, fetch_one
-from datetime import datetime
+from database.db import execute_query, fetch_query, fetch_one, date_range
+from datetime import date, datetime
 import uuid
 
 class PurchaseService:
@@ -13,7 +13,7 @@ class PurchaseService:
             INSERT INTO bills (bill_number, bill_type, supplier_id, employee_id, bill_date, total_amount, total_weight, discount_amount, status, date_created, date_modified)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
-            bill_number, 'Purchase', supplier_id, employee_id, datetime.now().date(),
+            bill_number, 'Purchase', supplier_id, employee_id, date.today().isoformat(),
             total_amount - discount, total_weight, discount, 'Completed',
             datetime.now(), datetime.now()
         ))
@@ -38,8 +38,10 @@ class PurchaseService:
             WHERE b.bill_type = 'Purchase'
         """
         
+        params = ()
         if start_date and end_date:
-            query += f" AND b.bill_date BETWEEN '{start_date}' AND '{end_date}'"
+            conditions, params = date_range('b.bill_date', start_date, end_date)
+            query += conditions
         
         query += " ORDER BY b.bill_date DESC"
-        return fetch_query(query)
\ No newline at end of file
+        return fetch_query(query, params)
\ No newline at end of file
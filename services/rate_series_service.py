@@ -0,0 +1,95 @@
+from database.db import fetch_query, fetch_one
+from datetime import date, timedelta
+
+class RateSeriesService:
+    """Rate history as (rate_date, rate) series over metal_rates and diamond_rates.
+    
+    A metal series is keyed by (material, purity); a diamond series by (shape, clarity,
+    color, carat) and follows the carat bands covering carat.
+    Every lookup is a range scan on a (key..., rate_date) index.
+    """
+    
+    PERIODS = ('day', 'week', 'month')
+    
+    METAL_SOURCE = """
+        SELECT rate_date, rate_per_gram, id FROM metal_rates
+        WHERE material_id = (SELECT id FROM materials WHERE name = ?) AND purity = ? AND is_active = 1{range}
+    """
+    
+    DIAMOND_SOURCE = """
+        SELECT rate_date, rate_per_carat, id FROM diamond_rates
+        WHERE shape = ? AND clarity = ? AND color = ? AND carat_from <= ? AND carat_to >= ?
+          AND is_active = 1{range}
+    """
+    
+    @staticmethod
+    def _source(kind, key, start=None, end=None):
+        """(query, params) selecting rate_date, rate, id of one series within [start, end]"""
+        bounds = []
+        conditions = ""
+        if start is not None:
+            conditions += " AND rate_date >= ?"
+            bounds.append(str(start))
+        if end is not None:
+            conditions += " AND rate_date <= ?"
+            bounds.append(str(end))
+        
+        if kind == 'metal':
+            material, purity = key
+            return RateSeriesService.METAL_SOURCE.format(range=conditions), (material, purity, *bounds)
+        if kind == 'diamond':
+            shape, clarity, color, carat = key
+            return RateSeriesService.DIAMOND_SOURCE.format(range=conditions), (shape, clarity, color, carat, carat, *bounds)
+        raise ValueError(f"Unknown rate series '{kind}'")
+    
+    @staticmethod
+    def history(kind, key, start=None, end=None):
+        """[(rate_date, rate)] oldest first, one point per day (the last rate entered that day)"""
+        query, params = RateSeriesService._source(kind, key, start, end)
+        points = {}
+        for rate_date, rate, rate_id in fetch_query(f"SELECT * FROM ({query}) ORDER BY 1, 3", params):
+            points[str(rate_date)] = rate
+        return list(points.items())
+    
+    @staticmethod
+    def as_of(kind, key, day):
+        """(rate_date, rate) in force on day, i.e. the latest on or before it, or None"""
+        query, params = RateSeriesService._source(kind, key, end=day)
+        row = fetch_one(f"SELECT * FROM ({query}) ORDER BY 1 DESC, 3 DESC LIMIT 1", params)
+        return (str(row[0]), row[1]) if row else None
+    
+    @staticmethod
+    def period_start(day, period):
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        if period == 'month':
+            return day.replace(day=1)
+        return day
+    
+    @staticmethod
+    def ohlc(kind, key, start, end, period='day'):
+        """[(period_start, open, high, low, close, points)] over [start, end], weeks starting Monday"""
+        if period not in RateSeriesService.PERIODS:
+            raise ValueError(f"Unknown period '{period}'")
+        
+        candles = []
+        for rate_date, rate in RateSeriesService.history(kind, key, start, end):
+            bucket = RateSeriesService.period_start(date.fromisoformat(rate_date[:10]), period).isoformat()
+            if candles and candles[-1][0] == bucket:
+                _, first, high, low, _, points = candles[-1]
+                candles[-1] = (bucket, first, max(high, rate), min(low, rate), rate, points + 1)
+            else:
+                candles.append((bucket, rate, rate, rate, rate, 1))
+        return candles
+    
+    @staticmethod
+    def metal_history(purity='22K', start=None, end=None, material='Gold'):
+        return RateSeriesService.history('metal', (material, purity), start, end)
+    
+    @staticmethod
+    def metal_rate_on(day, purity='22K', material='Gold'):
+        return RateSeriesService.as_of('metal', (material, purity), day)
+    
+    @staticmethod
+    def diamond_rate_on(day, carat, clarity='VS1', color='G', shape='Round'):
+        return RateSeriesService.as_of('diamond', (shape, clarity, color, carat), day)
@@ -0,0 +1,169 @@
+from database.db import fetch_query, register_change_listener
+from services.gold_rate_service import GoldRateService, DiamondRateService
+import numpy as np
+import threading
+import time
+
+class RevaluationEngine:
+    """Market value of the active inventory at the current metal and diamond rates.
+    
+    Weights are the item's total stock weight, which every stock movement (bill lines included)
+    keeps up to date, so the metal is valued as weight * rate + making with no quantity factor.
+    gold_weight, diamond carats and prices are per piece and are multiplied by quantity. Items
+    no rate applies to keep their book price.
+    The item arrays are cached until an item changes and the valuation until an item or a
+    rate changes, so a rate update only redoes the arithmetic.
+    """
+    
+    ITEM_TABLES = {'items', 'materials'}
+    RATE_TABLES = {'gold_rates', 'metal_rates', 'diamond_rates'}
+    DIAMOND_SHAPE = 'Round'
+    SETTING_METALS = {'Diamond': 'Gold'}
+    
+    _lock = threading.Lock()
+    _items = None
+    _valuation = None
+    _generation = 0
+    
+    @classmethod
+    def get(cls):
+        with cls._lock:
+            items = cls._items
+            valuation = cls._valuation
+            generation = cls._generation
+        if valuation is not None:
+            return valuation
+        
+        if items is None:
+            items = cls.load_items()
+        valuation = cls.revalue(items)
+        with cls._lock:
+            if cls._generation == generation:
+                cls._items = items
+                cls._valuation = valuation
+        return valuation
+    
+    @classmethod
+    def invalidate(cls, tables=None):
+        with cls._lock:
+            if tables is None or tables & cls.ITEM_TABLES:
+                cls._items = None
+            cls._valuation = None
+            cls._generation += 1
+    
+    @staticmethod
+    def load_items():
+        """Column arrays of the active items, with (material, purity) and (clarity, color) keys factorized"""
+        rows = fetch_query("""
+            SELECT i.id, COALESCE(m.name, 'Other'), COALESCE(i.purity, ''),
+                   COALESCE(i.quantity, 0), COALESCE(i.price, 0),
+                   CASE WHEN i.gold_weight > 0 THEN i.gold_weight * COALESCE(i.quantity, 0) ELSE COALESCE(i.weight_in_gm, 0) END,
+                   COALESCE(i.making_charges, 0), COALESCE(i.making_charges_type, 'per_gram') = 'per_gram',
+                   COALESCE(i.diamond_carat, 0), COALESCE(i.diamond_clarity, ''), COALESCE(i.diamond_color, '')
+            FROM items i
+            LEFT JOIN materials m ON i.material_id = m.id
+            WHERE i.is_active = 1
+            ORDER BY i.id
+        """)
+        count = len(rows)
+        (ids, materials, purities, quantities, prices, weights, making, per_gram,
+         carats, clarities, colors) = zip(*rows) if rows else ((),) * 11
+        
+        metal_keys = {}
+        diamond_keys = {}
+        material_names = {}
+        return {
+            'ids': np.fromiter(ids, dtype=np.int64, count=count),
+            'quantities': np.fromiter(quantities, dtype=float, count=count),
+            'prices': np.fromiter(prices, dtype=float, count=count),
+            'weights': np.fromiter(weights, dtype=float, count=count),
+            'making': np.fromiter(making, dtype=float, count=count),
+            'per_gram': np.fromiter(per_gram, dtype=bool, count=count),
+            'carats': np.fromiter(carats, dtype=float, count=count),
+            'metal_codes': np.fromiter((metal_keys.setdefault(key, len(metal_keys))
+                                        for key in zip(materials, purities)), dtype=np.intp, count=count),
+            'diamond_codes': np.fromiter((diamond_keys.setdefault(key, len(diamond_keys))
+                                          for key in zip(clarities, colors)), dtype=np.intp, count=count),
+            'material_codes': np.fromiter((material_names.setdefault(name, len(material_names))
+                                           for name in materials), dtype=np.intp, count=count),
+            'metal_keys': list(metal_keys),
+            'diamond_keys': list(diamond_keys),
+            'material_names': list(material_names),
+        }
+    
+    @staticmethod
+    def revalue(items):
+        started = time.perf_counter()
+        count = len(items['ids'])
+        weights = items['weights']
+        carats = items['carats']
+        
+        current_rates = GoldRateService.current_rates()
+        key_rates = np.array([RevaluationEngine._metal_rate(current_rates, material, purity)
+                              for material, purity in items['metal_keys']] or [np.nan])
+        metal_rates = key_rates[items['metal_codes']]
+        metal_priced = ~np.isnan(metal_rates) & (weights > 0)
+        making = np.where(items['per_gram'], items['making'] * weights, items['making'])
+        metal_values = np.where(metal_priced, weights * np.nan_to_num(metal_rates) + making, 0)
+        
+        diamond_rates = np.full(count, np.nan)
+        matrix = DiamondRateService.rate_matrix()
+        for code, (clarity, color) in enumerate(items['diamond_keys']):
+            band = matrix.get((RevaluationEngine.DIAMOND_SHAPE, clarity, color))
+            if band is None:
+                continue
+            members = np.flatnonzero(items['diamond_codes'] == code)
+            starts, ends = np.array(band[0]), np.array(band[1])
+            band_rates = np.array([rate['rate_per_carat'] for rate in band[2]])
+            member_carats = carats[members]
+            positions = np.searchsorted(starts, member_carats, side='right') - 1
+            clipped = np.clip(positions, 0, None)
+            covered = (positions >= 0) & (member_carats <= ends[clipped])
+            diamond_rates[members] = np.where(covered, band_rates[clipped], np.nan)
+        diamond_priced = ~np.isnan(diamond_rates) & (carats > 0)
+        diamond_values = np.where(diamond_priced, carats * np.nan_to_num(diamond_rates), 0)
+        
+        quantities = items['quantities']
+        priced = metal_priced | diamond_priced
+        values = np.where(priced, metal_values + diamond_values * quantities, items['prices'] * quantities)
+        unit_values = np.where(quantities > 0, values / np.where(quantities > 0, quantities, 1),
+                               np.where(priced, metal_values + diamond_values, items['prices']))
+        book_values = items['prices'] * quantities
+        
+        names = items['material_names']
+        market_totals = np.bincount(items['material_codes'], weights=values, minlength=len(names))
+        book_totals = np.bincount(items['material_codes'], weights=book_values, minlength=len(names))
+        
+        return {
+            'item_ids': items['ids'],
+            'unit_values': unit_values,
+            'values': values,
+            'book_values': book_values,
+            'priced': priced,
+            'by_material': {name: (float(market_totals[i]), float(book_totals[i])) for i, name in enumerate(names)},
+            'total_value': float(values.sum()),
+            'book_value': float(book_values.sum()),
+            'items': count,
+            'priced_items': int(priced.sum()),
+            'seconds': time.perf_counter() - started
+        }
+    
+    @staticmethod
+    def _metal_rate(current_rates, material, purity):
+        rate = current_rates.get((material, purity))
+        if rate is None and material in RevaluationEngine.SETTING_METALS:
+            rate = current_rates.get((RevaluationEngine.SETTING_METALS[material], purity))
+        return rate['rate_per_gram'] if rate else np.nan
+    
+    @staticmethod
+    def item_value(item_id):
+        """(unit value, stock value) of an active item at current rates, or None"""
+        valuation = RevaluationEngine.get()
+        ids = valuation['item_ids']
+        position = np.searchsorted(ids, item_id)
+        if position < len(ids) and ids[position] == item_id:
+            return float(valuation['unit_values'][position]), float(valuation['values'][position])
+        return None
+
+
+register_change_listener(RevaluationEngine.invalidate, RevaluationEngine.ITEM_TABLES | RevaluationEngine.RATE_TABLES)
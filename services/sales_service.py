@@ -1,5 +1,5 @@
-from database.db import execute_query, fetch_query, fetch_one
-from datetime import datetime
+from database.db import execute_query, fetch_query, fetch_one, transaction, rebuild_daily_sales_summary, date_range
+from datetime import date, datetime
 import uuid
 
 class SalesService:
@@ -13,7 +13,7 @@ class SalesService:
             INSERT INTO bills (bill_number, bill_type, customer_id, employee_id, bill_date, total_amount, total_weight, discount_amount, status, date_created, date_modified)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
-            bill_number, 'Sales', customer_id, employee_id, datetime.now().date(),
+            bill_number, 'Sales', customer_id, employee_id, date.today().isoformat(),
             total_amount - discount, total_weight, discount, 'Completed',
             datetime.now(), datetime.now()
         ))
@@ -38,8 +38,31 @@ class SalesService:
             WHERE b.bill_type = 'Sales'
         """
         
+        params = ()
         if start_date and end_date:
-            query += f" AND b.bill_date BETWEEN '{start_date}' AND '{end_date}'"
+            conditions, params = date_range('b.bill_date', start_date, end_date)
+            query += conditions
         
         query += " ORDER BY b.bill_date DESC"
-        return fetch_query(query)
\ No newline at end of file
+        return fetch_query(query, params)
+    
+    @staticmethod
+    def daily_totals(start, end=None):
+        """{date: {bill_type: (amount, bills)}} for [start, end] from the daily_sales_summary rollup,
+        cancelled bills included"""
+        conditions, params = date_range('summary_date', start, end)
+        totals = {}
+        for day, bill_type, amount, bills in fetch_query(f"""
+            SELECT summary_date, bill_type, SUM(total_amount), SUM(bill_count)
+            FROM daily_sales_summary
+            WHERE 1 = 1{conditions}
+            GROUP BY summary_date, bill_type
+        """, params):
+            totals.setdefault(day, {})[bill_type] = (amount, bills)
+        return totals
+    
+    @staticmethod
+    def rebuild_daily_summary():
+        """Recompute the daily_sales_summary rollup from bills; triggers keep it current afterwards"""
+        with transaction() as cursor:
+            return rebuild_daily_sales_summary(cursor)
@@ -0,0 +1,313 @@
+from database.db import fetch_query, fetch_one, register_change_listener
+from collections import OrderedDict
+from config import SEARCH_CACHE_SIZE
+import threading
+import unicodedata
+import re
+
+class SearchService:
+    RANK_CANDIDATE_LIMIT = 1000
+    
+    _fts_available = None
+    
+    @staticmethod
+    def fts_available():
+        if SearchService._fts_available is None:
+            SearchService._fts_available = fetch_one("""
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'
+            """) is not None
+        return SearchService._fts_available
+    
+    @staticmethod
+    def match_expression(text):
+        """Turn free text into an FTS5 query where every token must match as a prefix"""
+        tokens = re.findall(r'\w+', text.lower())
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+    
+    @staticmethod
+    def is_broad(fts_table, match):
+        """True when a match has too many hits for bm25 ranking to stay interactive"""
+        hits = fetch_one(f"""
+            SELECT COUNT(*) FROM (SELECT 1 FROM {fts_table} WHERE {fts_table} MATCH ? LIMIT ?)
+        """, (match, SearchService.RANK_CANDIDATE_LIMIT + 1))[0]
+        return hits > SearchService.RANK_CANDIDATE_LIMIT
+    
+    @staticmethod
+    def fts_filter(fts_table, text):
+        """Return (match clause, params, ranked) for an FTS join, or None when LIKE should be used instead"""
+        match = SearchService.match_expression(text)
+        if match is None or not SearchService.fts_available():
+            return None
+        return f"{fts_table} MATCH ?", [match], not SearchService.is_broad(fts_table, match)
+    
+    @staticmethod
+    def _search(fts_table, select, like_select, text, limit):
+        match = SearchService.match_expression(text)
+        if match is None:
+            return []
+        if not SearchService.fts_available():
+            pattern = f"%{text}%"
+            return fetch_query(like_select, (pattern, pattern, limit))
+        if SearchService.is_broad(fts_table, match):
+            order = f"{fts_table}.rowid DESC"
+        else:
+            order = f"{fts_table}.rank"
+        return fetch_query(f"{select} ORDER BY {order} LIMIT ?", (match, limit))
+    
+    @staticmethod
+    def search_items(text, limit=50):
+        return SearchService._search('items_fts', """
+            SELECT i.id, i.name, i.barcode, items_fts.rank
+            FROM items_fts
+            JOIN items i ON i.id = items_fts.rowid
+            WHERE items_fts MATCH ? AND i.is_active = 1
+        """, """
+            SELECT id, name, barcode, 0 FROM items
+            WHERE is_active = 1 AND (name LIKE ? OR barcode LIKE ?)
+            ORDER BY name LIMIT ?
+        """, text, limit)
+    
+    @staticmethod
+    def search_customers(text, limit=50):
+        return SearchService._search('customers_fts', """
+            SELECT c.id, c.name, c.phone, customers_fts.rank
+            FROM customers_fts
+            JOIN customers c ON c.id = customers_fts.rowid
+            WHERE customers_fts MATCH ?
+        """, """
+            SELECT id, name, phone, 0 FROM customers
+            WHERE name LIKE ? OR phone LIKE ?
+            ORDER BY name LIMIT ?
+        """, text, limit)
+    
+    @staticmethod
+    def search_suppliers(text, limit=50):
+        return SearchService._search('suppliers_fts', """
+            SELECT s.id, s.name, s.phone, suppliers_fts.rank
+            FROM suppliers_fts
+            JOIN suppliers s ON s.id = suppliers_fts.rowid
+            WHERE suppliers_fts MATCH ?
+        """, """
+            SELECT id, name, phone, 0 FROM suppliers
+            WHERE name LIKE ? OR phone LIKE ?
+            ORDER BY name LIMIT ?
+        """, text, limit)
+    
+    @staticmethod
+    def search_bills(text, limit=50):
+        return SearchService._search('bills_fts', """
+            SELECT b.id, b.bill_number, b.bill_type, bills_fts.rank
+            FROM bills_fts
+            JOIN bills b ON b.id = bills_fts.rowid
+            WHERE bills_fts MATCH ?
+        """, """
+            SELECT b.id, b.bill_number, b.bill_type, 0 FROM bills b
+            LEFT JOIN customers c ON b.customer_id = c.id
+            WHERE b.bill_number LIKE ? OR c.name LIKE ?
+            ORDER BY b.bill_date DESC LIMIT ?
+        """, text, limit)
+
+
+FIELD_SEPARATOR = '\x1f'
+
+def search_words(text):
+    """Split text into lower-case words without diacritics, the way the FTS tokenizer does"""
+    if text.isascii():
+        return re.findall(r'[a-z0-9]+', text.lower())
+    folded = unicodedata.normalize('NFKD', text.lower())
+    return re.findall(r'[^\W_]+', ''.join(ch for ch in folded if not unicodedata.combining(ch)))
+
+def prefix_match(term, haystack):
+    words = search_words(haystack)
+    return all(any(word.startswith(token) for word in words) for token in search_words(term))
+
+def substring_match(term, haystack):
+    term = term.lower()
+    return any(term in field.lower() for field in haystack.split(FIELD_SEPARATOR))
+
+
+class SearchEntry:
+    def __init__(self, ids, haystacks, complete, matcher):
+        self.ids = ids
+        self.haystacks = haystacks
+        self.complete = complete
+        self.matcher = matcher
+
+
+class SearchResultCache:
+    """LRU of recent (scope, term) -> matching ids for one list page.
+    
+    The selects return (id, haystack) rows, where the haystack is the searched columns
+    joined by FIELD_SEPARATOR. Typing more characters onto a term whose complete result
+    is cached filters that result in memory instead of querying again; broad terms are
+    read newest-first a chunk at a time as the list scrolls. Writes to any of `tables`
+    clear the cache.
+    """
+    
+    def __init__(self, fts_table, fts_select, like_select, id_column, like_order, scope_clause=None,
+                 tables=(), max_entries=SEARCH_CACHE_SIZE, chunk_size=SearchService.RANK_CANDIDATE_LIMIT):
+        self.fts_table = fts_table
+        self.fts_select = fts_select
+        self.like_select = like_select
+        self.id_column = id_column
+        self.like_order = like_order
+        self.scope_clause = scope_clause
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self.stats = {'hits': 0, 'refined': 0, 'loaded': 0}
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        register_change_listener(self.clear, set(tables))
+    
+    def clear(self, tables=None):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+    
+    def ids(self, scope, term, start=0, count=None):
+        """Return ids matching term in scope, best match first, from position start"""
+        entry = self._entry(scope, term)
+        end = None if count is None else start + count
+        while not entry.complete and (end is None or len(entry.ids) < end):
+            self._extend(scope, term, entry)
+        return entry.ids[start:end]
+    
+    def fetch_page(self, scope, term, query, after=None, limit=100, id_column='id'):
+        """Keyset page over the cached ids; rows are query's columns plus their position.
+        
+        The query must already contain a WHERE clause, and its rows are keyed by
+        (row[-1], row[0]) so they fit VirtualTreeview.
+        """
+        start = 0 if after is None else after[0] + 1
+        ids = self.ids(scope, term, start, limit)
+        rows = {}
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in fetch_query(f"{query} AND {id_column} IN ({placeholders})", chunk):
+                rows[row[0]] = tuple(row)
+        return [rows[row_id] + (start + position,) for position, row_id in enumerate(ids) if row_id in rows]
+    
+    def _entry(self, scope, term):
+        key = (scope, term.lower())
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry
+            parent = self._refinable(key)
+        
+        if parent is not None:
+            matches = [(row_id, haystack) for row_id, haystack in zip(parent.ids, parent.haystacks)
+                       if parent.matcher(key[1], haystack)]
+            entry = SearchEntry([row[0] for row in matches], [row[1] for row in matches], True, parent.matcher)
+            stat = 'refined'
+        else:
+            entry = self._load(scope, term)
+            stat = 'loaded'
+        
+        with self._lock:
+            self.stats[stat] += 1
+            if generation == self._generation:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+    
+    def _refinable(self, key):
+        """The longest cached complete result whose term the new term extends"""
+        best = None
+        for (scope, term), entry in self._entries.items():
+            if (scope == key[0] and entry.complete and key[1].startswith(term)
+                    and (best is None or len(term) > len(best[0]))):
+                best = (term, entry)
+        return best[1] if best else None
+    
+    def _query(self, scope, term):
+        match = SearchService.match_expression(term)
+        if self.fts_table is not None and match is not None and SearchService.fts_available():
+            query, params, matcher = self.fts_select, [match], prefix_match
+        else:
+            pattern = f"%{term}%"
+            query, params, matcher = self.like_select, [pattern] * self.like_select.count('LIKE ?'), substring_match
+        if self.scope_clause and scope not in (None, '', 'All'):
+            query += f" AND {self.scope_clause}"
+            params.append(scope)
+        return query, params, matcher
+    
+    def _load(self, scope, term):
+        query, params, matcher = self._query(scope, term)
+        if matcher is prefix_match:
+            broad = SearchService.is_broad(self.fts_table, params[0])
+            order = f"{self.fts_table}.rank"
+        else:
+            broad = False
+            order = self.like_order
+        
+        if not broad:
+            rows = fetch_query(f"{query} ORDER BY {order} LIMIT ?", params + [self.chunk_size + 1])
+            if len(rows) <= self.chunk_size:
+                return SearchEntry([row[0] for row in rows], [row[1] for row in rows], True, matcher)
+        
+        entry = SearchEntry([], [], False, matcher)
+        self._extend(scope, term, entry)
+        return entry
+    
+    def _extend(self, scope, term, entry):
+        """Read the next newest-first chunk of a broad result"""
+        query, params, matcher = self._query(scope, term)
+        before = entry.ids[-1] if entry.ids else None
+        if before is not None:
+            query += f" AND {self.id_column} < ?"
+            params.append(before)
+        rows = fetch_query(f"{query} ORDER BY {self.id_column} DESC LIMIT ?", params + [self.chunk_size])
+        with self._lock:
+            if (entry.ids[-1] if entry.ids else None) != before:
+                return
+            entry.ids.extend(row[0] for row in rows)
+            entry.haystacks.extend(row[1] for row in rows)
+            entry.complete = len(rows) < self.chunk_size
+
+
+item_search_cache = SearchResultCache(
+    'items_fts', """
+        SELECT i.id, i.name || char(31) || COALESCE(i.barcode, '') || char(31) || COALESCE(ic.name, '')
+        FROM items_fts
+        JOIN items i ON i.id = items_fts.rowid
+        LEFT JOIN item_categories ic ON i.category_id = ic.id
+        LEFT JOIN materials m ON i.material_id = m.id
+        WHERE items_fts MATCH ? AND i.is_active = 1
+    """, """
+        SELECT i.id, i.name || char(31) || COALESCE(i.barcode, '') || char(31) || COALESCE(ic.name, '')
+        FROM items i
+        LEFT JOIN item_categories ic ON i.category_id = ic.id
+        LEFT JOIN materials m ON i.material_id = m.id
+        WHERE i.is_active = 1 AND (i.name LIKE ? OR i.barcode LIKE ? OR ic.name LIKE ?)
+    """, 'i.id', 'i.name, i.id', scope_clause="m.name = ?",
+    tables=('items', 'item_categories', 'materials'))
+
+customer_search_cache = SearchResultCache(
+    'customers_fts', """
+        SELECT c.id, c.name || char(31) || COALESCE(c.phone, '') || char(31) || COALESCE(c.email, '')
+               || char(31) || COALESCE(c.city, '')
+        FROM customers_fts
+        JOIN customers c ON c.id = customers_fts.rowid
+        WHERE customers_fts MATCH ?
+    """, """
+        SELECT c.id, c.name || char(31) || COALESCE(c.phone, '') || char(31) || COALESCE(c.email, '')
+               || char(31) || COALESCE(c.city, '')
+        FROM customers c
+        WHERE (c.name LIKE ? OR c.phone LIKE ? OR c.email LIKE ? OR c.city LIKE ?)
+    """, 'c.id', 'c.name, c.id', tables=('customers',))
+
+employee_search_cache = SearchResultCache(
+    None, None, """
+        SELECT id, name || char(31) || COALESCE(position, '') || char(31) || COALESCE(phone, '')
+        FROM employees
+        WHERE (name LIKE ? OR position LIKE ? OR phone LIKE ?)
+    """, 'id', 'name, id', scope_clause="status = ?", tables=('employees',))
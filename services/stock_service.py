@@ -1,5 +1,7 @@
-from database.db import execute_query, fetch_query, fetch_one
+from database.db import fetch_query, fetch_one, transaction, reconcile_inventory
+from services.revaluation_service import RevaluationEngine
 from datetime import datetime
+import time
 
 class StockService:
     @staticmethod
@@ -10,93 +12,160 @@ class StockService:
         return {'quantity': result[0] if result else 0, 'weight': result[1] if result else 0}
     
     @staticmethod
-    def add_stock(item_id, quantity, weight_in_gm=0, reference="", reason="", adjusted_by="System"):
-        current = StockService.get_item_stock(item_id)
-        new_qty = current['quantity'] + quantity
-        new_weight = current['weight'] + weight_in_gm
+    def record_movement(cursor, item_id, transaction_type, quantity, weight=0, mode='delta', reference="",
+                        reason="", adjusted_by="System", bill_id=None, clamp=False):
+        """Log a movement and apply it to the item inside the caller's transaction; returns the new quantity.
         
-        execute_query("""
-            INSERT INTO stock_movements (item_id, transaction_type, quantity_change, weight_change,
-                                         previous_quantity, new_quantity, previous_weight, new_weight,
-                                         reference, reason, adjusted_by, date_created)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (item_id, 'IN', quantity, weight_in_gm, current['quantity'], new_qty, 
-              current['weight'], new_weight, reference, reason, adjusted_by, datetime.now()))
+        In 'delta' mode quantity and weight are added to the item's stock (clamp stops it going
+        below zero); in 'count' mode they are the new stock, a weight of None keeping the
+        current one. A transaction_type of None is worked out from the direction of the change.
+        The caller's transaction holds the write lock, so the row read here cannot go stale.
+        """
+        item = cursor.execute("SELECT quantity, weight_in_gm FROM items WHERE id = ?", (item_id,)).fetchone()
+        if item is None:
+            raise ValueError(f"Item {item_id} not found")
+        previous_quantity, previous_weight = item[0] or 0, item[1] or 0
         
-        execute_query("""
-            UPDATE items SET quantity = ?, weight_in_gm = ?, date_modified = ? WHERE id = ?
-        """, (new_qty, new_weight, datetime.now(), item_id))
+        if mode == 'delta':
+            quantity_change, weight_change = quantity, weight
+            new_quantity = previous_quantity + quantity
+            new_weight = previous_weight + weight
+            if clamp:
+                new_quantity, new_weight = max(0, new_quantity), max(0, new_weight)
+        elif mode == 'count':
+            new_quantity = quantity
+            new_weight = previous_weight if weight is None else weight
+            quantity_change, weight_change = new_quantity - previous_quantity, new_weight - previous_weight
+        else:
+            raise ValueError(f"Unknown movement mode: {mode}")
         
-        StockService.sync_inventory(item_id)
-        return new_qty
-    
-    @staticmethod
-    def remove_stock(item_id, quantity, weight_in_gm=0, reference="", reason="", adjusted_by="System"):
-        current = StockService.get_item_stock(item_id)
-        new_qty = max(0, current['quantity'] - quantity)
-        new_weight = max(0, current['weight'] - weight_in_gm)
+        if transaction_type is None:
+            transaction_type = ('ADJUSTMENT_IN' if new_quantity > previous_quantity
+                                else 'ADJUSTMENT_OUT' if new_quantity < previous_quantity else 'ADJUSTMENT')
         
-        execute_query("""
+        now = datetime.now()
+        cursor.execute("""
             INSERT INTO stock_movements (item_id, transaction_type, quantity_change, weight_change,
                                          previous_quantity, new_quantity, previous_weight, new_weight,
-                                         reference, reason, adjusted_by, date_created)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (item_id, 'OUT', -quantity, -weight_in_gm, current['quantity'], new_qty, 
-              current['weight'], new_weight, reference, reason, adjusted_by, datetime.now()))
-        
-        execute_query("""
+                                         bill_id, reference, reason, adjusted_by, date_created)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (item_id, transaction_type, quantity_change, weight_change, previous_quantity, new_quantity,
+              previous_weight, new_weight, bill_id, reference, reason, adjusted_by, now))
+        cursor.execute("""
             UPDATE items SET quantity = ?, weight_in_gm = ?, date_modified = ? WHERE id = ?
-        """, (new_qty, new_weight, datetime.now(), item_id))
-        
-        StockService.sync_inventory(item_id)
-        return new_qty
+        """, (new_quantity, new_weight, now, item_id))
+        return new_quantity
+    
+    @staticmethod
+    def record_bill_movement(cursor, item_id, transaction_type, quantity_change, weight_change, bill_id, reference, reason):
+        return StockService.record_movement(cursor, item_id, transaction_type, quantity_change, weight_change,
+                                            reference=reference, reason=reason, bill_id=bill_id)
+    
+    @staticmethod
+    def add_stock(item_id, quantity, weight_in_gm=0, reference="", reason="", adjusted_by="System"):
+        with transaction() as cursor:
+            return StockService.record_movement(cursor, item_id, 'IN', quantity, weight_in_gm,
+                                                reference=reference, reason=reason, adjusted_by=adjusted_by)
+    
+    @staticmethod
+    def remove_stock(item_id, quantity, weight_in_gm=0, reference="", reason="", adjusted_by="System"):
+        with transaction() as cursor:
+            return StockService.record_movement(cursor, item_id, 'OUT', -quantity, -weight_in_gm,
+                                                reference=reference, reason=reason, adjusted_by=adjusted_by,
+                                                clamp=True)
     
     @staticmethod
     def adjust_stock(item_id, new_quantity, new_weight=None, reason="Manual Adjustment", adjusted_by="Admin"):
-        current = StockService.get_item_stock(item_id)
-        qty_change = new_quantity - current['quantity']
-        
-        if new_weight is None:
-            new_weight = current['weight']
-        weight_change = new_weight - current['weight']
-        
-        transaction_type = 'ADJUSTMENT'
-        if qty_change > 0:
-            transaction_type = 'ADJUSTMENT_IN'
-        elif qty_change < 0:
-            transaction_type = 'ADJUSTMENT_OUT'
-        
-        execute_query("""
-            INSERT INTO stock_movements (item_id, transaction_type, quantity_change, weight_change,
-                                         previous_quantity, new_quantity, previous_weight, new_weight,
-                                         reference, reason, adjusted_by, date_created)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (item_id, transaction_type, qty_change, weight_change, current['quantity'], new_quantity, 
-              current['weight'], new_weight, 'Manual Stock Adjustment', reason, adjusted_by, datetime.now()))
-        
-        execute_query("""
-            UPDATE items SET quantity = ?, weight_in_gm = ?, date_modified = ? WHERE id = ?
-        """, (new_quantity, new_weight, datetime.now(), item_id))
-        
-        StockService.sync_inventory(item_id)
-        return new_quantity
+        with transaction() as cursor:
+            return StockService.record_movement(cursor, item_id, None, new_quantity, new_weight, mode='count',
+                                                reference='Manual Stock Adjustment', reason=reason,
+                                                adjusted_by=adjusted_by)
     
     @staticmethod
-    def sync_inventory(item_id):
-        item = fetch_one("SELECT quantity, weight_in_gm FROM items WHERE id = ?", (item_id,))
-        if not item:
-            return
+    def reconcile_inventory():
+        """Repair inventory rows that drifted from items; triggers keep them in step afterwards"""
+        with transaction() as cursor:
+            return reconcile_inventory(cursor)
+    
+    @staticmethod
+    def validate_movements(batch, mode='delta'):
+        """Normalize (item_id, quantity, weight, reason) tuples; weight and reason are optional"""
+        if mode not in ('delta', 'count'):
+            raise ValueError(f"Unknown movement mode: {mode}")
+        movements = []
+        for index, movement in enumerate(batch):
+            try:
+                item_id, quantity, weight, reason = (tuple(movement) + (None, None))[:4]
+                item_id = int(item_id)
+                quantity = float(quantity)
+                weight = float(weight) if weight not in (None, '') else None
+            except (TypeError, ValueError):
+                raise ValueError(f"Row {index + 1}: expected (item_id, quantity, weight, reason), got {movement!r}")
+            if mode == 'count' and (quantity < 0 or (weight or 0) < 0):
+                raise ValueError(f"Row {index + 1}: counted quantity and weight cannot be negative")
+            movements.append((item_id, quantity, weight, reason or ""))
+        return movements
+    
+    @staticmethod
+    def apply_movements(batch, mode='delta', reference="", adjusted_by="System"):
+        """Apply many stock movements in one transaction.
         
-        existing = fetch_one("SELECT id FROM inventory WHERE item_id = ?", (item_id,))
-        if existing:
-            execute_query("""
-                UPDATE inventory SET quantity = ?, weight_in_gm = ?, last_updated = ? WHERE item_id = ?
-            """, (item[0], item[1], datetime.now(), item_id))
-        else:
-            execute_query("""
-                INSERT INTO inventory (item_id, quantity, weight_in_gm, last_updated)
-                VALUES (?, ?, ?, ?)
-            """, (item_id, item[0], item[1], datetime.now()))
+        mode 'delta' adds each quantity/weight to stock (a receipt; negative values remove,
+        floored at zero like remove_stock); 'count' sets stock to the counted values (a stock
+        take; weight None keeps the current weight). Returns counts and throughput.
+        """
+        started = time.perf_counter()
+        movements = StockService.validate_movements(batch, mode)
+        item_ids = list({movement[0] for movement in movements})
+        now = datetime.now()
+        
+        with transaction() as cursor:
+            stock = {}
+            for offset in range(0, len(item_ids), 500):
+                chunk = item_ids[offset:offset + 500]
+                stock.update((row[0], (row[1] or 0, row[2] or 0)) for row in cursor.execute(f"""
+                    SELECT id, quantity, weight_in_gm FROM items WHERE id IN ({', '.join('?' * len(chunk))})
+                """, chunk))
+            missing = [item_id for item_id in item_ids if item_id not in stock]
+            if missing:
+                raise ValueError(f"Unknown item ids: {', '.join(map(str, sorted(missing)[:10]))}")
+            
+            rows = []
+            for item_id, quantity, weight, reason in movements:
+                previous_quantity, previous_weight = stock[item_id]
+                if mode == 'count':
+                    new_quantity = quantity
+                    new_weight = previous_weight if weight is None else weight
+                    change = new_quantity - previous_quantity
+                    weight_change = new_weight - previous_weight
+                    transaction_type = 'ADJUSTMENT_IN' if change > 0 else 'ADJUSTMENT_OUT' if change < 0 else 'ADJUSTMENT'
+                else:
+                    new_quantity = max(0, previous_quantity + quantity)
+                    new_weight = max(0, previous_weight + (weight or 0))
+                    change = quantity
+                    weight_change = weight or 0
+                    transaction_type = 'IN' if quantity >= 0 else 'OUT'
+                rows.append((item_id, transaction_type, change, weight_change, previous_quantity, new_quantity,
+                             previous_weight, new_weight, reference, reason, adjusted_by, now))
+                stock[item_id] = (new_quantity, new_weight)
+            
+            cursor.executemany("""
+                INSERT INTO stock_movements (item_id, transaction_type, quantity_change, weight_change,
+                                             previous_quantity, new_quantity, previous_weight, new_weight,
+                                             reference, reason, adjusted_by, date_created)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            cursor.executemany("""
+                UPDATE items SET quantity = ?, weight_in_gm = ?, date_modified = ? WHERE id = ?
+            """, [(quantity, weight, now, item_id) for item_id, (quantity, weight) in stock.items()])
+        
+        seconds = time.perf_counter() - started
+        return {
+            'movements': len(rows),
+            'items': len(stock),
+            'seconds': seconds,
+            'movements_per_second': len(rows) / seconds if seconds else 0
+        }
     
     @staticmethod
     def get_current_stock(item_id):
@@ -152,28 +221,22 @@ class StockService:
     
     @staticmethod
     def get_stock_valuation():
-        gold_value = fetch_one("""
-            SELECT COALESCE(SUM(quantity * price), 0), COALESCE(SUM(weight_in_gm), 0)
+        """Market values at current rates (see RevaluationEngine) with gold weight and diamond carats"""
+        totals = fetch_one("""
+            SELECT COALESCE(SUM(CASE WHEN m.name = 'Gold' THEN i.weight_in_gm END), 0),
+                   COALESCE(SUM(CASE WHEN m.name = 'Diamond' THEN i.diamond_carat END), 0)
             FROM items i
             JOIN materials m ON i.material_id = m.id
-            WHERE i.is_active = 1 AND m.name = 'Gold'
-        """)
-        
-        diamond_value = fetch_one("""
-            SELECT COALESCE(SUM(quantity * price), 0), COALESCE(SUM(diamond_carat), 0)
-            FROM items i
-            JOIN materials m ON i.material_id = m.id
-            WHERE i.is_active = 1 AND m.name = 'Diamond'
-        """)
-        
-        total_value = fetch_one("""
-            SELECT COALESCE(SUM(quantity * price), 0) FROM items WHERE is_active = 1
+            WHERE i.is_active = 1
         """)
+        valuation = RevaluationEngine.get()
+        by_material = valuation['by_material']
         
         return {
-            'gold_value': gold_value[0] if gold_value else 0,
-            'gold_weight': gold_value[1] if gold_value else 0,
-            'diamond_value': diamond_value[0] if diamond_value else 0,
-            'diamond_carat': diamond_value[1] if diamond_value else 0,
-            'total_value': total_value[0] if total_value else 0
+            'gold_value': by_material.get('Gold', (0, 0))[0],
+            'gold_weight': totals[0] if totals else 0,
+            'diamond_value': by_material.get('Diamond', (0, 0))[0],
+            'diamond_carat': totals[1] if totals else 0,
+            'total_value': valuation['total_value'],
+            'book_value': valuation['book_value']
         }
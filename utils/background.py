@@ -0,0 +1,138 @@
+import threading
+from tkinter import messagebox, ttk
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from database.db import get_pooled_connection
+from config import BACKGROUND_WORKERS, BACKGROUND_POLL_MS, SEARCH_DEBOUNCE_MS
+
+_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix='page-loader')
+_active_loads = {}
+
+class LoadingIndicator:
+    def __init__(self, widget, text="Loading..."):
+        self.label = ttk.Label(widget, text=text, font=("Segoe UI", 11, "italic"))
+        self.label.place(relx=0.5, rely=0.5, anchor='center')
+    
+    def close(self):
+        if self.label.winfo_exists():
+            self.label.destroy()
+
+
+class Debouncer:
+    """Calls func once the user has paused for delay_ms; each call restarts the wait"""
+    
+    def __init__(self, widget, func, delay_ms=SEARCH_DEBOUNCE_MS):
+        self.widget = widget
+        self.func = func
+        self.delay_ms = delay_ms
+        self._after_id = None
+    
+    def __call__(self, *args):
+        self.cancel()
+        self._after_id = self.widget.after(self.delay_ms, self._fire)
+    
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def flush(self, *args):
+        self.cancel()
+        self._fire()
+    
+    def _fire(self):
+        self._after_id = None
+        if self.widget.winfo_exists():
+            self.func()
+
+
+class LoadHandle:
+    """A pending background load; cancel() interrupts its query if it is still running"""
+    
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._connection = None
+    
+    def run(self, fetch):
+        with self._lock:
+            if self.cancelled:
+                raise CancelledError()
+            self._connection = get_pooled_connection()
+        try:
+            return fetch()
+        finally:
+            with self._lock:
+                self._connection = None
+    
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._connection is not None:
+                self._connection.interrupt()
+        if self.future is not None:
+            self.future.cancel()
+        if _active_loads.get(self.key) is self:
+            del _active_loads[self.key]
+
+
+def show_load_error(error):
+    messagebox.showerror("Error", f"Failed to load data: {error}")
+
+def load_async(widget, fetch, on_done, on_error=show_load_error, key=None, indicator=True):
+    """Run fetch() on a worker thread and hand its result to on_done on the Tk thread.
+    
+    A newer load with the same key (the widget by default) supersedes this one, and
+    the load is cancelled once widget is destroyed, e.g. when the user navigates away.
+    """
+    key = key if key is not None else str(widget)
+    previous = _active_loads.get(key)
+    if previous is not None:
+        previous.cancel()
+    
+    handle = LoadHandle(key)
+    _active_loads[key] = handle
+    loading = LoadingIndicator(widget) if indicator else None
+    root = widget.nametowidget('.')
+    handle.future = _executor.submit(handle.run, fetch)
+    
+    def finish():
+        if loading is not None:
+            loading.close()
+        if _active_loads.get(key) is handle:
+            del _active_loads[key]
+    
+    def poll():
+        if handle.cancelled:
+            if loading is not None:
+                loading.close()
+            return
+        if not widget.winfo_exists():
+            handle.cancel()
+            return
+        if not handle.future.done():
+            root.after(BACKGROUND_POLL_MS, poll)
+            return
+        
+        finish()
+        try:
+            result = handle.future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            return
+        on_done(result)
+    
+    root.after(BACKGROUND_POLL_MS, poll)
+    return handle
+
+def cancel_all_loads():
+    for handle in list(_active_loads.values()):
+        handle.cancel()
+
+def shutdown_background_loader():
+    cancel_all_loads()
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -1,31 +1,376 @@
 import csv
+import gzip
+import json
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-from config import EXPORT_PATH
+from database.db import get_connection, get_pooled_connection, mark_connection_used, date_range, EXPORT_TABLES
+from config import EXPORT_PATH, EXPORT_CHUNK_SIZE, ANALYTICS_EXPORT_PATH
+
+MONEY_FORMAT = '#,##0.00'
+WEIGHT_FORMAT = '#,##0.000'
+
+# table: (FROM clause aliasing it as t, date expression its rows are partitioned by)
+PARQUET_SOURCES = {
+    'bills': ("bills t", "t.bill_date"),
+    'bill_items': ("bill_items t LEFT JOIN bills b ON b.id = t.bill_id", "b.bill_date"),
+    'stock_movements': ("stock_movements t", "t.date_created"),
+    'payments': ("payments t", "t.payment_date"),
+    'transactions': ("transactions t", "COALESCE(t.transaction_date, t.date_created)"),
+}
 
 class ExportService:
+    STOCK_REPORT_QUERY = """
+        SELECT i.id, i.name, COALESCE(ic.name, 'Uncategorized'), i.quantity, i.weight_in_gm, i.price,
+               i.quantity * i.price
+        FROM items i
+        LEFT JOIN item_categories ic ON i.category_id = ic.id
+        WHERE i.is_active = 1
+        ORDER BY i.id
+    """
+    
+    SALES_REPORT_QUERY = """
+        SELECT b.bill_number, COALESCE(c.name, 'Walk-in'), b.bill_date, b.total_amount, b.status
+        FROM bills b
+        LEFT JOIN customers c ON b.customer_id = c.id
+        WHERE b.bill_type = 'Sales'{range}
+        ORDER BY b.id
+    """
+    
+    STOCK_MOVEMENTS_QUERY = """
+        SELECT sm.id, sm.date_created, sm.item_id, i.name, sm.transaction_type, sm.quantity_change,
+               sm.weight_change, sm.new_quantity, sm.new_weight, sm.bill_id, sm.reference, sm.reason
+        FROM stock_movements sm
+        LEFT JOIN items i ON sm.item_id = i.id
+        WHERE 1 = 1{range}
+        ORDER BY sm.id
+    """
+    
+    @staticmethod
+    def export_path(filename, extension):
+        return EXPORT_PATH / f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    
     @staticmethod
     def export_to_csv(data, filename, headers):
-        filepath = EXPORT_PATH / f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        
-        with open(filepath, 'w', newline='') as f:
-            writer = csv.writer(f)
+        filepath = ExportService.export_path(filename, 'csv')
+        ExportService.write_csv([data], headers, filepath)
+        return filepath
+    
+    @staticmethod
+    def query_chunks(query, params=(), chunk_size=EXPORT_CHUNK_SIZE, conn=None):
+        """Yield the rows of query a chunk at a time from one open cursor, on conn or the pooled connection"""
+        cursor = (conn or get_pooled_connection()).cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            if conn is None:
+                mark_connection_used()
+    
+    @staticmethod
+    def count_rows(query, params=()):
+        cursor = get_pooled_connection().cursor()
+        try:
+            return cursor.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+        finally:
+            cursor.close()
+            mark_connection_used()
+    
+    @staticmethod
+    def write_csv(chunks, headers, filepath, delimiter=',', progress=None, total=None):
+        """Write chunks of rows to a delimited text file, gzipped when it ends in .gz; returns the row count"""
+        if str(filepath).endswith('.gz'):
+            f = gzip.open(filepath, 'wt', newline='', encoding='utf-8', compresslevel=6)
+        else:
+            f = open(filepath, 'w', newline='', encoding='utf-8')
+        written = 0
+        with f:
+            writer = csv.writer(f, delimiter=delimiter)
             writer.writerow(headers)
-            writer.writerows(data)
+            for rows in chunks:
+                writer.writerows(rows)
+                written += len(rows)
+                if progress is not None:
+                    progress(written, total)
+        return written
+    
+    @staticmethod
+    def stream_to_csv(query, params, headers, filename, delimiter=',', compress=False, progress=None,
+                      chunk_size=EXPORT_CHUNK_SIZE):
+        """Export a query to exports/ straight from the cursor as CSV, or TSV for a tab delimiter.
         
-        return filepath
+        Returns {'path', 'rows', 'seconds', 'rows_per_second'}.
+        """
+        extension = 'tsv' if delimiter == '\t' else 'csv'
+        filepath = ExportService.export_path(filename, f"{extension}.gz" if compress else extension)
+        started = time.perf_counter()
+        total = ExportService.count_rows(query, params) if progress is not None else None
+        chunks = ExportService.query_chunks(query, params, chunk_size)
+        rows = ExportService.write_csv(chunks, headers, filepath, delimiter, progress, total)
+        return ExportService.export_stats(filepath, rows, time.perf_counter() - started)
+    
+    @staticmethod
+    def export_stats(filepath, rows, seconds):
+        return {
+            'path': filepath,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds > 0 else 0.0
+        }
+    
+    @staticmethod
+    def write_excel(chunks, headers, filepath, number_formats=None, progress=None, total=None):
+        """Write chunks of rows to an .xlsx file through a write-only workbook; returns the row count.
+        
+        Values are written as-is, so numbers stay numeric cells; number_formats maps a
+        column index to an Excel format such as MONEY_FORMAT. progress(done, total) is
+        called after each chunk.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        header_font = Font(bold=True)
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.font = header_font
+            header_cells.append(cell)
+        sheet.append(header_cells)
+        
+        formats = sorted((number_formats or {}).items())
+        written = 0
+        for rows in chunks:
+            for row in rows:
+                values = list(row)
+                for index, number_format in formats:
+                    if isinstance(values[index], (int, float)):
+                        cell = WriteOnlyCell(sheet, value=values[index])
+                        cell.number_format = number_format
+                        values[index] = cell
+                sheet.append(values)
+            written += len(rows)
+            if progress is not None:
+                progress(written, total)
+        
+        workbook.save(filepath)
+        return written
+    
+    @staticmethod
+    def stream_to_excel(query, params, headers, filename, number_formats=None, progress=None,
+                        chunk_size=EXPORT_CHUNK_SIZE):
+        """Export a query to exports/ in constant memory; returns the same stats as stream_to_csv"""
+        filepath = ExportService.export_path(filename, 'xlsx')
+        started = time.perf_counter()
+        total = ExportService.count_rows(query, params) if progress is not None else None
+        chunks = ExportService.query_chunks(query, params, chunk_size)
+        rows = ExportService.write_excel(chunks, headers, filepath, number_formats, progress, total)
+        return ExportService.export_stats(filepath, rows, time.perf_counter() - started)
+    
+    @staticmethod
+    def parquet_columns(table, conn=None):
+        """[(select expression, column name, kind)] for table, kind being int, float, date, timestamp or text.
+        
+        Every value is cast in SQL to its declared type, so a stray text value in a REAL
+        column cannot break the Arrow conversion.
+        """
+        cursor = (conn or get_pooled_connection()).cursor()
+        try:
+            declared = cursor.execute(f"PRAGMA table_info({table})").fetchall()
+        finally:
+            cursor.close()
+            if conn is None:
+                mark_connection_used()
+        
+        columns = []
+        for row in declared:
+            name, column_type = row[1], (row[2] or '').upper()
+            if 'INT' in column_type:
+                columns.append((f"CAST(t.{name} AS INTEGER)", name, 'int'))
+            elif column_type in ('REAL', 'FLOAT', 'DOUBLE', 'NUMERIC'):
+                columns.append((f"CAST(t.{name} AS REAL)", name, 'float'))
+            elif column_type == 'DATE':
+                columns.append((f"date(t.{name})", name, 'date'))
+            elif column_type in ('TIMESTAMP', 'DATETIME'):
+                columns.append((f"strftime('%Y-%m-%d %H:%M:%S', t.{name})", name, 'timestamp'))
+            else:
+                columns.append((f"CAST(t.{name} AS TEXT)", name, 'text'))
+        return columns
+    
+    @staticmethod
+    def export_parquet(tables=None, root=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Append the rows added or changed since the last run to a Parquet dataset partitioned by month.
+        
+        Each run first raises every table's id watermark in export_watermarks, so updates to rows
+        up to it are logged in export_changes from then on. It then writes
+        root/<table>/month=YYYY-MM/part-<run>.parquet from one read snapshot on its own connection:
+        the rows above the id the manifest last recorded, plus the rows logged since the log seq it
+        recorded. A table not in root/_manifest.json is exported whole. A row updated since is
+        appended again, so readers keep the highest _export_seq per id (read_parquet does).
+        Returns the stream_to_csv stats plus 'tables', the rows written per table.
+        """
+        root = Path(root or ANALYTICS_EXPORT_PATH)
+        tables = tables or EXPORT_TABLES
+        manifest_path = root / '_manifest.json'
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        run = 1 + max((entry['run'] if isinstance(entry, dict) else entry for entry in manifest.values()), default=0)
+        started = time.perf_counter()
+        
+        counts = {}
+        conn = get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            last_ids = {table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                        for table in tables}
+            conn.executemany("""
+                INSERT INTO export_watermarks (table_name, last_id) VALUES (?, ?)
+                ON CONFLICT (table_name) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+            """, last_ids.items())
+            conn.commit()
+            
+            conn.execute("BEGIN")
+            seq = conn.execute("""
+                SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'export_changes'), 0)
+            """).fetchone()[0]
+            for table in tables:
+                previous = manifest.get(table)
+                since = previous if isinstance(previous, dict) else None
+                counts[table] = ExportService.write_parquet_table(conn, table, root / table, since, last_ids[table],
+                                                                  seq, run, chunk_size)
+                manifest[table] = {'last_id': last_ids[table], 'seq': seq, 'run': run}
+            conn.rollback()
+            
+            root.mkdir(parents=True, exist_ok=True)
+            staged = manifest_path.with_name('.manifest.json.tmp')
+            staged.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+            os.replace(staged, manifest_path)
+            conn.executemany("DELETE FROM export_changes WHERE table_name = ? AND seq <= ?",
+                             [(table, seq) for table in tables])
+            conn.commit()
+        finally:
+            conn.close()
+        
+        stats = ExportService.export_stats(root, sum(counts.values()), time.perf_counter() - started)
+        stats['tables'] = counts
+        return stats
+    
+    @staticmethod
+    def write_parquet_table(conn, table, directory, since, last_id, seq, run, chunk_size=EXPORT_CHUNK_SIZE):
+        """Write table's rows with ids in (since['last_id'], last_id] or logged in export_changes within
+        (since['seq'], seq], or all rows up to last_id when since is None, as one part file per
+        month tagged with run; returns the row count"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        arrow_types = {'int': pa.int64(), 'float': pa.float64(), 'date': pa.date32(),
+                       'timestamp': pa.timestamp('s'), 'text': pa.string()}
+        columns = ExportService.parquet_columns(table, conn)
+        schema = pa.schema([(name, arrow_types[kind]) for expression, name, kind in columns] +
+                           [('_export_seq', pa.int64())])
+        source, partition = PARQUET_SOURCES[table]
+        query = (f"SELECT {', '.join(expression for expression, name, kind in columns)}, "
+                 f"COALESCE(strftime('%Y-%m', {partition}), 'undated') FROM {source} WHERE t.id <= ?")
+        params = (last_id,)
+        if since is not None:
+            if since['last_id'] >= last_id and since['seq'] >= seq:
+                return 0
+            query += """ AND (t.id > ? OR t.id IN (
+                SELECT row_id FROM export_changes WHERE table_name = ? AND seq > ? AND seq <= ?))"""
+            params += (since['last_id'], table, since['seq'], seq)
+        
+        writers = {}
+        written = 0
+        try:
+            for rows in ExportService.query_chunks(query, params, chunk_size, conn):
+                months = {}
+                for row in rows:
+                    months.setdefault(row[-1], []).append(row)
+                for month, month_rows in months.items():
+                    values = list(zip(*month_rows))
+                    arrays = []
+                    for position, (expression, name, kind) in enumerate(columns):
+                        if kind in ('date', 'timestamp'):
+                            arrays.append(pa.array(values[position], pa.string()).cast(arrow_types[kind]))
+                        else:
+                            arrays.append(pa.array(values[position], arrow_types[kind]))
+                    arrays.append(pa.repeat(pa.scalar(run, pa.int64()), len(month_rows)))
+                    
+                    if month not in writers:
+                        staged = directory / f"month={month}" / f".part-{run:012d}.parquet.tmp"
+                        staged.parent.mkdir(parents=True, exist_ok=True)
+                        writers[month] = (pq.ParquetWriter(staged, schema, compression='zstd'), staged)
+                    writers[month][0].write_table(pa.Table.from_arrays(arrays, schema=schema))
+                written += len(rows)
+        except BaseException:
+            for writer, staged in writers.values():
+                writer.close()
+                staged.unlink(missing_ok=True)
+            raise
+        
+        for writer, staged in writers.values():
+            writer.close()
+            os.replace(staged, staged.with_name(f"part-{run:012d}.parquet"))
+        return written
     
     @staticmethod
-    def export_stock_report(items):
+    def read_parquet(table, start_month=None, end_month=None, root=None):
+        """A pyarrow Table of the latest exported version of each row in months [start_month, end_month]"""
+        import numpy as np
+        import pyarrow.dataset as ds
+        
+        directory = Path(root or ANALYTICS_EXPORT_PATH) / table
+        dataset = ds.dataset(directory, format='parquet', partitioning='hive')
+        condition = None
+        if start_month is not None:
+            condition = ds.field('month') >= start_month
+        if end_month is not None:
+            before_end = ds.field('month') <= end_month
+            condition = before_end if condition is None else condition & before_end
+        rows = dataset.to_table(filter=condition)
+        
+        rows = rows.sort_by([('id', 'ascending'), ('_export_seq', 'descending')])
+        ids = rows['id'].to_numpy()
+        latest = np.ones(len(ids), dtype=bool)
+        latest[1:] = ids[1:] != ids[:-1]
+        return rows.filter(latest)
+    
+    @staticmethod
+    def export_stock_report(items=None, compress=False):
+        """Write items to CSV, or stream the active stock from the database when items is None"""
         headers = ['Item ID', 'Item Name', 'Category', 'Quantity', 'Weight(gm)', 'Price', 'Total Value']
-        return ExportService.export_to_csv(items, 'stock_report', headers)
+        if items is not None:
+            return ExportService.export_to_csv(items, 'stock_report', headers)
+        return ExportService.stream_to_csv(ExportService.STOCK_REPORT_QUERY, (), headers, 'stock_report',
+                                           compress=compress)['path']
     
     @staticmethod
-    def export_sales_report(sales):
+    def export_sales_report(sales=None, start=None, end=None, compress=False):
+        """Write sales to CSV, or stream the sales bills dated within [start, end] when sales is None"""
         headers = ['Bill Number', 'Customer', 'Date', 'Amount', 'Status']
-        return ExportService.export_to_csv(sales, 'sales_report', headers)
+        if sales is not None:
+            return ExportService.export_to_csv(sales, 'sales_report', headers)
+        conditions, params = date_range('b.bill_date', start, end)
+        query = ExportService.SALES_REPORT_QUERY.format(range=conditions)
+        return ExportService.stream_to_csv(query, params, headers, 'sales_report', compress=compress)['path']
+    
+    @staticmethod
+    def export_stock_movements(start=None, end=None, compress=True, delimiter=',', progress=None):
+        """Stream the stock movements dated within [start, end]; returns the stream_to_csv stats"""
+        headers = ['Movement ID', 'Date', 'Item ID', 'Item Name', 'Type', 'Quantity Change', 'Weight Change',
+                   'New Quantity', 'New Weight', 'Bill ID', 'Reference', 'Reason']
+        conditions, params = date_range('sm.date_created', start, end)
+        query = ExportService.STOCK_MOVEMENTS_QUERY.format(range=conditions)
+        return ExportService.stream_to_csv(query, params, headers, 'stock_movements', delimiter, compress, progress)
     
     @staticmethod
     def export_purchase_report(purchases):
         headers = ['Bill Number', 'Supplier', 'Date', 'Amount', 'Status']
-        return ExportService.export_to_csv(purchases, 'purchase_report', headers)
\ No newline at end of file
+        return ExportService.export_to_csv(purchases, 'purchase_report', headers)
@@ -0,0 +1,102 @@
+from tkinter import ttk
+from utils.background import load_async, show_load_error
+from config import LIST_PAGE_SIZE
+
+class VirtualTreeview(ttk.Treeview):
+    """Treeview that pulls rows from a keyset-paginated source a page at a time as the user scrolls.
+    
+    fetch_page(after, limit) returns up to `limit` rows following the key `after`
+    (None for the first page); key_of(row) gives a row's key, which must be unique,
+    and format_row(row) its display values.
+    """
+    
+    def __init__(self, master, key_of, format_row, page_size=LIST_PAGE_SIZE, prefetch=0.9, **kwargs):
+        super().__init__(master, **kwargs)
+        self.key_of = key_of
+        self.default_key_of = key_of
+        self.format_row = format_row
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self._fetch_page = None
+        self._source_key = None
+        self._last_key = None
+        self._exhausted = True
+        self._loading = False
+        self._yscroll = None
+        super().configure(yscrollcommand=self._on_yscroll)
+    
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, str):
+            return super().configure(cnf)
+        kw.update(cnf or {})
+        for option in ('yscroll', 'yscrollcommand'):
+            if option in kw:
+                self._yscroll = kw.pop(option)
+                if not kw:
+                    return None
+        return super().configure(**kw)
+    
+    config = configure
+    
+    def set_source(self, fetch_page, source_key=None, key_of=None):
+        """Show rows from fetch_page; the same source_key as before refreshes in place"""
+        same_source = source_key is not None and source_key == self._source_key
+        self._fetch_page = fetch_page
+        self.key_of = key_of or self.default_key_of
+        self._source_key = source_key
+        if same_source:
+            self.refresh()
+        else:
+            self._reload(max_rows=self.page_size, position=0, selection=())
+    
+    def refresh(self):
+        """Re-read the rows already loaded, keeping the scroll position and selection"""
+        if self._fetch_page is None:
+            return
+        self._reload(max(len(self.get_children()), self.page_size), self.yview()[0], self.selection())
+    
+    def _reload(self, max_rows, position, selection):
+        fetch_page = self._fetch_page
+        self._loading = True
+        
+        def show(rows):
+            self.delete(*self.get_children())
+            self._last_key = None
+            self._append(rows, max_rows)
+            self.yview_moveto(position)
+            keep = [iid for iid in selection if self.exists(iid)]
+            if keep:
+                self.selection_set(keep)
+        
+        load_async(self, lambda: fetch_page(None, max_rows), show, on_error=self._load_failed)
+    
+    def _load_more(self):
+        if self._loading or self._exhausted or self._fetch_page is None:
+            return
+        fetch_page = self._fetch_page
+        after = self._last_key
+        self._loading = True
+        load_async(self, lambda: fetch_page(after, self.page_size),
+                   lambda rows: self._append(rows, self.page_size),
+                   on_error=self._load_failed, indicator=False)
+    
+    def _append(self, rows, requested):
+        for row in rows:
+            key = self.key_of(row)
+            iid = '|'.join(str(part) for part in key)
+            if not self.exists(iid):
+                self.insert('', 'end', iid=iid, values=self.format_row(row))
+            self._last_key = key
+        self._exhausted = len(rows) < requested
+        self._loading = False
+    
+    def _load_failed(self, error):
+        self._loading = False
+        self._exhausted = True
+        show_load_error(error)
+    
+    def _on_yscroll(self, first, last):
+        if self._yscroll is not None:
+            self._yscroll(first, last)
+        if float(last) >= self.prefetch:
+            self._load_more()